@@ -1,27 +1,88 @@
-from prompts.prompts import agent_system_prompt_template
-from models.openai_models import OpenAIModel
+from prompts.prompts import agent_system_prompt_template, agent_native_tools_prompt_template
+from models.openai_models import OpenAIModel, tool_call_messages
+from models.async_openai_models import AsyncOpenAIModel
+from models.response_cache import ResponseCache
+from agents.example_store import DEFAULT_FEW_SHOT
+from agents.conversation import SessionStore, DEFAULT_HISTORY_TOKENS, DEFAULT_MAX_SESSIONS
 # from models.ollama_models import OllamaModel
 # from tools.basic_calculator import basic_calculator
 # from tools.reverser import reverse_string
-from tools.database_conn import create_db_connection
-from tools.sql_database_toolkit import get_metadata, list_tables, check_query, execute_query
-from toolbox.toolbox import ToolBox
-import pandas as pd
+# The SQL stack (SQLAlchemy, pandas, pyarrow) is imported where it is first used, so
+# agents without a database start without it
+from toolbox.toolbox import ToolBox, injected_parameters
+from toolbox.registry import resolve_tools
+from project_utils.cancellation import CancellationToken, QueryGovernorError
+from project_utils.concurrency import (run_blocking, get_blocking_executor, get_tool_executor, get_thread_limiter,
+                                       DEFAULT_DB_CONCURRENCY)
+from project_utils.json_stream import ToolResponseStreamParser
+from project_utils.tracing import get_tracer, PROMPT_BUILD, EXECUTION, FORMATTING, AGENT_WORK, AGENT_STEP, TOOL_CALL
+from contextlib import nullcontext
+import asyncio
+import copy
+import json
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Async counterparts used by Agent.awork when no async_model_service is given.
+ASYNC_MODEL_SERVICES = {OpenAIModel: AsyncOpenAIModel}
+
+# Tools of tools.sql_database_toolkit; the agent passes them its engine.
+SQL_TOOL_NAMES = {"get_metadata", "list_tables", "check_query", "execute_query"}
+
+# Model decisions per question; more than one enables the multi-step loop.
+DEFAULT_MAX_STEPS = 1
 
 
 class Agent:
-    def __init__(self, tools, model_service, model_name,connection_string=None, stop=None):
+    def __init__(self, tools, model_service, model_name,connection_string=None, stop=None,
+                 async_model_service=None, db_concurrency=DEFAULT_DB_CONCURRENCY, response_cache=None,
+                 schema_top_k=None, schema_token_budget=None, db_options=None, native_tools=False,
+                 max_steps=DEFAULT_MAX_STEPS, query_limits=None, router=None, example_store=None,
+                 few_shot_examples=DEFAULT_FEW_SHOT, history_token_budget=DEFAULT_HISTORY_TOKENS,
+                 max_sessions=DEFAULT_MAX_SESSIONS):
         """
         Initializes the agent with a list of tools, a model, and an optional database connection.
 
         Parameters:
-        tools (list): List of tool functions.
+        tools (list): Tool functions, or names of tools registered in toolbox.registry.
         model_service (class): The model service class with a generate_text method.
         model_name (str): The name of the model to use.
         connection_string (str, optional): Connection string for the database (if using SQL tools).
         stop (str, optional): A stopping condition for the model generation.
+        async_model_service (class, optional): Model service with an async generate_text, used by awork.
+                                               Defaults to the async counterpart of model_service.
+        db_concurrency (int, optional): Maximum concurrent database calls per connection string in awork.
+        response_cache (ResponseCache, optional): Cache for model decisions. Defaults to an in-memory cache.
+        schema_top_k (int, optional): If set, only the schema_top_k tables most relevant to the question
+                                      are put into the prompt.
+        schema_token_budget (int, optional): Approximate token limit for the schema part of the prompt.
+        db_options (dict, optional): Extra keyword arguments for create_db_connection, e.g. pool_profile,
+                                     sqlite_pragmas or read_replicas. Agents with the same connection
+                                     string and options share one engine.
+        native_tools (bool, optional): Use the model's native function calling (generate_tool_call)
+                                       with JSON-schema tool definitions instead of describing the
+                                       tools in the prompt and parsing free-form JSON.
+        max_steps (int, optional): Step budget of the multi-step loop (see run_loop). With more than
+                                   one step, work and awork let the model call tools repeatedly
+                                   before answering. Requires native_tools.
+        query_limits (QueryLimits, optional): Time, row and size limits for generated SQL.
+                                              Defaults to the engine's limits (get_query_limits).
+        router (Router, optional): Local fast-path router (agents.router) answering trivial tool
+                                   requests without a model call.
+        example_store (ExampleStore, optional): Questions answered with working SQL. Near-identical
+                                                questions reuse the stored SQL without a model call and
+                                                similar ones are shown to the model as examples.
+        few_shot_examples (int, optional): Maximum number of stored examples put into the prompt.
+        history_token_budget (int, optional): Approximate token limit of the conversation history
+                                              sent with a question asked in a session (see
+                                              agents.conversation).
+        max_sessions (int, optional): Number of sessions whose conversations are remembered.
         """
-        self.tools = tools
+        if max_steps > 1 and not native_tools:
+            raise ValueError("A multi-step loop (max_steps > 1) requires native_tools=True.")
+        self.tools = resolve_tools(tools)
         self.model_service = model_service
         self.model_name = model_name
         self.stop = stop
@@ -29,158 +90,756 @@ class Agent:
         # self.model_main = model_main
         self.connection_string = connection_string
         self.db_engine = None
+        self.model_instance = None
+        self.async_model_service = async_model_service or ASYNC_MODEL_SERVICES.get(model_service)
+        self.async_model_instance = None
+        self.db_concurrency = db_concurrency
+        self.response_cache = response_cache if response_cache is not None else ResponseCache()
+        self.schema_fingerprint = None
+        self.schema_top_k = schema_top_k
+        self.schema_token_budget = schema_token_budget
+        self.native_tools = native_tools
+        self.max_steps = max_steps
+        self.query_limits = query_limits
+        self.router = router
+        self.example_store = example_store
+        self.few_shot_examples = few_shot_examples
+        self.sessions = SessionStore(history_token_budget, max_sessions)
+        # SQL of the last successful execute_query outside of a session
+        self.last_query = None
+        # Built once; tool descriptions and schemas are derived from it on demand
+        self.toolbox = ToolBox()
+        self.toolbox.store(self.tools)
         #comment for openai 
         # self.stop = stop
 
 
         # Initialize the database connection if a connection string is provided
         if connection_string:
-            self.db_engine = create_db_connection(connection_string)
+            from tools.database_conn import create_db_connection
+            self.db_engine = create_db_connection(connection_string, **(db_options or {}))
+
+    def get_model(self):
+        """
+        Returns the model client, creating it on first use.
+
+        The client is reused for every prompt so its pooled HTTP connections stay warm;
+        the system prompt is passed per call instead of baked into a new instance.
+
+        Returns:
+        object: An instance of model_service.
+        """
+        if self.model_instance is None:
+            self.model_instance = self.model_service(
+                model=self.model_name,
+                system_prompt="",
+                temperature=0,
+                # stop = self.stop
+            )
+        return self.model_instance
+
+    def get_async_model(self):
+        """
+        Returns the async model client, creating it on first use.
+
+        Returns:
+        object or None: An instance of async_model_service, or None if there is none.
+        """
+        if self.async_model_instance is None and self.async_model_service is not None:
+            self.async_model_instance = self.async_model_service(
+                model=self.model_name,
+                system_prompt="",
+                temperature=0,
+            )
+        return self.async_model_instance
 
     def prepare_tools(self):
         """
-        Stores the tools in the toolbox and returns their descriptions.
+        Returns the descriptions of the tools stored in the toolbox.
 
         Returns:
         str: Descriptions of the tools stored in the toolbox.
         """
-        toolbox = ToolBox()
-        toolbox.store(self.tools)
-        tool_descriptions = toolbox.tools()
-        return tool_descriptions
+        return self.toolbox.tools()
     
 
 
-    def think(self, prompt):
+    def think(self, prompt, session=None):
         """
         Runs the generate_text method on the model using the system prompt template,
         tool descriptions, and database schema (if available).
 
         Parameters:
         prompt (str): The user query to generate a response for.
+        session (ConversationMemory, optional): The conversation the query belongs to; its
+                                                history is sent along with the query.
 
         Returns:
         dict: The response from the model as a dictionary.
         """
-        tool_descriptions = self.prepare_tools()
+        routed = self.route(prompt)
+        if routed is not None:
+            return routed
+
+        agent_system_prompt = self.build_system_prompt(prompt, session)
+        context = session.context() if session is not None else None
+        message = self.user_message(prompt, session)
+        cache_key, cached = self.lookup_response(message, agent_system_prompt, context)
+        if cached is not None:
+            return cached
+        reused = None if context else self.reuse_example(prompt)
+        if reused is not None:
+            return reused
+
+        # Generate and return the response dictionary using the shared model client
+        model = self.get_model()
+        start = time.perf_counter()
+        if self.native_tools:
+            agent_response_dict = model.generate_tool_call(message, self.toolbox.schemas(),
+                                                           system_prompt=agent_system_prompt, context=context)
+        else:
+            agent_response_dict = model.generate_text(message, system_prompt=agent_system_prompt, context=context)
+        self.observe_llm_latency(start)
+        self.remember_response(cache_key, agent_response_dict)
+        return agent_response_dict
+
+    def lookup_response(self, prompt, agent_system_prompt, context=None):
+        """
+        Looks up a cached model response for this prompt, system prompt and conversation
+        history.
+
+        Returns:
+        tuple: (cache key, cached response dict or None).
+        """
+        if self.native_tools:
+            # The tools are not part of the prompt text, key on their definitions too
+            agent_system_prompt = f"{agent_system_prompt}\ntools:{self.toolbox.fingerprint()}"
+        if context:
+            agent_system_prompt = f"{agent_system_prompt}\ncontext:{json.dumps(context, sort_keys=True)}"
+        cache_key = self.response_cache.make_key(self.model_name, agent_system_prompt, prompt, 0)
+        return cache_key, self.response_cache.get(cache_key)
+
+    def remember_response(self, cache_key, agent_response_dict):
+        """
+        Caches a successful model response, tagged with the schema it was generated against.
+        """
+        if isinstance(agent_response_dict, dict) and "error" not in agent_response_dict:
+            self.response_cache.set(cache_key, agent_response_dict, tag=self.schema_fingerprint)
+
+    def build_system_prompt(self, prompt=None, session=None):
+        """
+        Formats the system prompt with the tool descriptions and database schema (if available).
+
+        Parameters:
+        prompt (str, optional): The user query, used to prune the schema to relevant tables.
+        session (ConversationMemory, optional): The query's conversation. Its recent questions
+                                                help pick the schema, and the per-query examples
+                                                move to the user message (see user_message) so the
+                                                system prompt stays the same from turn to turn.
+
+        Returns:
+        str: The system prompt.
+        """
+        with get_tracer().span(PROMPT_BUILD) as span:
+            agent_system_prompt = self._format_system_prompt(prompt, session)
+            span.set(chars=len(agent_system_prompt))
+            return agent_system_prompt
 
+    def _format_system_prompt(self, prompt, session=None):
         # Retrieve schema information if the database connection is initialized
         schema_info = ""
         if self.db_engine:
-            schema_info = f"Database Schema:\n{get_metadata(self.db_engine)}\n"
+            from tools.schema_catalog import get_schema_catalog
+            catalog = get_schema_catalog(self.db_engine)
+            schema_query = session.topic(prompt) if session is not None and prompt else prompt
+            schema_info = catalog.prompt_text(schema_query, top_k=self.schema_top_k,
+                                              token_budget=self.schema_token_budget)
+            fingerprint = catalog.fingerprint()
+            if self.schema_fingerprint is not None and fingerprint != self.schema_fingerprint:
+                # Responses and SQL written against the old schema can no longer be served
+                self.response_cache.invalidate_tag(self.schema_fingerprint)
+                if self.example_store is not None:
+                    self.example_store.invalidate(self.schema_fingerprint)
+            self.schema_fingerprint = fingerprint
+
+        examples = self.few_shot(prompt) if session is None else ""
 
         # Format the system prompt
-        agent_system_prompt = agent_system_prompt_template.format(
+        if self.native_tools:
+            return agent_native_tools_prompt_template.format(schema_info=schema_info, examples=examples)
+        tool_descriptions = self.prepare_tools()
+        return agent_system_prompt_template.format(
             tool_descriptions=tool_descriptions,
             schema_info=schema_info,
-            
+            examples=examples,
         )
 
-        # Create an instance of the model service with the system prompt
-        model_instance = self.model_service(
-            model=self.model_name,
-            system_prompt=agent_system_prompt,
-            temperature=0,
-            # stop = self.stop
+    def few_shot(self, prompt):
+        """
+        Returns the stored examples most similar to the query, rendered for the prompt, or "".
+        """
+        if self.example_store is None or self.schema_fingerprint is None or not self.few_shot_examples or not prompt:
+            return ""
+        return self.example_store.few_shot(prompt, self.schema_fingerprint, limit=self.few_shot_examples)
 
-        )
+    def user_message(self, prompt, session=None):
+        """
+        Returns the user message for a query. In a session the few-shot examples come
+        before the query here instead of in the system prompt.
+        """
+        if session is None:
+            return prompt
+        examples = self.few_shot(prompt)
+        return f"{examples}\n{prompt}" if examples else prompt
 
-        # Generate and return the response dictionary
-        agent_response_dict = model_instance.generate_text(prompt)
+    def get_session(self, session_id):
+        """
+        Returns the conversation of a session, or None without a session id.
+        """
+        return None if session_id is None else self.sessions.get(session_id)
+
+    async def athink(self, prompt, session=None):
+        """
+        Async version of think. Schema reflection runs on the bounded thread pool and the
+        model call goes through the async model service when one is available.
+
+        Parameters:
+        prompt (str): The user query to generate a response for.
+        session (ConversationMemory, optional): The conversation the query belongs to.
+
+        Returns:
+        dict: The response from the model as a dictionary.
+        """
+        routed = self.route(prompt)
+        if routed is not None:
+            return routed
+
+        agent_system_prompt = await self.run_db(self.build_system_prompt, prompt, session)
+        context = session.context() if session is not None else None
+        message = await self.run_db(self.user_message, prompt, session) if session is not None else prompt
+        cache_key, cached = self.lookup_response(message, agent_system_prompt, context)
+        if cached is not None:
+            return cached
+        reused = None if context else self.reuse_example(prompt)
+        if reused is not None:
+            return reused
+
+        async_model = self.get_async_model()
+        start = time.perf_counter()
+        if self.native_tools:
+            tools = self.toolbox.schemas()
+            if async_model is None:
+                agent_response_dict = await run_blocking(self.get_model().generate_tool_call, message, tools,
+                                                         system_prompt=agent_system_prompt, context=context)
+            else:
+                agent_response_dict = await async_model.generate_tool_call(message, tools,
+                                                                           system_prompt=agent_system_prompt,
+                                                                           context=context)
+        elif async_model is None:
+            # No async client for this model service, keep the loop free with a thread
+            agent_response_dict = await run_blocking(self.get_model().generate_text, message,
+                                                     system_prompt=agent_system_prompt, context=context)
+        else:
+            agent_response_dict = await async_model.generate_text(message, system_prompt=agent_system_prompt,
+                                                                  context=context)
+        self.observe_llm_latency(start)
+        self.remember_response(cache_key, agent_response_dict)
         return agent_response_dict
-    
+
+    def reuse_example(self, prompt):
+        """
+        Looks up stored SQL for a near-identical question on the current schema.
+
+        Returns:
+        dict or None: An execute_query decision reusing the SQL, or None when the model has to decide.
+        """
+        if self.example_store is None or self.schema_fingerprint is None or "execute_query" not in self.toolbox.functions:
+            return None
+        sql = self.example_store.reusable_sql(prompt, self.schema_fingerprint)
+        if sql is None:
+            return None
+        get_tracer().count("example_reuse_hits")
+        return {"tool_choice": "execute_query", "tool_input": sql, "reused": True}
+
+    def route(self, prompt):
+        """
+        Asks the local router for the tool decision.
+
+        Returns:
+        dict or None: The routed decision, or None when the model has to decide.
+        """
+        if self.router is None:
+            return None
+        return self.router.route(prompt, self.toolbox.functions.keys())
+
+    def observe_llm_latency(self, start):
+        """
+        Reports the duration of a model call started at start (perf_counter) to the router.
+        """
+        if self.router is not None:
+            self.router.observe_llm_latency((time.perf_counter() - start) * 1000)
+
+    async def run_db(self, func, *args, **kwargs):
+        """
+        Runs blocking (database) work on the shared thread pool, bounded per connection string.
+        """
+        if not self.db_engine:
+            return func(*args, **kwargs)
+        return await run_blocking(func, *args, limit_key=self.connection_string,
+                                  limit=self.db_concurrency, **kwargs)
+
     def format_query_response(self, query_result):
         """
-        Formats a query execution result into a natural language sentence.
+        Formats a query execution result into a natural language description.
 
         Args:
-            query_result (pd.DataFrame): The result of the SQL query execution.
+            query_result (dict or pd.DataFrame): A ResultSummarizer summary of the result,
+                                                 or the result itself.
 
         Returns:
-            str: Natural language description of the query result.
+            str: Natural language description of the query result, bounded in size
+                 however many rows it has.
         """
+        import pandas as pd
+        from tools.result_summary import summarize_dataframe, render_summary
 
-        # Validate query_result is a DataFrame
-        if not isinstance(query_result, pd.DataFrame):
-            print("Query Result is not a DataFrame.")
+        if isinstance(query_result, pd.DataFrame):
+            query_result = summarize_dataframe(query_result)
+        if not isinstance(query_result, dict) or "rows" not in query_result:
+            logger.debug("Query Result is not a DataFrame or summary.")
             return "The query result format is unsupported or invalid."
 
-        # Handle empty DataFrame
-        if query_result.empty:
-            print("Query Result is empty.")
-            return "The query returned no results."
-
-        # Extract column names and first row values
-        column_names = query_result.columns.tolist()
-        first_row = query_result.iloc[0].tolist()
-
-        # Handle DataFrame with no rows
-        if not first_row:
-            print("Query Result has no rows.")
-            return "The query returned no data to process."
-
-        # Format the result dynamically
-        result_sentences = []
-        for col, val in zip(column_names, first_row):
-            # Replace underscores in column names with spaces for readability
-            col_name = col.replace("_", " ")
-            # Format numbers with commas
-            if pd.api.types.is_numeric_dtype(query_result[col]):
-                val = f"{val:,}"  # Add commas for large numbers
-            result_sentences.append(f"{col_name} is {val}")
-
-        formatted_result = ", ".join(result_sentences)
-        print("Formatted Query Response:", formatted_result)
+        formatted_result = render_summary(query_result)
+        logger.debug("Formatted Query Response: %s", formatted_result)
         return formatted_result
 
-
-
-
-    
-    def work(self, prompt):
+    def work(self, prompt, cancel_token=None, session_id=None):
         """
         Parses the dictionary returned from think and executes the appropriate tool.
 
         Parameters:
             prompt (str): The user query to generate a response for.
+            cancel_token (CancellationToken, optional): Cancel it to stop the running query
+                                                        when the request is abandoned.
+            session_id (hashable, optional): Conversation the query belongs to. Earlier turns of
+                                             the session are sent as context, so follow-up
+                                             questions can refer to them.
 
        Returns:
             the tool response or tool_input if no matching tool is found."
         """
-        agent_response_dict = self.think(prompt)
+        session = self.get_session(session_id)
+        if self.max_steps > 1:
+            return self.run_loop(prompt, cancel_token=cancel_token, session=session)["response"]
+        with get_tracer().span(AGENT_WORK):
+            agent_response_dict = self.think(prompt, session)
+            response = self.dispatch(agent_response_dict, cancel_token=cancel_token, prompt=prompt, session=session)
+        if session is not None:
+            session.add_turn(prompt, agent_response_dict, response)
+        return response
+
+    async def awork(self, prompt, session_id=None):
+        """
+        Async version of work. Many awork calls can be in flight on one event loop; the model
+        call is awaited and the tool execution runs on the bounded thread pool. Cancelling the
+        awaiting task also stops the query running on its behalf.
+
+        Parameters:
+            prompt (str): The user query to generate a response for.
+            session_id (hashable, optional): Conversation the query belongs to (see work).
+
+        Returns:
+            the tool response or tool_input if no matching tool is found.
+        """
+        cancel_token = CancellationToken()
+        session = self.get_session(session_id)
+        try:
+            if self.max_steps > 1:
+                # The loop blocks between steps; it holds no database slot while waiting on the model
+                return (await run_blocking(self.run_loop, prompt, cancel_token=cancel_token,
+                                           session=session))["response"]
+            with get_tracer().span(AGENT_WORK, mode="async"):
+                agent_response_dict = await self.athink(prompt, session)
+                response = await self.run_db(self.dispatch, agent_response_dict, cancel_token=cancel_token,
+                                             prompt=prompt, session=session)
+            if session is not None:
+                session.add_turn(prompt, agent_response_dict, response)
+            return response
+        except asyncio.CancelledError:
+            cancel_token.cancel()
+            raise
+
+    def stream_work(self, prompt, session_id=None):
+        """
+        Streaming version of work.
+
+        The model output is parsed while it streams. As soon as tool_choice is known the
+        chosen tool is prepared in the background (schema and connection warmed for SQL
+        tools) while tool_input is still arriving. Direct answers ("no tool") are yielded
+        piece by piece; tool results are yielded once the tool has run. Closing the generator
+        early (the user left) stops the running query.
+
+        Parameters:
+            prompt (str): The user query to generate a response for.
+            session_id (hashable, optional): Conversation the query belongs to (see work).
+
+        Yields:
+            str: Pieces of the response.
+        """
+        cancel_token = CancellationToken()
+        try:
+            yield from self._stream_work(prompt, cancel_token, session_id)
+        except GeneratorExit:
+            cancel_token.cancel()
+            raise
+
+    def _stream_work(self, prompt, cancel_token, session_id=None):
+        session = self.get_session(session_id)
+        routed = self.route(prompt)
+        if routed is not None:
+            response = str(self.dispatch(routed, cancel_token=cancel_token, session=session))
+            if session is not None:
+                session.add_turn(prompt, routed, response)
+            yield response
+            return
+
+        model = self.get_model()
+        if self.native_tools or not hasattr(model, "stream_text"):
+            # Native tool calls arrive whole; there is no free-form JSON to parse while streaming
+            yield str(self.work(prompt, cancel_token=cancel_token, session_id=session_id))
+            return
+
+        agent_system_prompt = self.build_system_prompt(prompt, session)
+        context = session.context() if session is not None else None
+        message = self.user_message(prompt, session)
+        cache_key, cached = self.lookup_response(message, agent_system_prompt, context)
+        if cached is None and not context:
+            cached = self.reuse_example(prompt)
+        if cached is not None:
+            response = str(self.dispatch(cached, cancel_token=cancel_token, prompt=prompt, session=session))
+            if session is not None:
+                session.add_turn(prompt, cached, response)
+            yield response
+            return
+
+        parser = ToolResponseStreamParser()
+        emitted = 0
+        preparing = None
+        for delta in model.stream_text(message, system_prompt=agent_system_prompt, context=context):
+            parser.feed(delta)
+            if parser.tool_choice is None:
+                continue
+            if preparing is None:
+                preparing = get_blocking_executor().submit(self.prepare_tool, parser.tool_choice)
+            if parser.tool_choice == "no tool" and len(parser.tool_input_text) > emitted:
+                yield parser.tool_input_text[emitted:]
+                emitted = len(parser.tool_input_text)
+
+        try:
+            agent_response_dict = parser.result()
+        except ValueError as e:
+            # Not the JSON object the prompt asks for; reported like a failed generate_text
+            logger.warning("Error parsing API response: %s", e)
+            agent_response_dict = {"error": f"Error parsing API response: {e}"}
+            if session is not None:
+                session.add_turn(prompt, agent_response_dict, agent_response_dict)
+            yield str(agent_response_dict)
+            return
+        self.remember_response(cache_key, agent_response_dict)
+        if agent_response_dict.get("tool_choice") == "no tool":
+            if session is not None:
+                session.add_turn(prompt, agent_response_dict, agent_response_dict.get("tool_input"))
+            if not emitted:
+                yield str(agent_response_dict.get("tool_input"))
+            return
+        if preparing is not None:
+            preparing.result()
+        response = str(self.dispatch(agent_response_dict, cancel_token=cancel_token, prompt=prompt, session=session))
+        if session is not None:
+            session.add_turn(prompt, agent_response_dict, response)
+        yield response
+
+    def run_loop(self, prompt, max_steps=None, cancel_token=None, session=None):
+        """
+        Multi-step agent loop using native function calling.
+
+        Each step asks the model for its next decision given the question and every tool
+        result so far. Independent tool calls returned in the same turn run concurrently
+        (see run_tool_calls) and all their results go back to the model in a single
+        follow-up turn. The loop ends when the model answers without calling a tool; on
+        the last step of the budget the model is asked to answer with what it has.
+
+        Parameters:
+            prompt (str): The user query.
+            max_steps (int, optional): Step budget. Defaults to the agent's max_steps.
+            cancel_token (CancellationToken, optional): Stops the loop and its running queries.
+            session (ConversationMemory, optional): The conversation the query belongs to; its
+                                                    history is sent and the finished turn recorded.
+
+        Returns:
+            dict: {"response": the final answer, "steps": per-step timings
+                  [{"step", "llm_ms", "tools_ms", "tool_calls": [{"name", "ms"}]}]}.
+        """
+        outcome = self._run_loop(prompt, max_steps or self.max_steps, cancel_token, session)
+        calls = outcome.pop("tool_calls")
+        if session is not None:
+            session.add_turn(prompt, {"tool_calls": calls}, outcome["response"])
+        return outcome
+
+    def _run_loop(self, prompt, max_steps, cancel_token, session):
+        tracer = get_tracer()
+        model = self.get_model()
+        tools = self.toolbox.schemas()
+        history = []
+        steps = []
+        results = []
+        calls = []
+        routed = self.route(prompt)
+        if routed is not None:
+            response = self.dispatch(routed, cancel_token=cancel_token, session=session)
+            return {"response": response, "steps": steps,
+                    "tool_calls": [{"name": routed["tool_choice"], "arguments": routed["tool_input"]}]}
+        with tracer.span(AGENT_WORK, mode="loop") as work_span:
+            agent_system_prompt = self.build_system_prompt(prompt, session)
+            context = session.context() if session is not None else None
+            message = self.user_message(prompt, session)
+            for step in range(1, max_steps + 1):
+                if cancel_token is not None and cancel_token.cancelled:
+                    return {"response": {"error": "The request was cancelled.", "code": "cancelled"}, "steps": steps,
+                            "tool_calls": calls}
+                with tracer.span(AGENT_STEP, step=step) as span:
+                    start = time.perf_counter()
+                    agent_response_dict = model.generate_tool_call(
+                        message, tools, system_prompt=agent_system_prompt, history=history,
+                        tool_choice="none" if step == max_steps else "auto", context=context,
+                    )
+                    timing = {"step": step, "llm_ms": round((time.perf_counter() - start) * 1000, 3),
+                              "tools_ms": 0.0, "tool_calls": []}
+                    steps.append(timing)
+                    work_span.set(steps=step)
+
+                    if "error" in agent_response_dict:
+                        return {"response": agent_response_dict, "steps": steps, "tool_calls": calls}
+                    tool_calls = agent_response_dict["tool_calls"]
+                    if not tool_calls:
+                        return {"response": agent_response_dict["tool_input"], "steps": steps, "tool_calls": calls}
+
+                    start = time.perf_counter()
+                    results, call_timings = self.run_tool_calls(tool_calls, cancel_token=cancel_token,
+                                                                session=session)
+                    timing["tools_ms"] = round((time.perf_counter() - start) * 1000, 3)
+                    timing["tool_calls"] = call_timings
+                    span.set(tool_calls=len(tool_calls), llm_ms=timing["llm_ms"], tools_ms=timing["tools_ms"])
+                    history.extend(tool_call_messages(tool_calls, results))
+                    calls.extend(tool_calls)
+
+        # The model kept calling tools through the last step: return the latest results
+        return {"response": results[0] if len(results) == 1 else results, "steps": steps, "tool_calls": calls}
+
+    def run_tool_calls(self, tool_calls, cancel_token=None, session=None):
+        """
+        Runs the tool calls of one model turn, concurrently when there are several.
+
+        Calls run on the shared tool thread pool; database tools additionally hold a slot
+        of a per-connection semaphore sized to the engine's connection pool, so parallel
+        calls never wait on the pool itself.
+
+        Parameters:
+            tool_calls (list): Calls as returned in the model response's "tool_calls".
+            cancel_token (CancellationToken, optional): Stops the running queries.
+            session (ConversationMemory, optional): The conversation the calls belong to.
+
+        Returns:
+            tuple: (list of result strings, list of {"name", "ms"}) in call order.
+        """
+        if len(tool_calls) == 1:
+            outcomes = [self._run_tool_call(tool_calls[0], cancel_token, session)]
+        else:
+            futures = [get_tool_executor().submit(self._run_tool_call, call, cancel_token, session)
+                       for call in tool_calls]
+            outcomes = [future.result() for future in futures]
+        results = [result for result, _ in outcomes]
+        timings = [{"name": call["name"], "ms": ms} for call, (_, ms) in zip(tool_calls, outcomes)]
+        return results, timings
+
+    def _run_tool_call(self, call, cancel_token=None, session=None):
+        """
+        Runs one native tool call, returning (result text, elapsed ms). Errors are returned
+        as text so the model can correct itself on the next step.
+        """
+        start = time.perf_counter()
+        with get_tracer().span(TOOL_CALL, tool=call["name"]):
+            if call["name"] not in self.toolbox.functions:
+                result = f"Error: unknown tool {call['name']!r}."
+            else:
+                uses_db = self.db_engine is not None and (
+                    call["name"] in SQL_TOOL_NAMES or "engine" in injected_parameters(self.toolbox.functions[call["name"]]))
+                limiter = get_thread_limiter(self.connection_string, self.db_pool_limit()) if uses_db else nullcontext()
+                try:
+                    with limiter:
+                        result = self.dispatch({"tool_choice": call["name"], "tool_input": call["arguments"],
+                                                "tool_calls": [call]}, cancel_token=cancel_token, session=session)
+                except Exception as e:
+                    logger.warning("Tool %s failed: %s", call["name"], e)
+                    result = f"Error: {type(e).__name__}: {e}"
+        if not isinstance(result, str):
+            result = json.dumps(result, default=str)
+        return result, round((time.perf_counter() - start) * 1000, 3)
+
+    def db_pool_limit(self):
+        """
+        Returns:
+        int: How many database tool calls may run at once: the engine's connection pool
+             size, capped by db_concurrency.
+        """
+        size = getattr(self.db_engine.pool, "size", None)
+        size = size() if callable(size) else 1
+        return max(1, min(size, self.db_concurrency))
+
+    def forget_example(self, prompt):
+        """
+        Stops reusing the stored SQL for a question after it failed.
+        """
+        if self.example_store is not None and prompt is not None and self.schema_fingerprint is not None:
+            self.example_store.record_failure(prompt, self.schema_fingerprint)
+
+    def summarize_query(self, query, cancel_token=None, limits=None):
+        """
+        Executes a query under the query limits and summarizes the whole result as it
+        streams, without materializing it. The query runs on a read replica when there
+        is one.
+
+        Parameters:
+        query (str): The validated SQL query.
+        cancel_token (CancellationToken, optional): Stops the query.
+        limits (QueryLimits, optional): Defaults to the agent's query_limits or the engine's.
+
+        Returns:
+        dict: The ResultSummarizer summary. No exploratory LIMIT is added since no rows are
+              kept; it is marked incomplete when the max_rows cap cut the result short.
+
+        Raises:
+        QueryGovernorError: If the query timed out or was cancelled.
+        """
+        from tools.database_conn import get_read_engine
+        from tools.query_governor import governed_read, get_query_limits
+        from tools.result_summary import ResultSummarizer
+
+        limits = limits or self.query_limits or get_query_limits(self.db_engine)
+        summarizer = ResultSummarizer()
+        with get_tracer().span(EXECUTION) as span:
+            _, result = governed_read(get_read_engine(self.db_engine), query, limits=limits, token=cancel_token,
+                                      on_batch=summarizer.update)
+            span.set(rows=result.rows_read, bytes=result.bytes_read)
+        return summarizer.summary(complete=not result.truncated)
+
+    def injected_arguments(self, tool, cancel_token=None, session=None):
+        """
+        Returns the arguments the agent supplies itself (toolbox.INJECTED_PARAMETERS) that
+        a non-SQL tool takes, e.g. the engine and the conversation's last query for
+        tools.batch_Calculator.
+        """
+        available = {"engine": self.db_engine, "cancel_token": cancel_token,
+                     "last_query": (session if session is not None else self).last_query}
+        return {name: available[name] for name in injected_parameters(tool)}
+
+    def prepare_tool(self, tool_choice):
+        """
+        Warms up what a tool needs before it runs: for SQL tools, the schema catalog and a
+        pooled database connection.
+
+        Parameters:
+            tool_choice (str): The name of the chosen tool.
+        """
+        if tool_choice in SQL_TOOL_NAMES and self.db_engine:
+            from tools.schema_catalog import get_schema_catalog
+            get_schema_catalog(self.db_engine).metadata()
+            with self.db_engine.connect():
+                pass
+
+    def dispatch(self, agent_response_dict, cancel_token=None, prompt=None, session=None):
+        """
+        Executes the tool selected in the dictionary returned from think.
+
+        Parameters:
+            agent_response_dict (dict): The model response with tool_choice and tool_input.
+            cancel_token (CancellationToken, optional): Stops the running query.
+            prompt (str, optional): The user query. Given, SQL that runs successfully is stored
+                                    in the example store for it.
+            session (ConversationMemory, optional): The conversation the query belongs to. SQL
+                                                    that runs successfully becomes its last_query
+                                                    (the agent's without a session).
+
+        Returns:
+            the tool response or tool_input if no matching tool is found, or the model
+            response itself when it is an {"error": ...} without a tool choice.
+        """
+        if "error" in agent_response_dict and "tool_choice" not in agent_response_dict:
+            return agent_response_dict
         tool_choice = agent_response_dict.get("tool_choice")
         tool_input = agent_response_dict.get("tool_input")
 
         # Handle SQL multi-tool logic
         if tool_choice == "execute_query":
+            from tools.schema_catalog import get_schema_catalog
+            from tools.query_validator import validate_query
+            from tools.query_governor import get_query_limits
+            from tools.result_cache import cached_result
+
             # Step 1: Get Schema (if necessary)
-            schema = get_metadata(self.db_engine)
-            print("Schema Retrieved:", schema)
+            schema = get_schema_catalog(self.db_engine).metadata()
+            logger.debug("Schema Retrieved: %s", schema)
 
-            # Step 2: Validate Query
+            # Step 2: Validate Query (EXPLAIN only, the statement is not run here)
             query = tool_input if isinstance(tool_input, str) else tool_input.get("query")
-            is_valid = check_query(self.db_engine, query)
-            if "Invalid" in is_valid:
-                print("Query Validation Failed:", is_valid)
-                return is_valid
-
-            # Step 3: Execute Query
-            query_result = execute_query(self.db_engine, query)
-            print("Query Execution Response:", query_result)
-
-            formatted_response = self.format_query_response(query_result)
+            validation = validate_query(self.db_engine, query)
+            if not validation["valid"]:
+                logger.debug("Query Validation Failed: %s", validation["error"])
+                self.forget_example(prompt)
+                return f"Invalid SQL query: {validation['error']}"
+            if validation["full_scans"]:
+                logger.debug("Query Plan Full Scans: %s", validation["full_scans"])
+
+            # Step 3: Execute Query (the only time the statement runs). The result is
+            # summarized batch by batch and never materialized.
+            limits = self.query_limits or get_query_limits(self.db_engine)
+            max_rows = tool_input.get("max_rows") if isinstance(tool_input, dict) else None
+            if max_rows is not None:
+                if isinstance(max_rows, bool) or not isinstance(max_rows, int) or max_rows < 1:
+                    return f"Invalid max_rows: {max_rows!r}, expected a positive integer."
+                # The model may ask for fewer rows than the governor allows, never more
+                if limits.max_rows is None or max_rows < limits.max_rows:
+                    limits = copy.copy(limits)
+                    limits.max_rows = max_rows
+            try:
+                query_result = cached_result(self.db_engine, query,
+                                             ("summary", limits.max_rows),
+                                             lambda: self.summarize_query(query, cancel_token, limits))
+            except QueryGovernorError as e:
+                logger.debug("Query stopped by the governor: %s", e)
+                self.forget_example(prompt)
+                return e.to_dict()
+            if self.example_store is not None and prompt is not None and self.schema_fingerprint is not None:
+                self.example_store.add(prompt, query, self.schema_fingerprint)
+            # Follow-up tools (batch_Calculator) work on this result's columns
+            (session if session is not None else self).last_query = query
+            logger.debug("Query Execution Response: %s", query_result)
+
+            with get_tracer().span(FORMATTING):
+                formatted_response = self.format_query_response(query_result)
             return formatted_response
 
 
 
+        query_result = tool_input
         for tool in self.tools:
             if tool.__name__ == tool_choice:
         # Handle SQL tools
-                if tool in [get_metadata, list_tables, check_query, execute_query]:
+                if tool_choice in SQL_TOOL_NAMES:
                     if not self.db_engine:
                         raise ValueError("Database engine is not initialized. Provide a valid connection string.")
 
-                    if tool == get_metadata:
+                    if tool_choice == "get_metadata":
                         # Call get_metadata directly with self.db_engine
                         query_result = tool(self.db_engine)
                     elif isinstance(tool_input, dict):
@@ -188,13 +847,18 @@ class Agent:
                         query_result = tool(self.db_engine, **tool_input)
                     else:
                         raise ValueError(f"Invalid tool_input for {tool_choice}: {tool_input}")
+                elif isinstance(tool_input, dict) and ("tool_calls" in agent_response_dict
+                                                       or injected_parameters(tool)):
+                    # Native tool calls, and tools taking the agent's engine or cancel token,
+                    # get arguments keyed by parameter name
+                    query_result = tool(**tool_input, **self.injected_arguments(tool, cancel_token, session))
                 else:
                     # Handle non-SQL tools
                     query_result = tool(tool_input)
 
 
-        print(tool_input)
-        return query_result if tool_choice else tool_input
+        logger.debug("Tool input: %s", tool_input)
+        return query_result
 
         # return tool_input
 
@@ -0,0 +1,242 @@
+import asyncio
+import csv
+import json
+import os
+import time
+from collections import OrderedDict
+
+from models.http_client import aclose_async_clients
+from models.request_scheduler import BATCH
+from project_utils.rate_limit import TokenBucket
+
+DEFAULT_CONCURRENCY = 16
+DEFAULT_DEDUP_ENTRIES = 10_000
+
+
+def normalize_question(question):
+    """
+    Canonical form used to detect duplicate questions: case and whitespace are ignored.
+    """
+    return " ".join(str(question).lower().split())
+
+
+def read_questions(path):
+    """
+    Lazily reads questions from a JSONL or CSV file.
+
+    JSONL lines are objects with a "question" (or "prompt") field and an optional "id".
+    CSV files need a "question" column and may have an "id" column. Items without an
+    id are numbered by their position in the file.
+
+    Parameters:
+    path (str): Path to a .jsonl or .csv file.
+
+    Yields:
+    dict: {"id": str, "question": str}.
+    """
+    if path.lower().endswith(".csv"):
+        with open(path, newline="", encoding="utf-8") as f:
+            for position, row in enumerate(csv.DictReader(f)):
+                yield {"id": str(row.get("id") or position), "question": row["question"]}
+        return
+
+    with open(path, encoding="utf-8") as f:
+        for position, line in enumerate(f):
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            question = item.get("question", item.get("prompt"))
+            yield {"id": str(item.get("id", position)), "question": question}
+
+
+def completed_ids(output_path):
+    """
+    Returns the ids already answered in an output file, so an interrupted run can resume.
+    Records with an error (e.g. exhausted rate-limit retries) are left out and asked again.
+    """
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+                if record.get("error") is None:
+                    done.add(str(record["id"]))
+            except (ValueError, KeyError, AttributeError):
+                # A line cut short by an interrupted run is simply redone
+                continue
+    return done
+
+
+def truncate_partial_line(output_path):
+    """
+    Cuts an output file back to its last complete line.
+
+    An interrupted run can leave a half-written last line; appending after it would
+    glue the next record onto it and corrupt both.
+    """
+    if not os.path.exists(output_path):
+        return
+    with open(output_path, "rb+") as f:
+        end = f.seek(0, os.SEEK_END)
+        position = end
+        while position > 0:
+            start = max(0, position - 4096)
+            f.seek(start)
+            chunk = f.read(position - start)
+            if position == end and chunk.endswith(b"\n"):
+                return
+            newline = chunk.rfind(b"\n")
+            if newline != -1:
+                f.truncate(start + newline + 1)
+                return
+            position = start
+        f.truncate(0)
+
+
+def _serializable(response):
+    if isinstance(response, (str, int, float, bool, list, dict)) or response is None:
+        return response
+    return str(response)
+
+
+class BatchRunner:
+    """
+    Runs large question sets through Agent.awork with bounded concurrency.
+
+    Questions are streamed from the input and results are appended to a JSONL output
+    as they complete, so memory stays flat regardless of the input size. The output
+    doubles as the checkpoint: with resume=True, ids already answered are skipped and
+    failed ones are asked again, so the last record of an id is the one that counts.
+    Identical questions (after normalize_question) are answered once.
+    """
+
+    def __init__(self, agent, concurrency=DEFAULT_CONCURRENCY, requests_per_minute=None,
+                 dedup_entries=DEFAULT_DEDUP_ENTRIES, priority=BATCH):
+        """
+        Parameters:
+        agent (Agent): The agent answering the questions.
+        concurrency (int): Maximum questions in flight.
+        requests_per_minute (float, optional): Rate limit on questions sent to the model endpoint.
+        dedup_entries (int): How many distinct answered questions are remembered for deduplication.
+        priority (int): Scheduling priority of the agent's model requests; BATCH lets
+                        interactive requests sharing the scheduler go first.
+        """
+        self.agent = agent
+        self.concurrency = concurrency
+        self.rate_limiter = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.dedup_entries = dedup_entries
+        self._answers = OrderedDict()
+        self._in_flight = {}
+        model = agent.get_async_model()
+        if model is not None and hasattr(model, "priority"):
+            model.priority = priority
+
+    async def _answer(self, question):
+        """
+        Answers a question once; concurrent and later duplicates share the answer.
+
+        Returns:
+        tuple: (response, error, deduplicated).
+        """
+        key = normalize_question(question)
+        if key in self._answers:
+            self._answers.move_to_end(key)
+            response, error = self._answers[key]
+            return response, error, True
+        if key in self._in_flight:
+            response, error = await asyncio.shield(self._in_flight[key])
+            return response, error, True
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            if self.rate_limiter:
+                await self.rate_limiter.aacquire()
+            try:
+                response, error = _serializable(await self.agent.awork(question)), None
+                if isinstance(response, dict) and "error" in response:
+                    error = response["error"]
+            except Exception as e:
+                response, error = None, f"{type(e).__name__}: {e}"
+            future.set_result((response, error))
+        finally:
+            del self._in_flight[key]
+            if not future.done():
+                # Cancelled or interrupted: duplicates waiting on this question get an error instead of hanging
+                future.set_result((None, "Cancelled before the question was answered"))
+
+        if error is None:
+            self._answers[key] = (response, error)
+            while len(self._answers) > self.dedup_entries:
+                self._answers.popitem(last=False)
+        return response, error, False
+
+    async def _worker(self, queue, output, stats):
+        while True:
+            item = await queue.get()
+            if item is None:
+                queue.task_done()
+                return
+            start = time.perf_counter()
+            response, error, deduplicated = await self._answer(item["question"])
+            record = {
+                "id": item["id"],
+                "question": item["question"],
+                "response": response,
+                "error": error,
+                "deduplicated": deduplicated,
+                "latency_ms": round((time.perf_counter() - start) * 1000, 3),
+            }
+            output.write(json.dumps(record, default=str) + "\n")
+            output.flush()
+            stats["completed"] += 1
+            stats["errors"] += error is not None
+            stats["deduplicated"] += deduplicated
+            queue.task_done()
+
+    async def arun(self, questions, output_path, resume=True):
+        """
+        Answers every question and appends one JSON line per question to output_path.
+
+        Parameters:
+        questions (iterable): {"id", "question"} dicts, e.g. from read_questions.
+        output_path (str): JSONL file to append results to.
+        resume (bool): Skip ids already present in output_path.
+
+        Returns:
+        dict: Counts of completed, skipped, deduplicated and failed questions and the wall time.
+        """
+        if resume:
+            truncate_partial_line(output_path)
+        done = completed_ids(output_path) if resume else set()
+        stats = {"completed": 0, "skipped": 0, "deduplicated": 0, "errors": 0}
+        start = time.perf_counter()
+        queue = asyncio.Queue(maxsize=self.concurrency * 2)
+
+        with open(output_path, "a" if resume else "w", encoding="utf-8") as output:
+            workers = [asyncio.create_task(self._worker(queue, output, stats)) for _ in range(self.concurrency)]
+            for item in questions:
+                if item["id"] in done:
+                    stats["skipped"] += 1
+                    continue
+                await queue.put(item)
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+
+        stats["seconds"] = round(time.perf_counter() - start, 3)
+        return stats
+
+    def run(self, questions, output_path, resume=True):
+        """
+        Blocking wrapper around arun that owns its event loop.
+        """
+        async def main():
+            try:
+                return await self.arun(questions, output_path, resume=resume)
+            finally:
+                await aclose_async_clients()
+
+        return asyncio.run(main())
@@ -0,0 +1,232 @@
+import json
+import threading
+from collections import OrderedDict, deque
+
+from project_utils.tracing import get_tracer
+from tools.schema_index import estimate_tokens
+
+DEFAULT_HISTORY_TOKENS = 2000
+DEFAULT_MAX_SESSIONS = 1000
+# Compaction leaves the verbatim turns at most this share of the budget, so the history
+# then grows append-only (and stays cacheable as a prompt prefix) for several turns.
+RECENT_SHARE = 0.5
+# Earlier questions of the session used, with the new one, to pick the relevant schema.
+TOPIC_TURNS = 3
+# Per-turn token records kept per session.
+TOKEN_LOG_TURNS = 100
+# Characters kept of each part of a turn.
+QUESTION_CHARS = 300
+INPUT_CHARS = 400
+RESULT_CHARS = 600
+SUMMARY_RESULT_CHARS = 200
+
+SUMMARY_HEADER = "Summary of earlier turns in this conversation (questions, tools used and results):"
+
+
+def _clip(text, limit):
+    text = " ".join(str(text).split())
+    return text if len(text) <= limit else text[:limit - 3] + "..."
+
+
+def _decision_calls(decision):
+    """
+    Returns the (tool name, tool input) pairs of a model decision, empty for direct answers.
+    """
+    if not isinstance(decision, dict):
+        return []
+    if decision.get("tool_calls"):
+        return [(call["name"], call["arguments"]) for call in decision["tool_calls"]]
+    if decision.get("tool_choice") in (None, "no tool"):
+        return []
+    return [(decision["tool_choice"], decision.get("tool_input"))]
+
+
+def _input_text(tool_input):
+    return tool_input if isinstance(tool_input, str) else json.dumps(tool_input, default=str)
+
+
+class ConversationMemory:
+    """
+    Conversation state of one session, sent to the model as context for follow-up
+    questions ("and for last year?").
+
+    Recent turns are kept verbatim as chat messages: the question, the tool decision and
+    the tool result. When the history outgrows its token budget, the oldest turns are
+    compacted into one-line summaries of the question, the SQL or tool used and the
+    result, and when even the summaries do not fit the oldest ones are dropped. The
+    history only changes at its end between compactions, so the system prompt plus the
+    history form a stable prefix for provider-side prompt caching.
+
+    Token counts (tools.schema_index.estimate_tokens) of each turn are recorded in
+    token_log to check that the budget holds.
+    """
+
+    def __init__(self, token_budget=DEFAULT_HISTORY_TOKENS):
+        """
+        Parameters:
+        token_budget (int): Approximate token limit of the history sent with each question.
+        """
+        self.token_budget = token_budget
+        self.turns = []
+        self.summaries = []
+        self.dropped_turns = 0
+        self.turn_count = 0
+        self.token_log = deque(maxlen=TOKEN_LOG_TURNS)
+        # SQL of the session's last successful execute_query, for tools working on its columns
+        self.last_query = None
+        self._context_tokens = 0
+        self._lock = threading.Lock()
+
+    def _history_tokens(self):
+        tokens = sum(turn["tokens"] for turn in self.turns) + sum(summary["tokens"] for summary in self.summaries)
+        if self.summaries or self.dropped_turns:
+            tokens += estimate_tokens(SUMMARY_HEADER)
+        return tokens
+
+    def context(self):
+        """
+        Returns the history to send before the new question.
+
+        Returns:
+        list: Chat messages - the summary of compacted turns, then the recent turns.
+        """
+        with self._lock:
+            messages = []
+            if self.summaries or self.dropped_turns:
+                lines = [SUMMARY_HEADER]
+                if self.dropped_turns:
+                    lines.append(f"({self.dropped_turns} earlier turns omitted.)")
+                lines.extend(summary["text"] for summary in self.summaries)
+                messages.append({"role": "system", "content": "\n".join(lines)})
+            for turn in self.turns:
+                messages.extend(turn["messages"])
+            self._context_tokens = self._history_tokens()
+            get_tracer().count("conversation_history_tokens", self._context_tokens)
+            return messages
+
+    def topic(self, prompt):
+        """
+        Returns the new question together with the session's latest questions, for
+        picking what is relevant to a follow-up that does not name it.
+        """
+        with self._lock:
+            recent = [turn["question"] for turn in self.turns[-TOPIC_TURNS:]]
+        return " ".join(recent + [prompt])
+
+    def add_turn(self, question, decision, response):
+        """
+        Records a finished turn and compacts the history if it is over budget.
+
+        Parameters:
+        question (str): The user question.
+        decision (dict or None): The tool decision ({"tool_choice", "tool_input"} or with
+                                 "tool_calls"); None when only the answer is known.
+        response: What the agent answered.
+        """
+        calls = _decision_calls(decision)
+        result = _clip(response, RESULT_CHARS)
+        messages = [{"role": "user", "content": _clip(question, QUESTION_CHARS)}]
+        if not calls:
+            messages.append({"role": "assistant",
+                             "content": json.dumps({"tool_choice": "no tool", "tool_input": result})})
+        else:
+            if len(calls) == 1:
+                content = {"tool_choice": calls[0][0], "tool_input": calls[0][1]}
+            else:
+                content = {"tool_calls": [{"name": name, "arguments": tool_input} for name, tool_input in calls]}
+            messages.append({"role": "assistant", "content": json.dumps(content, default=str)})
+            messages.append({"role": "user", "content": f"Tool result: {result}"})
+
+        summary = f"- Q: {_clip(question, QUESTION_CHARS)}"
+        for name, tool_input in calls:
+            label = "SQL" if name == "execute_query" else f"Tool {name}"
+            summary += f" | {label}: {_clip(_input_text(tool_input), INPUT_CHARS)}"
+        summary += f" | Result: {_clip(response, SUMMARY_RESULT_CHARS)}"
+
+        tokens = sum(estimate_tokens(message["content"]) for message in messages)
+        with self._lock:
+            self.turns.append({"question": question, "messages": messages, "summary": summary, "tokens": tokens})
+            self.turn_count += 1
+            compacted = self._compact()
+            self.token_log.append({
+                "turn": self.turn_count,
+                "context_tokens": self._context_tokens,
+                "turn_tokens": tokens,
+                "history_tokens": self._history_tokens(),
+                "compacted_turns": compacted,
+                "token_budget": self.token_budget,
+            })
+        if compacted:
+            get_tracer().count("conversation_compactions")
+
+    def _compact(self):
+        if self._history_tokens() <= self.token_budget:
+            return 0
+        compacted = 0
+        while self.turns and sum(turn["tokens"] for turn in self.turns) > self.token_budget * RECENT_SHARE:
+            turn = self.turns.pop(0)
+            self.summaries.append({"text": turn["summary"], "tokens": estimate_tokens(turn["summary"])})
+            compacted += 1
+        while self.summaries and self._history_tokens() > self.token_budget:
+            self.summaries.pop(0)
+            self.dropped_turns += 1
+        return compacted
+
+    def clear(self):
+        with self._lock:
+            self.turns.clear()
+            self.summaries.clear()
+            self.dropped_turns = 0
+            self.last_query = None
+
+    def stats(self):
+        """
+        Returns:
+        dict: Turn counts, the current history size and the per-turn token log.
+        """
+        with self._lock:
+            return {
+                "turns": self.turn_count,
+                "verbatim_turns": len(self.turns),
+                "summarized_turns": len(self.summaries),
+                "dropped_turns": self.dropped_turns,
+                "history_tokens": self._history_tokens(),
+                "token_budget": self.token_budget,
+                "token_log": list(self.token_log),
+            }
+
+
+class SessionStore:
+    """
+    ConversationMemory per session id, bounded to the max_sessions most recently used.
+    """
+
+    def __init__(self, token_budget=DEFAULT_HISTORY_TOKENS, max_sessions=DEFAULT_MAX_SESSIONS):
+        self.token_budget = token_budget
+        self.max_sessions = max_sessions
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id):
+        """
+        Returns the session's memory, creating it on first use.
+        """
+        with self._lock:
+            memory = self._sessions.get(session_id)
+            if memory is None:
+                memory = self._sessions[session_id] = ConversationMemory(self.token_budget)
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+            else:
+                self._sessions.move_to_end(session_id)
+            return memory
+
+    def reset(self, session_id):
+        """
+        Forgets a session's conversation.
+        """
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def __len__(self):
+        return len(self._sessions)
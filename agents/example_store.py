@@ -0,0 +1,302 @@
+import math
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from tools.schema_index import tokenize
+
+DEFAULT_MAX_ENTRIES = 5000
+# Cosine similarity at which a stored question counts as the same question and its SQL
+# is reused without asking the model.
+REUSE_THRESHOLD = 0.95
+# Minimum similarity for a stored example to be shown to the model as a few-shot example.
+FEW_SHOT_THRESHOLD = 0.3
+DEFAULT_FEW_SHOT = 3
+
+# Numbers and quoted values: two questions differing only in these need different SQL.
+_LITERAL_RE = re.compile(r"'[^']*'|\"[^\"]*\"|\d+(?:[.,:/-]\d+)*")
+# Filler dropped from questions. Unlike tools.schema_index.STOP_WORDS, words such as
+# "how many", "which" or "list" are kept: they decide what the SQL returns.
+QUESTION_STOP_WORDS = {
+    "a", "an", "and", "are", "by", "for", "from", "in", "is", "me", "of", "on", "or", "the", "to", "was",
+    "with", "there", "please", "can", "you", "give", "tell", "do", "does", "i", "we",
+}
+# Words asking for a count, an aggregate, a ranking or a listing. A question is only
+# answered with stored SQL when it asks for the same kind of result.
+INTENT_WORDS = {
+    "how", "many", "much", "count", "number", "total", "sum", "average", "avg", "mean", "median",
+    "max", "maximum", "min", "minimum", "highest", "lowest", "largest", "smallest", "most", "least",
+    "top", "bottom", "first", "last", "list", "show", "which", "what", "who", "all", "each", "per",
+    "distinct", "unique", "percentage", "percent", "ratio", "rank",
+}
+
+
+def normalize_question(question):
+    """
+    Canonical form of a question: lowercase with punctuation and extra whitespace removed.
+    """
+    return " ".join(re.sub(r"[^\w'\".,:/-]+", " ", str(question).lower()).split()).strip(" .?!")
+
+
+def question_literals(question):
+    """
+    Returns:
+    frozenset: The numbers and quoted values in a question.
+    """
+    return frozenset(_LITERAL_RE.findall(str(question).lower()))
+
+
+def question_terms(question):
+    """
+    Returns:
+    list: The terms of a question, intent words included.
+    """
+    return tokenize(normalize_question(question), stop_words=QUESTION_STOP_WORDS)
+
+
+def question_intent(question):
+    """
+    Returns:
+    frozenset: The INTENT_WORDS in a question.
+    """
+    return frozenset(re.findall(r"\w+", str(question).lower())) & INTENT_WORDS
+
+
+class ExampleStore:
+    """
+    Store of questions the agent answered with SQL that ran successfully, used to
+    reuse SQL for repeated questions and as few-shot examples for similar ones.
+
+    Questions are indexed offline with TF-IDF over their terms (question_terms) and
+    looked up by cosine similarity through an inverted index.
+    Every example belongs to the schema fingerprint it was written against and is
+    only returned for that schema. The store is an LRU bounded by max_entries and,
+    when a path is given, is persisted in a SQLite file.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, path=None):
+        """
+        Parameters:
+        max_entries (int): Maximum number of examples kept; the least recently used go first.
+        path (str, optional): SQLite file the examples are persisted in.
+        """
+        self.max_entries = max_entries
+        self.path = path
+        self.reuse_hits = 0
+        self.few_shot_hits = 0
+        self._examples = OrderedDict()
+        self._postings = {}
+        self._document_frequency = Counter()
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS examples (fingerprint TEXT, question_key TEXT, question TEXT, "
+                "sql TEXT, successes INTEGER, failures INTEGER, last_used REAL, "
+                "PRIMARY KEY (fingerprint, question_key))"
+            )
+            self._db.commit()
+            rows = self._db.execute(
+                "SELECT fingerprint, question, sql, successes, failures, last_used FROM examples "
+                "ORDER BY last_used DESC LIMIT ?", (max_entries,)
+            ).fetchall()
+            for fingerprint, question, sql, successes, failures, last_used in reversed(rows):
+                self._insert(fingerprint, question, sql, successes, failures, last_used)
+
+    def _insert(self, fingerprint, question, sql, successes, failures, last_used):
+        key = (fingerprint, normalize_question(question))
+        if key in self._examples:
+            self._remove(key)
+        terms = Counter(question_terms(question))
+        self._examples[key] = {
+            "fingerprint": fingerprint,
+            "question": question,
+            "sql": sql,
+            "successes": successes,
+            "failures": failures,
+            "last_used": last_used,
+            "terms": terms,
+            "literals": question_literals(question),
+            "intent": question_intent(question),
+        }
+        for term in terms:
+            self._postings.setdefault(term, set()).add(key)
+            self._document_frequency[term] += 1
+        return key
+
+    def _remove(self, key):
+        example = self._examples.pop(key)
+        for term in example["terms"]:
+            postings = self._postings[term]
+            postings.discard(key)
+            if not postings:
+                del self._postings[term]
+            self._document_frequency[term] -= 1
+            if self._document_frequency[term] <= 0:
+                del self._document_frequency[term]
+
+    def _evict(self):
+        evicted = []
+        while len(self._examples) > self.max_entries:
+            key = next(iter(self._examples))
+            self._remove(key)
+            evicted.append(key)
+        if evicted and self._db is not None:
+            self._db.executemany("DELETE FROM examples WHERE fingerprint = ? AND question_key = ?", evicted)
+
+    def _save(self, key):
+        if self._db is None:
+            return
+        example = self._examples[key]
+        self._db.execute(
+            "INSERT OR REPLACE INTO examples (fingerprint, question_key, question, sql, successes, failures, "
+            "last_used) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (key[0], key[1], example["question"], example["sql"], example["successes"], example["failures"],
+             example["last_used"]),
+        )
+
+    def add(self, question, sql, fingerprint):
+        """
+        Records SQL that answered a question successfully against the given schema.
+
+        Parameters:
+        question (str): The user question.
+        sql (str): The query that ran successfully.
+        fingerprint (str): The schema fingerprint (SchemaCatalog.fingerprint).
+        """
+        key = (fingerprint, normalize_question(question))
+        with self._lock:
+            existing = self._examples.get(key)
+            successes = 1
+            if existing is not None and existing["sql"] == sql:
+                successes = existing["successes"] + 1
+            key = self._insert(fingerprint, question, sql, successes, 0, time.time())
+            self._save(key)
+            self._evict()
+            if self._db is not None:
+                self._db.commit()
+
+    def record_failure(self, question, fingerprint):
+        """
+        Marks the stored SQL for a question as failing, so it is no longer reused.
+        """
+        key = (fingerprint, normalize_question(question))
+        with self._lock:
+            example = self._examples.get(key)
+            if example is None:
+                return
+            example["failures"] += 1
+            self._save(key)
+            if self._db is not None:
+                self._db.commit()
+
+    def _idf(self, term):
+        return math.log((len(self._examples) + 1) / (self._document_frequency.get(term, 0) + 1)) + 1
+
+    def search(self, question, fingerprint, limit=DEFAULT_FEW_SHOT, min_score=FEW_SHOT_THRESHOLD):
+        """
+        Finds the stored examples most similar to a question for the same schema.
+
+        Parameters:
+        question (str): The user question.
+        fingerprint (str): The current schema fingerprint.
+        limit (int): Maximum number of examples returned.
+        min_score (float): Minimum cosine similarity.
+
+        Returns:
+        list: (score, example dict) pairs, best first. Examples have "question" and "sql".
+        """
+        query_terms = Counter(question_terms(question))
+        with self._lock:
+            query_vector = {term: count * self._idf(term) for term, count in query_terms.items()}
+            query_norm = math.sqrt(sum(value * value for value in query_vector.values()))
+            if not query_norm:
+                return []
+            candidates = set()
+            for term in query_vector:
+                candidates.update(self._postings.get(term, ()))
+
+            scored = []
+            for key in candidates:
+                example = self._examples[key]
+                if key[0] != fingerprint or example["failures"] >= example["successes"]:
+                    continue
+                vector = {term: count * self._idf(term) for term, count in example["terms"].items()}
+                norm = math.sqrt(sum(value * value for value in vector.values()))
+                score = sum(weight * vector.get(term, 0.0) for term, weight in query_vector.items()) / (query_norm * norm)
+                if score >= min_score:
+                    scored.append((score, key))
+            scored.sort(key=lambda item: item[0], reverse=True)
+            results = []
+            for score, key in scored[:limit]:
+                self._examples.move_to_end(key)
+                example = self._examples[key]
+                results.append((score, {"question": example["question"], "sql": example["sql"],
+                                        "literals": example["literals"], "intent": example["intent"]}))
+            return results
+
+    def reusable_sql(self, question, fingerprint):
+        """
+        Returns stored SQL for a near-identical question, or None.
+
+        A match needs a similarity of at least REUSE_THRESHOLD, exactly the same
+        numbers and quoted values, so "sales in 2015" never reuses the SQL for 2016, and
+        the same intent words, so "which customers" never reuses a "how many customers"
+        count.
+        """
+        matches = self.search(question, fingerprint, limit=1, min_score=REUSE_THRESHOLD)
+        if matches and matches[0][1]["literals"] == question_literals(question) \
+                and matches[0][1]["intent"] == question_intent(question):
+            with self._lock:
+                self.reuse_hits += 1
+            return matches[0][1]["sql"]
+        return None
+
+    def few_shot(self, question, fingerprint, limit=DEFAULT_FEW_SHOT):
+        """
+        Renders the examples most similar to a question for the agent prompt.
+
+        Returns:
+        str: The examples as "Question:/SQL:" pairs, or "" when there are none.
+        """
+        matches = self.search(question, fingerprint, limit=limit)
+        if not matches:
+            return ""
+        with self._lock:
+            self.few_shot_hits += 1
+        lines = ["Examples of questions answered before with SQL that worked on this database:"]
+        for _, example in matches:
+            lines.append(f"Question: {example['question']}\nSQL: {example['sql']}")
+        return "\n".join(lines) + "\n"
+
+    def invalidate(self, fingerprint):
+        """
+        Drops every example written against the given schema fingerprint.
+        """
+        with self._lock:
+            for key in [k for k in self._examples if k[0] == fingerprint]:
+                self._remove(key)
+            if self._db is not None:
+                self._db.execute("DELETE FROM examples WHERE fingerprint = ?", (fingerprint,))
+                self._db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._examples.clear()
+            self._postings.clear()
+            self._document_frequency.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM examples")
+                self._db.commit()
+
+    def stats(self):
+        """
+        Returns:
+        dict: Number of examples, SQL reuse hits and prompts that got few-shot examples.
+        """
+        with self._lock:
+            return {"entries": len(self._examples), "reuse_hits": self.reuse_hits,
+                    "few_shot_hits": self.few_shot_hits}
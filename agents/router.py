@@ -0,0 +1,288 @@
+import json
+import math
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+
+from project_utils.tracing import get_tracer
+
+# Routes below this confidence go to the model.
+DEFAULT_MIN_CONFIDENCE = 0.9
+# Classifier label for "not a fast-path request".
+LLM_LABEL = "llm"
+# Weight of the latest model call in the running average of model latency.
+LATENCY_SMOOTHING = 0.2
+
+_NUMBER = r"-?\d[\d,]*(?:\.\d+)?"
+_LEAD = r"(?:(?:please\s+)?(?:what\s+is|what's|whats|calculate|compute|how\s+much\s+is|evaluate)\s+)?"
+_END = r"\s*[?.!]*\s*$"
+
+# Phrases (and symbols) for each basic_Calculator operation, longest first.
+CALCULATOR_OPERATIONS = [
+    ("floor_divide", r"//|floor\s+divided\s+by"),
+    ("power", r"\*\*|\^|to\s+the\s+power\s+of|raised\s+to(?:\s+the\s+power\s+of)?"),
+    ("add", r"\+|plus|added\s+to"),
+    ("subtract", r"minus|-|less(?!\s+than)"),
+    ("multiply", r"\*|x|×|times|multiplied\s+by"),
+    ("divide", r"/|÷|divided\s+by|over"),
+    ("modulus", r"%|mod|modulo"),
+    ("ge", r">=|is\s+greater\s+than\s+or\s+equal\s+to|greater\s+than\s+or\s+equal\s+to"),
+    ("le", r"<=|is\s+less\s+than\s+or\s+equal\s+to|less\s+than\s+or\s+equal\s+to"),
+    ("gt", r">|is\s+greater\s+than|greater\s+than|bigger\s+than|larger\s+than"),
+    ("lt", r"<|is\s+less\s+than|less\s+than|smaller\s+than"),
+    ("ne", r"!=|is\s+not\s+equal\s+to|not\s+equal\s+to"),
+    ("eq", r"==|=|equals|is\s+equal\s+to|equal\s+to"),
+]
+# "add 5 and 3", "subtract 3 from 5", "divide 10 by 2"
+_VERB_OPERATIONS = {"add": "add", "sum": "add", "subtract": "subtract", "multiply": "multiply", "divide": "divide"}
+
+_TOKEN_RE = re.compile(r"[a-z]+|\d+(?:[.,]\d+)*|[^\sa-z\d]")
+
+
+def _number(text):
+    value = text.replace(",", "")
+    return float(value) if "." in value else int(value)
+
+
+def _calculator_input(a, operation, b):
+    return json.dumps({"num1": _number(a), "num2": _number(b), "operation": operation})
+
+
+class Rule:
+    """
+    A pattern answering one kind of request with one tool.
+    """
+
+    def __init__(self, tool, pattern, build_input, confidence):
+        """
+        Parameters:
+        tool (str): Name of the tool the rule dispatches to.
+        pattern (str): Regular expression matched against the whole prompt (case-insensitive).
+        build_input (callable): Builds the tool_input from the re.Match.
+        confidence (float): How sure a match is, from 0 to 1.
+        """
+        self.tool = tool
+        self.pattern = re.compile(pattern, re.IGNORECASE | re.DOTALL)
+        self.build_input = build_input
+        self.confidence = confidence
+
+    def match(self, prompt):
+        """
+        Returns:
+        str or None: The tool_input for prompt, or None if the rule does not apply.
+        """
+        match = self.pattern.match(prompt)
+        return self.build_input(match) if match else None
+
+
+def _calculator_rules():
+    rules = []
+    for operation, phrase in CALCULATOR_OPERATIONS:
+        pattern = rf"^\s*{_LEAD}(?:is\s+)?(?P<a>{_NUMBER})\s*(?:{phrase})\s*(?P<b>{_NUMBER}){_END}"
+        rules.append(Rule("basic_Calculator", pattern,
+                          lambda m, operation=operation: _calculator_input(m["a"], operation, m["b"]), 0.97))
+
+    def verb_input(m):
+        operation = _VERB_OPERATIONS[m["verb"].lower()]
+        a, b = m["a"], m["b"]
+        if operation == "subtract" and m["joiner"].lower() == "from":
+            a, b = b, a
+        return _calculator_input(a, operation, b)
+
+    rules.append(Rule(
+        "basic_Calculator",
+        rf"^\s*(?:please\s+)?(?P<verb>add|sum|subtract|multiply|divide)\s+(?P<a>{_NUMBER})\s+"
+        rf"(?P<joiner>and|to|from|by|with)\s+(?P<b>{_NUMBER}){_END}",
+        verb_input, 0.97,
+    ))
+    return rules
+
+
+def _reverse_rules():
+    lead = r"^\s*(?:please\s+)?(?:can\s+you\s+|could\s+you\s+)?reverse\s+(?:the\s+)?(?:string|word|text|phrase|sentence)?\s*:?\s*"
+    return [
+        # Quoted text is unambiguous
+        Rule("reverse_string", lead + r"(?P<q>[\"'“‘])(?P<text>.+)[\"'”’]" + _END, lambda m: m["text"], 0.99),
+        # A single bare word could also be e.g. "reverse engineering"; left to the model by default
+        Rule("reverse_string", lead + r"(?P<text>\S+)" + _END, lambda m: m["text"], 0.85),
+    ]
+
+
+DEFAULT_RULES = _calculator_rules() + _reverse_rules()
+
+
+def _features(text):
+    # Numbers are collapsed so "5 plus 3" and "67869 plus 9030393" look the same
+    return ["<num>" if token[0].isdigit() else token for token in _TOKEN_RE.findall(text.lower())]
+
+
+class IntentClassifier:
+    """
+    Small multinomial naive Bayes classifier over prompt words, trained offline and
+    stored as JSON. Labels are tool names, plus LLM_LABEL for prompts that need the model.
+    """
+
+    def __init__(self, label_counts=None, token_counts=None):
+        self.label_counts = Counter(label_counts or {})
+        self.token_counts = defaultdict(Counter, {label: Counter(counts) for label, counts in (token_counts or {}).items()})
+        self._prepare()
+
+    def _prepare(self):
+        self._vocabulary = {token for counts in self.token_counts.values() for token in counts}
+        self._totals = {label: sum(counts.values()) for label, counts in self.token_counts.items()}
+
+    def train(self, examples):
+        """
+        Adds labelled examples.
+
+        Parameters:
+        examples (iterable): (prompt, label) pairs.
+        """
+        for text, label in examples:
+            self.label_counts[label] += 1
+            self.token_counts[label].update(_features(text))
+        self._prepare()
+        return self
+
+    def probabilities(self, text):
+        """
+        Returns:
+        dict: Label -> probability for the prompt.
+        """
+        total = sum(self.label_counts.values())
+        if not total:
+            return {}
+        features = _features(text)
+        vocabulary = len(self._vocabulary) + 1
+        scores = {}
+        for label, count in self.label_counts.items():
+            counts = self.token_counts[label]
+            denominator = self._totals.get(label, 0) + vocabulary
+            scores[label] = math.log(count / total) + sum(
+                math.log((counts[token] + 1) / denominator) for token in features)
+        best = max(scores.values())
+        exp_scores = {label: math.exp(score - best) for label, score in scores.items()}
+        norm = sum(exp_scores.values())
+        return {label: value / norm for label, value in exp_scores.items()}
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"label_counts": self.label_counts, "token_counts": self.token_counts}, f)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["label_counts"], data["token_counts"])
+
+
+class Router:
+    """
+    Local intent router consulted before the model call.
+
+    Rules recognize trivial requests (reversing a string, arithmetic on two numbers) and
+    produce the tool decision the model would have made, so the agent can dispatch
+    straight to the tool. With a classifier, a rule's confidence is averaged with the
+    classifier's probability for the rule's tool. Anything below the tool's minimum
+    confidence falls back to the model.
+
+    Hits and misses are counted as router_hits / router_misses and the model latency
+    avoided as router_latency_saved_ms, estimated from a running average of model calls.
+    """
+
+    def __init__(self, rules=None, min_confidence=DEFAULT_MIN_CONFIDENCE, tool_config=None, classifier=None):
+        """
+        Parameters:
+        rules (list, optional): Rule objects. Defaults to DEFAULT_RULES.
+        min_confidence (float, optional): Confidence a route needs to skip the model.
+        tool_config (dict, optional): Per-tool overrides, e.g.
+                                      {"reverse_string": {"enabled": False},
+                                       "basic_Calculator": {"min_confidence": 0.95}}.
+        classifier (IntentClassifier or str, optional): A classifier or the path of a saved one.
+        """
+        self.rules = list(DEFAULT_RULES if rules is None else rules)
+        self.min_confidence = min_confidence
+        self.tool_config = tool_config or {}
+        self.classifier = IntentClassifier.load(classifier) if isinstance(classifier, str) else classifier
+        self.hits = 0
+        self.misses = 0
+        self.latency_saved_ms = 0.0
+        self.llm_latency_ms = None
+        self._lock = threading.Lock()
+
+    def _enabled(self, tool):
+        return self.tool_config.get(tool, {}).get("enabled", True)
+
+    def _threshold(self, tool):
+        return self.tool_config.get(tool, {}).get("min_confidence", self.min_confidence)
+
+    def route(self, prompt, tool_names):
+        """
+        Returns the tool decision for prompt if it can be made locally.
+
+        Parameters:
+        prompt (str): The user query.
+        tool_names (set): Names of the tools the agent has.
+
+        Returns:
+        dict or None: {"tool_choice", "tool_input", "routed": True}, or None to ask the model.
+        """
+        start = time.perf_counter()
+        decision = None
+        probabilities = None
+        for rule in self.rules:
+            if rule.tool not in tool_names or not self._enabled(rule.tool):
+                continue
+            tool_input = rule.match(prompt)
+            if tool_input is None:
+                continue
+            confidence = rule.confidence
+            if self.classifier is not None:
+                if probabilities is None:
+                    probabilities = self.classifier.probabilities(prompt)
+                confidence = (confidence + probabilities.get(rule.tool, 0.0)) / 2
+            if confidence >= self._threshold(rule.tool):
+                decision = {"tool_choice": rule.tool, "tool_input": tool_input, "routed": True}
+                break
+
+        tracer = get_tracer()
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        with self._lock:
+            if decision is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                if self.llm_latency_ms is not None:
+                    saved = max(0.0, self.llm_latency_ms - elapsed_ms)
+                    self.latency_saved_ms += saved
+                    tracer.count("router_latency_saved_ms", saved)
+        if decision is None:
+            tracer.count("router_misses")
+        else:
+            tracer.count("router_hits", tool=decision["tool_choice"])
+        return decision
+
+    def observe_llm_latency(self, ms):
+        """
+        Records the duration of a model call, used to estimate the latency a hit saves.
+        """
+        with self._lock:
+            if self.llm_latency_ms is None:
+                self.llm_latency_ms = ms
+            else:
+                self.llm_latency_ms += LATENCY_SMOOTHING * (ms - self.llm_latency_ms)
+
+    def stats(self):
+        """
+        Returns:
+        dict: Hits, misses, hit rate and the estimated model latency saved in ms.
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "latency_saved_ms": round(self.latency_saved_ms, 3),
+            }
@@ -0,0 +1,104 @@
+"""
+Vectorized batch_Calculator versus the scalar basic_Calculator path.
+
+Computes a per-row margin, (price - cost) / price, over columns of increasing length:
+once through basic_Calculator (a JSON string per operation, two calls per row, as a
+model would have to issue them) and once through batch_Calculator's compiled
+expression over whole NumPy arrays. Reports the time of each path, the speedup, the
+one-off compile time and whether both paths agree.
+
+Usage:
+    python benchmarks/bench_batch_calculator.py [--rows 1000 10000 100000] [--repeat 5] [--json out.json]
+"""
+import argparse
+import json
+import os
+import random
+import re
+import statistics
+import sys
+import time
+
+# Add project root to sys.path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(project_root)
+
+import numpy as np
+from tools.basic_Calculator import basic_Calculator
+from tools.batch_Calculator import compile_expression, evaluate
+
+EXPRESSION = "(price - cost) / price"
+_ANSWER_RE = re.compile(r"The answer is: (.+)\.\n")
+
+
+def synthetic_columns(rows, seed=0):
+    rng = random.Random(seed)
+    price = [round(rng.uniform(1, 500), 2) for _ in range(rows)]
+    cost = [round(p * rng.uniform(0.3, 0.95), 2) for p in price]
+    return price, cost
+
+
+def scalar_path(price, cost):
+    results = []
+    for p, c in zip(price, cost):
+        answer = basic_Calculator(json.dumps({"num1": p, "num2": c, "operation": "subtract"}))
+        difference = float(_ANSWER_RE.search(answer).group(1))
+        answer = basic_Calculator(json.dumps({"num1": difference, "num2": p, "operation": "divide"}))
+        results.append(float(_ANSWER_RE.search(answer).group(1)))
+    return results
+
+
+def timed(function, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), result
+
+
+def bench(rows, repeat):
+    price, cost = synthetic_columns(rows)
+    compile_expression.cache_clear()
+    start = time.perf_counter()
+    compile_expression(EXPRESSION)
+    compile_ms = (time.perf_counter() - start) * 1000
+
+    scalar_s, scalar = timed(lambda: scalar_path(price, cost), max(1, repeat // 5))
+    columns = {"price": price, "cost": cost}
+    batch_s, batch = timed(lambda: evaluate(EXPRESSION, columns), repeat)
+    # Columns already held as arrays, e.g. from a query result
+    arrays = {"price": np.asarray(price), "cost": np.asarray(cost)}
+    array_s, _ = timed(lambda: evaluate(EXPRESSION, arrays), repeat)
+    return {
+        "rows": rows,
+        "scalar_ms": scalar_s * 1000,
+        "batch_ms": batch_s * 1000,
+        "batch_arrays_ms": array_s * 1000,
+        "speedup": scalar_s / batch_s,
+        "speedup_arrays": scalar_s / array_s,
+        "compile_ms": compile_ms,
+        "match": bool(np.allclose(scalar, batch)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="Timed runs of the batch path; the scalar path runs a fifth as often.")
+    parser.add_argument("--json", help="Write results to this JSON file.")
+    args = parser.parse_args()
+
+    results = [bench(rows, args.repeat) for rows in args.rows]
+    print(f"{'rows':>8} {'scalar ms':>11} {'batch ms':>10} {'arrays ms':>10} {'speedup':>9} {'compile ms':>11} {'match':>6}")
+    for row in results:
+        print(f"{row['rows']:>8} {row['scalar_ms']:>11.1f} {row['batch_ms']:>10.2f} {row['batch_arrays_ms']:>10.3f} "
+              f"{row['speedup']:>8.0f}x {row['compile_ms']:>11.3f} {str(row['match']):>6}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"benchmark": "batch_calculator", "expression": EXPRESSION, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Prompt size and latency of relevance-ranked schema pruning versus table count.
+
+Builds synthetic schemas of increasing width and, for a set of questions, compares
+the full `{schema_info}` text with the pruned one: estimated prompt tokens, index
+build time and per-question ranking latency.
+
+Usage:
+    python benchmarks/bench_schema_pruning.py [--tables 10 100 400 1000] [--top-k 5] [--json out.json]
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+# Add project root to sys.path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(project_root)
+
+from sqlalchemy import Integer, Numeric, String, Date
+from tools.schema_index import SchemaIndex, estimate_tokens, render_schema
+
+ENTITIES = ["customer", "order", "product", "invoice", "payment", "shipment", "supplier",
+            "employee", "store", "region", "campaign", "refund", "inventory", "warehouse"]
+ATTRIBUTES = ["name", "amount", "status", "created_at", "price", "quantity", "city",
+              "country", "email", "discount", "total", "category", "code", "updated_at"]
+TYPES = [Integer(), Numeric(12, 2), String(255), Date()]
+QUESTIONS = [
+    "total payment amount by customer country",
+    "how many orders were shipped last month",
+    "top 10 products by inventory quantity",
+    "average refund amount per campaign",
+    "list employees working in each store region",
+]
+
+
+def synthetic_metadata(table_count, seed=0):
+    rng = random.Random(seed)
+    metadata = {}
+    for i in range(table_count):
+        entity = ENTITIES[i % len(ENTITIES)]
+        table = f"{entity}_{i // len(ENTITIES)}" if i >= len(ENTITIES) else entity
+        columns = [{"name": "id", "type": Integer()}, {"name": f"{entity}_id", "type": Integer()}]
+        for attribute in rng.sample(ATTRIBUTES, 8):
+            columns.append({"name": f"{entity}_{attribute}", "type": rng.choice(TYPES)})
+        metadata[table] = columns
+    return metadata
+
+
+def bench(table_count, top_k, token_budget):
+    metadata = synthetic_metadata(table_count)
+    full_tokens = estimate_tokens(render_schema(metadata))
+
+    start = time.perf_counter()
+    index = SchemaIndex(metadata)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    pruned_tokens, latencies = [], []
+    for question in QUESTIONS:
+        start = time.perf_counter()
+        text = index.render(question, top_k=top_k, token_budget=token_budget)
+        latencies.append((time.perf_counter() - start) * 1000)
+        pruned_tokens.append(estimate_tokens(text))
+
+    return {
+        "tables": table_count,
+        "full_schema_tokens": full_tokens,
+        "pruned_schema_tokens_mean": statistics.mean(pruned_tokens),
+        "index_build_ms": round(build_ms, 3),
+        "rank_ms_mean": round(statistics.mean(latencies), 3),
+        "rank_ms_max": round(max(latencies), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tables", type=int, nargs="+", default=[10, 100, 400, 1000])
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--token-budget", type=int, default=None)
+    parser.add_argument("--json", help="Write results to this JSON file.")
+    args = parser.parse_args()
+
+    results = [bench(count, args.top_k, args.token_budget) for count in args.tables]
+    print(f"{'tables':>8} {'full tok':>10} {'pruned tok':>11} {'build ms':>10} {'rank ms':>9}")
+    for row in results:
+        print(f"{row['tables']:>8} {row['full_schema_tokens']:>10} {row['pruned_schema_tokens_mean']:>11.0f} "
+              f"{row['index_build_ms']:>10.2f} {row['rank_ms_mean']:>9.3f}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"benchmark": "schema_pruning", "top_k": args.top_k, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Cold-start time of the agent in fresh interpreters.
+
+Each scenario runs in a new `python` process, as a batch worker or a CLI invocation
+would: the wall time until it is ready is the median over several runs, and one extra
+run under `-X importtime` breaks the time down by top-level import and shows whether
+the heavy data stack (pandas, SQLAlchemy, pyarrow, NumPy) was loaded.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 5] [--top 5] [--scenarios agent_import sql_agent] [--json out.json]
+"""
+import argparse
+import json
+import os
+import re
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# Add project root to sys.path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(project_root)
+
+HEAVY_MODULES = ["pandas", "sqlalchemy", "pyarrow", "numpy"]
+TOOL_NAMES = ["basic_Calculator", "reverse_string", "get_metadata", "list_tables", "check_query", "execute_query"]
+
+SETUP = f"import sys; sys.path.insert(0, {project_root!r})\n"
+SCENARIOS = {
+    # Importing the agent, e.g. a worker process waiting for its first task
+    "agent_import": "from agents.agents import Agent",
+    # An agent with only the non-SQL tools
+    "calculator_agent": (
+        "from agents.agents import Agent\n"
+        "from models.openai_models import OpenAIModel\n"
+        "Agent(tools=['basic_Calculator', 'reverse_string'], model_service=OpenAIModel, model_name='gpt-4o')"
+    ),
+    # An agent with every tool that connects to a SQLite database
+    "sql_agent": (
+        "from agents.agents import Agent\n"
+        "from models.openai_models import OpenAIModel\n"
+        f"Agent(tools={TOOL_NAMES!r}, model_service=OpenAIModel, model_name='gpt-4o', "
+        "connection_string='sqlite:///{db}')"
+    ),
+    # The batch CLI, up to parsing its arguments
+    "batch_cli_help": (
+        "import runpy\n"
+        "sys.argv = ['batch_cli.py', '--help']\n"
+        "try:\n"
+        f"    runpy.run_path({os.path.join(project_root, 'interface', 'batch_cli.py')!r}, run_name='__main__')\n"
+        "except SystemExit:\n"
+        "    pass"
+    ),
+}
+
+_IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$")
+
+
+def run(code, importtime=False):
+    """
+    Runs code in a fresh interpreter.
+
+    Returns:
+    tuple: (wall seconds, stderr).
+    """
+    command = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", SETUP + code]
+    started = time.perf_counter()
+    completed = subprocess.run(command, capture_output=True, text=True, cwd=project_root)
+    elapsed = time.perf_counter() - started
+    if completed.returncode != 0:
+        raise RuntimeError(f"Scenario failed:\n{completed.stderr[-2000:]}")
+    return elapsed, completed.stderr
+
+
+def parse_importtime(stderr):
+    """
+    Parses `-X importtime` output.
+
+    Returns:
+    tuple: ({module: cumulative microseconds} of top-level imports, set of every module imported).
+    """
+    top_level = {}
+    modules = set()
+    for line in stderr.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        if not match:
+            continue
+        cumulative, indent, name = int(match.group(2)), match.group(3), match.group(4)
+        modules.add(name)
+        # Top-level imports are indented by the single space after "|"
+        if len(indent) == 1:
+            top_level[name] = cumulative
+    return top_level, modules
+
+
+def bench(name, code, runs, top):
+    wall = [run(code)[0] for _ in range(runs)]
+    _, stderr = run(code, importtime=True)
+    top_level, modules = parse_importtime(stderr)
+    slowest = sorted(top_level.items(), key=lambda item: item[1], reverse=True)[:top]
+    return {
+        "scenario": name,
+        "runs": runs,
+        "wall_ms_median": statistics.median(wall) * 1000,
+        "wall_ms_min": min(wall) * 1000,
+        "import_ms": sum(top_level.values()) / 1000,
+        "slowest_imports": [{"module": module, "ms": micros / 1000} for module, micros in slowest],
+        "heavy_modules": [module for module in HEAVY_MODULES if module in modules],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Timed runs per scenario.")
+    parser.add_argument("--top", type=int, default=5, help="Slowest top-level imports reported per scenario.")
+    parser.add_argument("--scenarios", nargs="+", choices=sorted(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--json", help="Write results to this JSON file.")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="use-tools-startup-")
+    db = os.path.join(workdir, "startup.db")
+    with sqlite3.connect(db) as conn:
+        conn.execute("CREATE TABLE IF NOT EXISTS sales (id INTEGER PRIMARY KEY, amount REAL)")
+
+    results = [bench(name, SCENARIOS[name].replace("{db}", db), args.runs, args.top) for name in args.scenarios]
+    print(f"{'scenario':<18} {'wall ms':>9} {'min ms':>8} {'import ms':>10}  heavy modules")
+    for row in results:
+        print(f"{row['scenario']:<18} {row['wall_ms_median']:>9.1f} {row['wall_ms_min']:>8.1f} "
+              f"{row['import_ms']:>10.1f}  {', '.join(row['heavy_modules']) or '-'}")
+    for row in results:
+        slowest = ", ".join(f"{item['module']} {item['ms']:.1f}" for item in row["slowest_imports"])
+        print(f"{row['scenario']}: {slowest}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"benchmark": "startup", "python": sys.version.split()[0], "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+"""
+Local stand-in for the OpenAI `/v1/chat/completions` endpoint.
+
+Replies after a configurable latency with canned tool-choice JSON, in either the
+regular or the streamed (server-sent events) format, and reports `usage` so token
+accounting can be exercised. Requests carrying `tools` (native function calling) get
+the canned choice back as `tool_calls`. Rate-limit and server errors can be injected
+to exercise client retries. Point a model client at it with
+`OPENAI_BASE_URL=http://127.0.0.1:<port>/v1`.
+
+Usage:
+    python benchmarks/mock_server.py --port 8000 --latency 0.2
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_RESPONSE = {"tool_choice": "no tool", "tool_input": "This is a canned answer from the mock server."}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        server = self.server.mock
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        fail = server.record(payload)
+
+        if server.latency:
+            time.sleep(server.latency)
+        if fail:
+            self._send_error(server.error_status, server.retry_after)
+            return
+
+        messages = payload.get("messages", [])
+        prompt = messages[-1]["content"] if messages else ""
+        answer = server.respond(prompt, payload)
+        if payload.get("tools"):
+            message = _tool_call_message(answer, payload["tools"])
+            content = json.dumps(message)
+        else:
+            content = json.dumps(answer)
+            message = {"role": "assistant", "content": content}
+        usage = {
+            "prompt_tokens": sum(len(str(m.get("content", ""))) for m in messages) // 4,
+            "completion_tokens": len(content) // 4,
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+
+        if payload.get("stream"):
+            self._send_stream(content, usage)
+        else:
+            body = json.dumps({
+                "id": "chatcmpl-mock",
+                "object": "chat.completion",
+                "model": payload.get("model"),
+                "choices": [{"index": 0, "message": message,
+                             "finish_reason": "tool_calls" if message.get("tool_calls") else "stop"}],
+                "usage": usage,
+            }).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    def _send_error(self, status, retry_after):
+        body = json.dumps({"error": {"message": f"Mock error {status}", "type": "mock_error"}}).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if retry_after is not None:
+            self.send_header("Retry-After", str(retry_after))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_stream(self, content, usage):
+        chunk_size = self.server.mock.stream_chunk_size
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        for i in range(0, len(content), chunk_size):
+            event = {"choices": [{"index": 0, "delta": {"content": content[i:i + chunk_size]}}]}
+            self.wfile.write(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+        self.wfile.write(f"data: {json.dumps({'choices': [], 'usage': usage})}\n\n".encode("utf-8"))
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.close_connection = True
+
+
+def _tool_call_message(answer, tools):
+    """
+    Turns a canned {"tool_choice", "tool_input"} answer into a native function-calling
+    reply. A string tool_input becomes the tool's first required argument.
+    """
+    if "tool_calls" in answer:
+        return {"role": "assistant", "content": None, "tool_calls": answer["tool_calls"]}
+    if answer.get("tool_choice") in (None, "no tool"):
+        return {"role": "assistant", "content": answer.get("tool_input")}
+
+    arguments = answer.get("tool_input")
+    if not isinstance(arguments, dict):
+        required = next((tool["function"]["parameters"].get("required") or []
+                         for tool in tools if tool["function"]["name"] == answer["tool_choice"]), [])
+        arguments = {required[0]: arguments} if required else {}
+    call = {"id": "call_mock", "type": "function",
+            "function": {"name": answer["tool_choice"], "arguments": json.dumps(arguments)}}
+    return {"role": "assistant", "content": None, "tool_calls": [call]}
+
+
+class MockChatServer:
+    """
+    Threaded mock chat-completions server.
+
+    `responses` decides what the model "answers": a dict returned for every prompt, a
+    list cycled through in order, or a callable taking (prompt, payload).
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, responses=None, stream_chunk_size=8,
+                 error_rate=0.0, fail_first=0, error_status=429, retry_after=None):
+        """
+        Parameters:
+        host (str): Interface to bind.
+        port (int): Port to bind, 0 picks a free one.
+        latency (float): Seconds to wait before answering each request.
+        responses (dict, list or callable, optional): Canned tool-choice JSON.
+        stream_chunk_size (int): Characters per streamed delta.
+        error_rate (float): Fraction of requests answered with error_status instead.
+        fail_first (int): Number of initial requests answered with error_status.
+        error_status (int): HTTP status of injected errors, e.g. 429 or 503.
+        retry_after (float, optional): Retry-After header sent with injected errors.
+        """
+        self.latency = latency
+        self.error_rate = error_rate
+        self.fail_first = fail_first
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self.error_count = 0
+        self.responses = responses if responses is not None else DEFAULT_RESPONSE
+        self.stream_chunk_size = stream_chunk_size
+        self.request_count = 0
+        self.requests = []
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.mock = self
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def record(self, payload):
+        """
+        Records a request and returns whether it gets an injected error.
+        """
+        with self._lock:
+            self.request_count += 1
+            self.requests.append(payload)
+            # Keep memory flat during long runs
+            del self.requests[:-100]
+            fail = self.request_count <= self.fail_first or random.random() < self.error_rate
+            self.error_count += fail
+            return fail
+
+    def respond(self, prompt, payload):
+        if callable(self.responses):
+            return self.responses(prompt, payload)
+        if isinstance(self.responses, list):
+            with self._lock:
+                return self.responses[(self.request_count - 1) % len(self.responses)]
+        return self.responses
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--response", help="Canned tool-choice JSON returned for every request.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with an error.")
+    parser.add_argument("--error-status", type=int, default=429)
+    parser.add_argument("--retry-after", type=float, help="Retry-After header of injected errors.")
+    args = parser.parse_args()
+
+    responses = json.loads(args.response) if args.response else None
+    server = MockChatServer(args.host, args.port, latency=args.latency, responses=responses,
+                            error_rate=args.error_rate, error_status=args.error_status, retry_after=args.retry_after)
+    print(f"Mock chat completions server listening on {server.base_url}")
+    server.start()
+    try:
+        server._thread.join()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
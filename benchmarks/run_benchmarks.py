@@ -0,0 +1,191 @@
+"""
+End-to-end benchmark suite.
+
+Generates synthetic SQLite databases, starts the local mock chat-completions server
+and measures:
+  - schema reflection (get_metadata) on a wide schema, cold and cached;
+  - system prompt building (ToolBox descriptions + schema);
+  - the execute_query path (validation + execution);
+  - Agent.work end to end at several concurrency levels.
+
+Reports p50/p95/p99 latency per stage, throughput per concurrency level and peak
+traced memory, and writes everything as JSON so runs can be compared over time.
+
+Usage:
+    python benchmarks/run_benchmarks.py --json bench_output.json
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+# Add project root to sys.path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(project_root)
+
+from benchmarks.mock_server import MockChatServer
+from benchmarks.synthetic_db import create_database
+
+SQL_QUERY = "SELECT COUNT(*) AS row_count, AVG(col_1_real) AS average_value FROM t0 WHERE col_3_integer > 500000"
+CANNED_RESPONSES = [
+    {"tool_choice": "execute_query", "tool_input": SQL_QUERY},
+    {"tool_choice": "reverse_string", "tool_input": "benchmark"},
+    {"tool_choice": "no tool", "tool_input": "A direct answer without tools."},
+]
+
+
+def percentile(samples, pct):
+    """
+    Nearest-rank percentile of a list of numbers.
+    """
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def summarize(latencies_ms, peak_bytes=None):
+    return {
+        "count": len(latencies_ms),
+        "mean_ms": round(sum(latencies_ms) / len(latencies_ms), 3) if latencies_ms else None,
+        "p50_ms": round(percentile(latencies_ms, 50), 3),
+        "p95_ms": round(percentile(latencies_ms, 95), 3),
+        "p99_ms": round(percentile(latencies_ms, 99), 3),
+        "peak_mem_bytes": peak_bytes,
+    }
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    func(*args, **kwargs)
+    return (time.perf_counter() - start) * 1000
+
+
+def run_stage(func, iterations):
+    """
+    Calls func `iterations` times and returns its latency summary with peak traced memory.
+    """
+    tracemalloc.start()
+    try:
+        latencies = [timed(func) for _ in range(iterations)]
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return summarize(latencies, peak)
+
+
+def run_concurrent(agent, concurrency, requests_per_level):
+    """
+    Drives Agent.work from `concurrency` threads and returns throughput and latency.
+    Every prompt is unique so the response cache does not short-circuit the model call.
+    """
+    def one(i):
+        return timed(agent.work, f"benchmark question {concurrency}-{i}")
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(one, range(requests_per_level)))
+    elapsed = time.perf_counter() - start
+    result = summarize(latencies)
+    result.update(concurrency=concurrency, seconds=round(elapsed, 3),
+                  requests_per_second=round(requests_per_level / elapsed, 2))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000, help="Rows in the execute_query table.")
+    parser.add_argument("--wide-tables", type=int, default=400, help="Tables in the wide-schema database.")
+    parser.add_argument("--columns", type=int, default=12)
+    parser.add_argument("--iterations", type=int, default=50, help="Iterations per single-threaded stage.")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 32])
+    parser.add_argument("--requests", type=int, default=200, help="Agent.work calls per concurrency level.")
+    parser.add_argument("--latency", type=float, default=0.05, help="Mock model latency in seconds.")
+    parser.add_argument("--json", help="Write results to this JSON file.")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="use-tools-bench-")
+    data_db = create_database(os.path.join(workdir, "data.db"), tables=3, columns=args.columns, rows=args.rows)
+    wide_db = create_database(os.path.join(workdir, "wide.db"), tables=args.wide_tables, columns=args.columns, rows=10)
+
+    server = MockChatServer(latency=args.latency, responses=CANNED_RESPONSES).start()
+    os.environ["OPENAI_BASE_URL"] = server.base_url
+    os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+    from agents.agents import Agent
+    from models.openai_models import OpenAIModel
+    from tools.basic_Calculator import basic_Calculator
+    from tools.reverser import reverse_string
+    from tools.sql_database_toolkit import get_metadata, list_tables, check_query, execute_query
+    from tools.schema_catalog import get_schema_catalog
+    from tools.query_validator import validate_query
+    from project_utils.tracing import Tracer, InMemoryExporter, set_tracer
+
+    tools = [basic_Calculator, reverse_string, get_metadata, list_tables, check_query, execute_query]
+    wide_agent = Agent(tools=tools, model_service=OpenAIModel, model_name="gpt-4o", connection_string=wide_db)
+    data_agent = Agent(tools=tools, model_service=OpenAIModel, model_name="gpt-4o", connection_string=data_db)
+    wide_catalog = get_schema_catalog(wide_agent.db_engine)
+
+    def execute_path():
+        validate_query(data_agent.db_engine, SQL_QUERY)
+        execute_query(data_agent.db_engine, SQL_QUERY)
+
+    stages = {
+        "get_metadata_cold": run_stage(wide_catalog.refresh, max(1, args.iterations // 10)),
+        "get_metadata_cached": run_stage(lambda: get_metadata(wide_agent.db_engine), args.iterations),
+        "prompt_build": run_stage(lambda: wide_agent.build_system_prompt("total by region"), args.iterations),
+        "execute_query": run_stage(execute_path, args.iterations),
+    }
+
+    # Per-stage timings of the end-to-end runs come from the tracer's spans
+    exporter = InMemoryExporter(max_records=None)
+    set_tracer(Tracer([exporter]))
+    tracemalloc.start()
+    throughput = [run_concurrent(data_agent, level, args.requests) for level in args.concurrency]
+    _, end_to_end_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    set_tracer(None)
+    span_stages = {}
+    for span in exporter.spans():
+        span_stages.setdefault(span["name"], []).append(span["duration_ms"])
+    end_to_end_stages = {name: summarize(latencies) for name, latencies in span_stages.items()}
+    token_usage = exporter.counters()
+
+    server.stop()
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    results = {
+        "benchmark": "use-tools-openai",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "config": vars(args),
+        "stages": stages,
+        "end_to_end": {"peak_mem_bytes": end_to_end_peak, "levels": throughput,
+                       "stages": end_to_end_stages, "counters": token_usage},
+        "mock_requests": server.request_count,
+    }
+
+    for name, stage in stages.items():
+        print(f"{name:<22} p50 {stage['p50_ms']:>9.2f} ms  p95 {stage['p95_ms']:>9.2f} ms  "
+              f"p99 {stage['p99_ms']:>9.2f} ms  peak {stage['peak_mem_bytes'] / 1e6:>7.2f} MB")
+    for name, stage in end_to_end_stages.items():
+        print(f"  span {name:<17} p50 {stage['p50_ms']:>9.2f} ms  p95 {stage['p95_ms']:>9.2f} ms  "
+              f"p99 {stage['p99_ms']:>9.2f} ms")
+    for level in throughput:
+        print(f"work x{level['concurrency']:<3} {level['requests_per_second']:>8.1f} req/s  "
+              f"p50 {level['p50_ms']:>8.2f} ms  p95 {level['p95_ms']:>8.2f} ms  p99 {level['p99_ms']:>8.2f} ms")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Synthetic SQLite databases of configurable size for benchmarks.
+
+Usage:
+    python benchmarks/synthetic_db.py out.db --tables 50 --columns 12 --rows 100000
+"""
+import argparse
+import os
+import random
+import sqlite3
+
+COLUMN_KINDS = ["INTEGER", "REAL", "TEXT"]
+CATEGORIES = ["north", "south", "east", "west", "online", "retail", "wholesale"]
+
+
+def column_definitions(columns):
+    """
+    Returns (name, sqlite type) pairs for a table with the given column count. The
+    first column is always an integer id.
+    """
+    definitions = [("id", "INTEGER")]
+    for i in range(1, columns):
+        kind = COLUMN_KINDS[i % len(COLUMN_KINDS)]
+        definitions.append((f"col_{i}_{kind.lower()}", kind))
+    return definitions
+
+
+def create_database(path, tables=10, columns=8, rows=1000, seed=0, batch_size=10_000):
+    """
+    Creates (or replaces) a SQLite database filled with random data.
+
+    Parameters:
+    path (str): Database file path.
+    tables (int): Number of tables, named t0, t1, ...
+    columns (int): Columns per table, including the id column.
+    rows (int): Rows per table.
+    seed (int): Random seed, so runs are reproducible.
+    batch_size (int): Rows inserted per executemany call.
+
+    Returns:
+    str: The SQLAlchemy connection string for the database.
+    """
+    if os.path.exists(path):
+        os.remove(path)
+    rng = random.Random(seed)
+    definitions = column_definitions(columns)
+
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        for t in range(tables):
+            table = f"t{t}"
+            column_sql = ", ".join(f"{name} {kind}" for name, kind in definitions)
+            conn.execute(f"CREATE TABLE {table} ({column_sql})")
+            placeholders = ", ".join("?" for _ in definitions)
+            insert = f"INSERT INTO {table} VALUES ({placeholders})"
+            for start in range(0, rows, batch_size):
+                batch = []
+                for row_id in range(start, min(start + batch_size, rows)):
+                    row = [row_id]
+                    for _, kind in definitions[1:]:
+                        if kind == "INTEGER":
+                            row.append(rng.randint(0, 1_000_000))
+                        elif kind == "REAL":
+                            row.append(round(rng.uniform(0, 10_000), 2))
+                        else:
+                            row.append(rng.choice(CATEGORIES))
+                    batch.append(row)
+                conn.executemany(insert, batch)
+        conn.commit()
+    finally:
+        conn.close()
+    return f"sqlite:///{os.path.abspath(path)}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path")
+    parser.add_argument("--tables", type=int, default=10)
+    parser.add_argument("--columns", type=int, default=8)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    print(create_database(args.path, args.tables, args.columns, args.rows, args.seed))
+
+
+if __name__ == "__main__":
+    main()
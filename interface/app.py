@@ -1,41 +1,27 @@
 import streamlit as st
 import os
 import sys
+import uuid
 
 # Add project root to sys.path
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 sys.path.append(project_root)
 
-import tempfile
-from tools.basic_Calculator import basic_Calculator
-from tools.reverser import reverse_string
-from tools.sql_database_toolkit import get_metadata, list_tables, check_query, execute_query
+from interface.resources import store_upload, get_agent, content_hash, read_only_connection_string, READ_ONLY_PRAGMAS
 from models.openai_models import OpenAIModel
 # from models.ollama_models import OllamaModel
 from agents.agents import Agent
+from agents.router import Router
+from agents.example_store import ExampleStore
 
-# Streamlit App
-st.title("Database Chatbot")
-st.markdown("""
-Upload a database file and interact with a chatbot to query the database using natural language.
-""")
 
-# Step 1: File Uploader for Database
-uploaded_file = st.file_uploader("Upload your SQLite database file (.db)", type=["db"])
-
-# Check if a file is uploaded
-if uploaded_file is not None:
-    # Save the uploaded file temporarily
-    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".db")
-    temp_file.write(uploaded_file.read())
-    temp_file.close()
-
-    # Generate SQLite connection string
-    connection_string = f"sqlite:///{temp_file.name}"
-    st.success(f"Database loaded successfully: {temp_file.name}")
-
-    # Step 2: Initialize the Agent
-    tools = [basic_Calculator, reverse_string, get_metadata, list_tables, check_query, execute_query]
+def build_agent(path):
+    """
+    Builds the engine and agent of an uploaded database. get_agent calls it once per
+    content hash and drops the agent when the upload is evicted.
+    """
+    tools = ["basic_Calculator", "batch_Calculator", "reverse_string", "get_metadata", "list_tables", "check_query",
+             "execute_query"]
 
     model_service = OpenAIModel
     model_name = 'gpt-4o'
@@ -47,14 +33,44 @@ if uploaded_file is not None:
     # model_name = 'sqlcoder:7b'
     # stop = "<|eot_id|>"
 
-    agent = Agent(
+    # Uploaded files never change, open them read-only/immutable with mmap enabled
+    return Agent(
         tools=tools,
         model_service=model_service,
         model_name=model_name,
-        connection_string=connection_string,
-        stop=stop
+        connection_string=read_only_connection_string(path),
+        stop=stop,
+        db_options={"sqlite_pragmas": READ_ONLY_PRAGMAS},
+        # Trivial reverse/arithmetic requests are answered without a model call
+        router=Router(),
+        # Repeated questions about this database reuse SQL that already worked
+        example_store=ExampleStore(),
     )
 
+
+# Streamlit App
+st.title("Database Chatbot")
+st.markdown("""
+Upload a database file and interact with a chatbot to query the database using natural language.
+""")
+
+# Step 1: File Uploader for Database
+uploaded_file = st.file_uploader("Upload your SQLite database file (.db)", type=["db"])
+
+# Check if a file is uploaded
+if uploaded_file is not None:
+    # Hash each upload once per session, then reuse one on-disk copy per content hash
+    hash_key = f"upload_hash_{uploaded_file.file_id}"
+    data = uploaded_file.getvalue()
+    if hash_key not in st.session_state:
+        st.session_state[hash_key] = content_hash(data)
+    digest = st.session_state[hash_key]
+    db_path = store_upload(data, digest)
+    st.success(f"Database loaded successfully: {uploaded_file.name}")
+
+    # Step 2: Initialize the Agent
+    agent = get_agent(digest, db_path, build_agent)
+
     # Step 3: Chat Interface
     st.header("Chat with Your Database")
     user_query = st.text_input("Ask me anything about your database:")
@@ -62,12 +78,11 @@ if uploaded_file is not None:
     if st.button("Submit Query"):
         if user_query.strip():
             try:
-                response = agent.work(user_query)
-
-                if isinstance(response, dict) and "error" in response:
-                    st.error(f"Error: {response['error']}")
-                else:
-                    st.markdown(f"**Response:**\n{response}")
+                # Direct answers render as they stream, tool results once the tool has run
+                st.markdown("**Response:**")
+                # Follow-up questions see this browser session's earlier turns
+                session_id = st.session_state.setdefault("conversation_id", uuid.uuid4().hex)
+                st.write_stream(agent.stream_work(user_query, session_id=session_id))
             except Exception as e:
                 st.error(f"Error: {e}")
         else:
@@ -0,0 +1,70 @@
+"""
+Batch question runner.
+
+Reads questions from a JSONL or CSV file, answers them concurrently with the agent
+and appends one JSON result per line to the output file. Re-running with the same
+output file resumes where the previous run stopped.
+
+Usage:
+    python interface/batch_cli.py questions.jsonl results.jsonl --db sales.db --concurrency 32 --rpm 500
+"""
+import argparse
+import json
+import os
+import sys
+
+# Add project root to sys.path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(project_root)
+
+from models.openai_models import OpenAIModel
+from models.request_scheduler import RequestScheduler
+from agents.agents import Agent
+from agents.router import Router
+from agents.example_store import ExampleStore
+from agents.batch_runner import BatchRunner, read_questions, DEFAULT_CONCURRENCY
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="Questions as .jsonl or .csv.")
+    parser.add_argument("output", help="JSONL file results are appended to.")
+    parser.add_argument("--db", help="SQLite database file, or a full SQLAlchemy connection string.")
+    parser.add_argument("--model", default="gpt-4o")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--rpm", type=float, default=None, help="Maximum model requests per minute.")
+    parser.add_argument("--tpm", type=float, default=None, help="Maximum model tokens per minute.")
+    parser.add_argument("--no-resume", action="store_true", help="Overwrite the output instead of resuming.")
+    parser.add_argument("--router-classifier", help="Saved IntentClassifier (JSON) for the local fast-path router.")
+    parser.add_argument("--no-router", action="store_true", help="Send every question to the model.")
+    parser.add_argument("--examples", help="SQLite file of questions answered with working SQL, reused across runs.")
+    args = parser.parse_args()
+
+    connection_string = None
+    if args.db:
+        connection_string = args.db if "://" in args.db else f"sqlite:///{os.path.abspath(args.db)}"
+
+    # Names from toolbox.registry; their modules are imported by the agent
+    tools = ["basic_Calculator", "batch_Calculator", "reverse_string", "get_metadata", "list_tables", "check_query",
+             "execute_query"]
+    agent = Agent(
+        tools=tools,
+        model_service=OpenAIModel,
+        model_name=args.model,
+        connection_string=connection_string,
+        router=None if args.no_router else Router(classifier=args.router_classifier),
+        example_store=ExampleStore(path=args.examples),
+    )
+
+    if args.tpm:
+        agent.get_async_model().scheduler = RequestScheduler(tokens_per_minute=args.tpm)
+    runner = BatchRunner(agent, concurrency=args.concurrency, requests_per_minute=args.rpm)
+    stats = runner.run(read_questions(args.input), args.output, resume=not args.no_resume)
+    if agent.router is not None:
+        stats["router"] = agent.router.stats()
+    stats["examples"] = agent.example_store.stats()
+    print(json.dumps(stats))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+# Uploaded databases are stored once per content hash in this directory.
+UPLOAD_DIR = os.path.join(tempfile.gettempdir(), "use-tools-openai-uploads")
+# How many uploaded databases (and their engines/agents) are kept alive at once.
+MAX_CACHED_DATABASES = 8
+# Memory-map up to this many bytes of each database for faster reads.
+SQLITE_MMAP_SIZE = 1024 * 1024 * 1024
+READ_ONLY_PRAGMAS = {"mmap_size": SQLITE_MMAP_SIZE, "query_only": 1}
+
+_stored = OrderedDict()
+# Content hash -> the agent built for that upload (see get_agent)
+_agents = {}
+_stored_lock = threading.Lock()
+
+
+def content_hash(data):
+    """
+    Returns:
+    str: The SHA-256 hex digest of the uploaded bytes.
+    """
+    return hashlib.sha256(data).hexdigest()
+
+
+def store_upload(data, digest=None):
+    """
+    Writes uploaded database bytes to disk once per distinct content.
+
+    Re-uploads of the same file and Streamlit reruns reuse the existing copy. When more
+    than MAX_CACHED_DATABASES distinct uploads are stored, the least recently used
+    files are deleted together with their agents and engines.
+
+    Parameters:
+    data (bytes): The uploaded file content.
+    digest (str, optional): content_hash(data), if already known.
+
+    Returns:
+    str: Path of the on-disk copy.
+    """
+    digest = digest or content_hash(data)
+    path = os.path.join(UPLOAD_DIR, f"{digest}.db")
+    with _stored_lock:
+        if not os.path.exists(path):
+            os.makedirs(UPLOAD_DIR, exist_ok=True)
+            # Write next to the target and rename, so a crash never leaves a partial file
+            fd, tmp_path = tempfile.mkstemp(dir=UPLOAD_DIR, suffix=".part")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        _stored[digest] = path
+        _stored.move_to_end(digest)
+        while len(_stored) > MAX_CACHED_DATABASES:
+            _evict(*_stored.popitem(last=False))
+    return path
+
+
+def get_agent(digest, path, build):
+    """
+    Returns the agent of a stored upload, building it once per content hash and
+    sharing it across reruns and sessions until the upload is evicted.
+
+    Parameters:
+    digest (str): content_hash of the upload.
+    path (str): Path returned by store_upload.
+    build (callable): Builds the agent from the database path.
+
+    Returns:
+    Agent: The upload's agent.
+    """
+    with _stored_lock:
+        agent = _agents.get(digest)
+        if agent is None:
+            agent = _agents[digest] = build(path)
+        return agent
+
+
+def _evict(digest, path):
+    from tools.database_conn import dispose_engine
+
+    # The agent, its pooled connections and the file go together
+    _agents.pop(digest, None)
+    dispose_engine(read_only_connection_string(path))
+    remove_file(path)
+
+
+def remove_file(path):
+    """
+    Deletes an evicted database copy, ignoring files that are already gone or still
+    locked (Windows keeps open files locked).
+    """
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def read_only_connection_string(path):
+    """
+    SQLite connection string opening the file read-only and immutable, which lets SQLite
+    skip locking and change detection for a file nobody writes to.
+
+    Parameters:
+    path (str): Database file path.
+
+    Returns:
+    str: The SQLAlchemy connection string.
+    """
+    return f"sqlite:///file:{path}?mode=ro&immutable=1&uri=true"
@@ -0,0 +1,135 @@
+import json
+import logging
+
+import httpx
+
+from models.http_client import get_async_client, DEFAULT_TIMEOUT
+from models.openai_models import (build_chat_payload, check_response, parse_chat_response, parse_tool_call_response,
+                                  DEFAULT_BASE_URL)
+from models.request_scheduler import (INTERACTIVE, RetryableError, estimate_payload_tokens, get_default_scheduler,
+                                      request_key)
+from project_utils.config import get_config
+from project_utils.concurrency import get_limiter, DEFAULT_MODEL_CONCURRENCY
+from project_utils.tracing import get_tracer, LLM_CALL
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncOpenAIModel:
+    def __init__(self, model, system_prompt, temperature, base_url=None, client=None,
+                 max_concurrency=DEFAULT_MODEL_CONCURRENCY, timeout=DEFAULT_TIMEOUT, scheduler=None,
+                 priority=INTERACTIVE):
+        """
+        asyncio-native counterpart of OpenAIModel.
+
+        Parameters:
+        model (str): The name of the model to use.
+        system_prompt (str): Default system prompt sent with every request.
+        temperature (float): Sampling temperature.
+        base_url (str, optional): API base URL. Defaults to the OPENAI_BASE_URL setting
+                                  (project_utils.config) or the public OpenAI endpoint.
+        client (httpx.AsyncClient, optional): Client to send requests with. Defaults to
+                                              the shared client of the running loop.
+        max_concurrency (int, optional): Maximum in-flight requests to this endpoint,
+                                         shared by every client on the same loop.
+        timeout (float or tuple, optional): Request timeout, (connect, read) seconds.
+        scheduler (RequestScheduler, optional): Rate limits, retries and coalescing of requests.
+                                                Defaults to the shared scheduler.
+        priority (int, optional): Scheduling priority, INTERACTIVE or BATCH.
+        """
+        config = get_config()
+        base_url = base_url or config.get('OPENAI_BASE_URL') or DEFAULT_BASE_URL
+        self.model_endpoint = f"{base_url.rstrip('/')}/chat/completions"
+        self.temperature = temperature
+        self.model = model
+        self.system_prompt = system_prompt
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.client = client
+        self.scheduler = scheduler or get_default_scheduler()
+        self.priority = priority
+        self.api_key = config.get('OPENAI_API_KEY')
+        self.headers = {
+            'Content-Type': 'application/json',
+            'Authorization': f'Bearer {self.api_key}'
+        }
+
+    def _get_client(self):
+        return self.client or get_async_client(pool_size=self.max_concurrency, timeout=self.timeout)
+
+    async def generate_text(self, prompt, system_prompt=None, context=None):
+        """
+        Sends a chat completion request through the scheduler and parses the JSON reply.
+
+        Parameters:
+        prompt (str): The user message.
+        system_prompt (str, optional): Overrides the default system prompt for this call.
+        context (list, optional): Earlier conversation messages, sent before the user message.
+
+        Returns:
+        dict: The parsed JSON content, or {"error": ...} on failure.
+        """
+        payload = build_chat_payload(
+            self.model,
+            system_prompt if system_prompt is not None else self.system_prompt,
+            prompt,
+            self.temperature,
+            context=context,
+        )
+        return await self._send(payload, parse_chat_response)
+
+    async def generate_tool_call(self, prompt, tools, system_prompt=None, history=None, tool_choice="auto",
+                                 context=None):
+        """
+        Async version of OpenAIModel.generate_tool_call (native function calling).
+
+        Parameters:
+        prompt (str): The user message.
+        tools (list): Tool definitions, e.g. from ToolBox.schemas().
+        system_prompt (str, optional): Overrides the default system prompt for this call.
+        history (list, optional): Messages following the user message in a multi-step exchange.
+        tool_choice (str, optional): "auto", or "none" to make the model answer directly.
+        context (list, optional): Earlier conversation messages, sent before the user message.
+
+        Returns:
+        dict: {"tool_choice", "tool_input", "tool_calls"}, or {"error": ...} on failure.
+        """
+        payload = build_chat_payload(
+            self.model,
+            system_prompt if system_prompt is not None else self.system_prompt,
+            prompt,
+            self.temperature,
+            tools=tools,
+            history=history,
+            tool_choice=tool_choice,
+            context=context,
+        )
+        return await self._send(payload, parse_tool_call_response, tools=len(tools))
+
+    async def _send(self, payload, parse, **span_attributes):
+        """
+        Sends a request through the scheduler, one traced HTTP call per attempt.
+        """
+        async def attempt():
+            async with get_limiter(self.model_endpoint, self.max_concurrency):
+                with get_tracer().span(LLM_CALL, model=self.model, **span_attributes) as span:
+                    try:
+                        response = await self._get_client().post(self.model_endpoint, headers=self.headers,
+                                                                 content=json.dumps(payload))
+                    except httpx.TransportError as e:
+                        raise RetryableError(str(e)) from e
+                    span.set(status_code=response.status_code)
+            return check_response(response.status_code, response.headers, response.json, parse)
+
+        try:
+            return await self.scheduler.arun(attempt, key=request_key(self.model_endpoint, payload),
+                                             priority=self.priority, tokens=estimate_payload_tokens(payload))
+        except RetryableError as e:
+            logger.warning("Error in API call: %s", e)
+            return e.to_dict()
+        except httpx.HTTPError as e:
+            logger.warning("Error in API call: %s", e)
+            return {"error": f"Error in API call: {str(e)}"}
+        except Exception as e:
+            logger.warning("Error parsing API response: %s", e)
+            return {"error": f"Error parsing API response: {str(e)}"}
@@ -0,0 +1,104 @@
+import asyncio
+import threading
+import weakref
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_POOL_SIZE = 10
+# (connect timeout, read timeout) in seconds, as accepted by requests.
+DEFAULT_TIMEOUT = (5, 120)
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def create_session(pool_size=DEFAULT_POOL_SIZE, pool_block=False):
+    """
+    Creates a requests.Session with a keep-alive connection pool.
+
+    Parameters:
+    pool_size (int): Maximum number of pooled connections kept per host.
+    pool_block (bool): If True, callers wait for a free connection instead of
+                       opening extra, non-pooled ones when the pool is exhausted.
+
+    Returns:
+    requests.Session: A session whose connections are reused across requests.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, pool_block=pool_block)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session(pool_size=DEFAULT_POOL_SIZE, pool_block=False):
+    """
+    Returns the process-wide session for the given pool settings, creating it once.
+
+    requests.Session is safe to share between threads for plain request/response
+    use, so every model client in the process can reuse the same warm connections.
+
+    Parameters:
+    pool_size (int): Maximum number of pooled connections kept per host.
+    pool_block (bool): Whether to block when the pool is exhausted.
+
+    Returns:
+    requests.Session: The shared session.
+    """
+    key = (pool_size, pool_block)
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = create_session(pool_size=pool_size, pool_block=pool_block)
+            _sessions[key] = session
+        return session
+
+
+def close_sessions():
+    """
+    Closes every shared session and its pooled connections.
+    """
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+
+# httpx.AsyncClient instances are tied to the event loop they were first used on.
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_async_client(pool_size=DEFAULT_POOL_SIZE, timeout=DEFAULT_TIMEOUT):
+    """
+    Returns the shared httpx.AsyncClient for the running event loop, creating it once.
+
+    Parameters:
+    pool_size (int): Maximum number of pooled keep-alive connections.
+    timeout (float or tuple): Request timeout, or (connect, read) seconds.
+
+    Returns:
+    httpx.AsyncClient: The shared async client.
+    """
+    loop = asyncio.get_running_loop()
+    loop_clients = _async_clients.setdefault(loop, {})
+    key = (pool_size, timeout)
+    client = loop_clients.get(key)
+    if client is None:
+        if isinstance(timeout, tuple):
+            connect_timeout, read_timeout = timeout
+            timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        limits = httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+        client = httpx.AsyncClient(limits=limits, timeout=timeout)
+        loop_clients[key] = client
+    return client
+
+
+async def aclose_async_clients():
+    """
+    Closes the async clients created on the running event loop.
+    """
+    loop = asyncio.get_running_loop()
+    for client in _async_clients.pop(loop, {}).values():
+        await client.aclose()
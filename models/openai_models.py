@@ -1,68 +1,372 @@
 import requests
 import json
-import os
-from project_utils.getkeys import getkeys
-import sys
-print("\n".join(sys.path))
+import logging
+from project_utils.config import get_config
+from project_utils.tracing import get_tracer, LLM_CALL
+from models.http_client import get_session, DEFAULT_POOL_SIZE, DEFAULT_TIMEOUT
+from models.request_scheduler import (RETRYABLE_STATUS, INTERACTIVE, RetryableError, estimate_payload_tokens,
+                                      get_default_scheduler, request_key, retry_after_seconds)
 
-config_path = os.path.join(os.path.dirname(__file__), '..', 'configs', 'config.yaml')
-getkeys(config_path)
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASE_URL = 'https://api.openai.com/v1'
 
 class OpenAIModel:
-    def __init__(self, model, system_prompt, temperature):
-        self.model_endpoint = 'https://api.openai.com/v1/chat/completions'
+    def __init__(self, model, system_prompt, temperature, base_url=None, session=None,
+                 pool_size=DEFAULT_POOL_SIZE, timeout=DEFAULT_TIMEOUT, scheduler=None, priority=INTERACTIVE):
+        """
+        Parameters:
+        model (str): The name of the model to use.
+        system_prompt (str): Default system prompt sent with every request.
+        temperature (float): Sampling temperature.
+        base_url (str, optional): API base URL. Defaults to the OPENAI_BASE_URL setting
+                                  (project_utils.config) or the public OpenAI endpoint;
+                                  point it at a local stand-in server for testing.
+        session (requests.Session, optional): Session to send requests with. Defaults
+                                              to the shared pooled session.
+        pool_size (int, optional): Pool size of the shared session when none is given.
+        timeout (float or tuple, optional): requests timeout, (connect, read) seconds.
+        scheduler (RequestScheduler, optional): Rate limits, retries and coalescing of requests.
+                                                Defaults to the shared scheduler.
+        priority (int, optional): Scheduling priority, INTERACTIVE or BATCH.
+        """
+        config = get_config()
+        base_url = base_url or config.get('OPENAI_BASE_URL') or DEFAULT_BASE_URL
+        self.model_endpoint = f"{base_url.rstrip('/')}/chat/completions"
         self.temperature = temperature
         self.model = model
         self.system_prompt = system_prompt
-        getkeys(config_path)
-        self.api_key = os.getenv('OPENAI_API_KEY')
+        self.timeout = timeout
+        self.scheduler = scheduler or get_default_scheduler()
+        self.priority = priority
+        # The session is shared process-wide
+        self.session = session or get_session(pool_size=pool_size)
+        self.api_key = config.get('OPENAI_API_KEY')
         self.headers = {
             'Content-Type': 'application/json',
             'Authorization': f'Bearer {self.api_key}'
         }
     
-    def generate_text(self, prompt):
-        payload = {
-            "model": self.model,
-            "response_format": {"type": "json_object"},
-            "messages": [
-                {
-                    "role": "system",
-                    "content": self.system_prompt
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            "stream": False,
-            "temperature": self.temperature,
-        }
+    def generate_text(self, prompt, system_prompt=None, context=None):
+        """
+        Sends a chat completion request through the scheduler and parses the JSON reply.
+        Rate limits (429) and transient server errors are retried.
 
-        try:
-            # Send the request to the API
-            response = requests.post(self.model_endpoint, headers=self.headers, data=json.dumps(payload))
-            response_json = response.json()
-
-            # Log the full response for debugging
-            print("Full API Response:", response_json)
-
-            # Handle 'choices' if present
-            if 'choices' in response_json:
-                content = response_json['choices'][0]['message']['content']
-                return json.loads(content)
-            else:
-                # Fallback for unexpected response structures
-                print("Unexpected response format. Returning raw response.")
-                return {"error": "Unexpected response format", "raw_response": response_json}
+        Parameters:
+        prompt (str): The user message.
+        system_prompt (str, optional): Overrides the default system prompt for this call,
+                                       so one client can serve many prompts.
+        context (list, optional): Earlier conversation messages, sent before the user message.
+
+        Returns:
+        dict: The parsed JSON content, or {"error": ...} on failure. Failed HTTP requests
+              also carry "status_code" and "retry_after".
+        """
+        payload = build_chat_payload(
+            self.model,
+            system_prompt if system_prompt is not None else self.system_prompt,
+            prompt,
+            self.temperature,
+            context=context,
+        )
+        return self._send(payload, parse_chat_response)
+
+    def stream_text(self, prompt, system_prompt=None, context=None):
+        """
+        Streams a chat completion, yielding content deltas as they arrive.
+
+        Rate limits (429), transient server errors and connection errors are retried with
+        the scheduler's backoff until the stream opens; nothing has been yielded by then.
+
+        Parameters:
+        prompt (str): The user message.
+        system_prompt (str, optional): Overrides the default system prompt for this call.
+        context (list, optional): Earlier conversation messages, sent before the user message.
+
+        Yields:
+        str: The next piece of the response content.
+
+        Raises:
+        requests.RequestException: If the request fails or the API returns an error status.
+        """
+        payload = build_chat_payload(
+            self.model,
+            system_prompt if system_prompt is not None else self.system_prompt,
+            prompt,
+            self.temperature,
+            stream=True,
+            context=context,
+        )
+        def attempt():
+            try:
+                response = self.session.post(self.model_endpoint, headers=self.headers, data=json.dumps(payload),
+                                             timeout=self.timeout, stream=True)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                raise RetryableError(str(e)) from e
+            if response.status_code in RETRYABLE_STATUS:
+                response.close()
+                raise RetryableError(f"API returned HTTP {response.status_code}", response.status_code,
+                                     retry_after_seconds(response.headers))
+            try:
+                response.raise_for_status()
+            except requests.HTTPError:
+                response.close()
+                raise
+            return response, None
+
+        with get_tracer().span(LLM_CALL, model=self.model, stream=True) as span:
+            # Only opening the stream is retried; once deltas are yielded a failure is final.
+            # Streams are not coalesced since their responses cannot be shared.
+            try:
+                response = self.scheduler.run(attempt, priority=self.priority,
+                                              tokens=estimate_payload_tokens(payload))
+            except RetryableError as e:
+                raise requests.HTTPError(f"Error in API call: {e}") from e
+            span.set(status_code=response.status_code)
+            with response:
+                for delta in iter_stream_deltas(response.iter_lines(decode_unicode=True)):
+                    yield delta
+
+    def generate_tool_call(self, prompt, tools, system_prompt=None, history=None, tool_choice="auto", context=None):
+        """
+        Sends a chat completion request using native function calling: the tools are
+        passed as JSON-schema definitions and the model's choice comes back as
+        structured `tool_calls` instead of free-form JSON.
+
+        Parameters:
+        prompt (str): The user message.
+        tools (list): Tool definitions, e.g. from ToolBox.schemas().
+        system_prompt (str, optional): Overrides the default system prompt for this call.
+        history (list, optional): Messages following the user message in a multi-step
+                                  exchange, e.g. from tool_call_messages.
+        tool_choice (str, optional): "auto", or "none" to make the model answer directly.
+        context (list, optional): Earlier conversation messages, sent before the user message.
 
+        Returns:
+        dict: {"tool_choice", "tool_input", "tool_calls"} (see parse_tool_call_response),
+              or {"error": ...} on failure.
+        """
+        payload = build_chat_payload(
+            self.model,
+            system_prompt if system_prompt is not None else self.system_prompt,
+            prompt,
+            self.temperature,
+            tools=tools,
+            history=history,
+            tool_choice=tool_choice,
+            context=context,
+        )
+        return self._send(payload, parse_tool_call_response, tools=len(tools))
+
+    def _send(self, payload, parse, **span_attributes):
+        """
+        Sends a request through the scheduler, one traced HTTP call per attempt.
+        """
+        def attempt():
+            with get_tracer().span(LLM_CALL, model=self.model, **span_attributes) as span:
+                try:
+                    response = self.session.post(self.model_endpoint, headers=self.headers,
+                                                 data=json.dumps(payload), timeout=self.timeout)
+                except (requests.ConnectionError, requests.Timeout) as e:
+                    raise RetryableError(str(e)) from e
+                span.set(status_code=response.status_code)
+            return check_response(response.status_code, response.headers, response.json, parse)
+
+        try:
+            return self.scheduler.run(attempt, key=request_key(self.model_endpoint, payload),
+                                      priority=self.priority, tokens=estimate_payload_tokens(payload))
+        except RetryableError as e:
+            logger.warning("Error in API call: %s", e)
+            return e.to_dict()
         except requests.RequestException as e:
-            print(f"Error in API call: {e}")
+            logger.warning("Error in API call: %s", e)
             return {"error": f"Error in API call: {str(e)}"}
         except Exception as e:
-            print(f"Error parsing API response: {e}")
+            logger.warning("Error parsing API response: %s", e)
             return {"error": f"Error parsing API response: {str(e)}"}
 
-    
-    
-    
\ No newline at end of file
+
+def check_response(status_code, headers, read_json, parse):
+    """
+    Interprets the HTTP response of one request attempt for the scheduler.
+
+    Parameters:
+    status_code (int): HTTP status.
+    headers (mapping): Response headers (case-insensitive).
+    read_json (callable): Returns the decoded response body.
+    parse (callable): Parses a successful response body, e.g. parse_chat_response.
+
+    Returns:
+    tuple: (result, total tokens used or None). Non-retryable HTTP errors are returned as
+           {"error", "status_code", "retry_after"}.
+
+    Raises:
+    RetryableError: For statuses in RETRYABLE_STATUS, with the server's Retry-After.
+    """
+    if status_code in RETRYABLE_STATUS:
+        raise RetryableError(f"API returned HTTP {status_code}", status_code, retry_after_seconds(headers))
+    if status_code >= 400:
+        try:
+            message = read_json()["error"]["message"]
+        except Exception:
+            message = None
+        error = f"Error in API call: API returned HTTP {status_code}" + (f": {message}" if message else "")
+        return {"error": error, "status_code": status_code, "retry_after": None}, None
+    response_json = read_json()
+    return parse(response_json), (response_json.get("usage") or {}).get("total_tokens")
+
+
+def iter_stream_deltas(lines):
+    """
+    Extracts content deltas from the server-sent event lines of a streamed completion.
+
+    Parameters:
+    lines (iterable): Decoded response lines.
+
+    Yields:
+    str: Non-empty content deltas.
+    """
+    for line in lines:
+        if not line or not line.startswith("data:"):
+            continue
+        data = line[len("data:"):].strip()
+        if data == "[DONE]":
+            break
+        event = json.loads(data)
+        # With stream_options.include_usage the last event carries the token usage
+        record_usage(event.get("usage"))
+        choices = event.get("choices") or []
+        if choices:
+            content = choices[0].get("delta", {}).get("content")
+            if content:
+                yield content
+
+
+def build_chat_payload(model, system_prompt, prompt, temperature, stream=False, tools=None,
+                       history=None, tool_choice="auto", context=None):
+    """
+    Builds the chat completions request body shared by the sync and async clients.
+
+    With tools, the request uses native function calling instead of JSON mode. context
+    holds earlier conversation turns, placed between the system prompt and the user
+    message so the request starts with a stable, cacheable prefix. history holds the
+    messages exchanged after the user message (assistant tool calls and tool results)
+    in a multi-step exchange.
+    """
+    payload = {
+        "model": model,
+        "response_format": {"type": "json_object"},
+        "messages": [
+            {
+                "role": "system",
+                "content": system_prompt
+            }
+        ] + list(context or []) + [
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ] + list(history or []),
+        "stream": stream,
+        "temperature": temperature,
+    }
+    if stream:
+        payload["stream_options"] = {"include_usage": True}
+    if tools:
+        del payload["response_format"]
+        payload["tools"] = tools
+        payload["tool_choice"] = tool_choice
+    return payload
+
+
+def record_usage(usage):
+    """
+    Records the token counts of an API `usage` block on the tracer.
+    """
+    if not usage:
+        return
+    tracer = get_tracer()
+    for key in ("prompt_tokens", "completion_tokens", "total_tokens"):
+        if usage.get(key) is not None:
+            tracer.count(f"llm_{key}", usage[key])
+
+
+def parse_chat_response(response_json):
+    """
+    Extracts and decodes the JSON content of a chat completions response.
+
+    Returns:
+    dict: The decoded content, or {"error": ...} for unexpected response structures.
+    """
+    # Log the full response for debugging (formatted only when debug logging is on)
+    logger.debug("Full API Response: %s", response_json)
+    record_usage(response_json.get("usage"))
+
+    # Handle 'choices' if present
+    if 'choices' in response_json:
+        content = response_json['choices'][0]['message']['content']
+        return json.loads(content)
+    else:
+        # Fallback for unexpected response structures
+        logger.warning("Unexpected response format. Returning raw response.")
+        return {"error": "Unexpected response format", "raw_response": response_json}
+
+
+
+def parse_tool_call_response(response_json):
+    """
+    Extracts the tool calls of a native function-calling response.
+
+    The first call is also returned as tool_choice/tool_input, the same shape as the
+    JSON-mode reply, with tool_input holding the decoded arguments dict. A reply without
+    tool calls is a direct answer: tool_choice is "no tool" and tool_input the content.
+
+    Returns:
+    dict: {"tool_choice", "tool_input", "tool_calls": [{"id", "name", "arguments"}]},
+          or {"error": ...} for unexpected response structures.
+    """
+    logger.debug("Full API Response: %s", response_json)
+    record_usage(response_json.get("usage"))
+
+    if 'choices' not in response_json:
+        logger.warning("Unexpected response format. Returning raw response.")
+        return {"error": "Unexpected response format", "raw_response": response_json}
+
+    message = response_json['choices'][0]['message']
+    tool_calls = [
+        {
+            "id": call.get("id"),
+            "name": call["function"]["name"],
+            "arguments": json.loads(call["function"].get("arguments") or "{}"),
+        }
+        for call in message.get("tool_calls") or []
+    ]
+    if not tool_calls:
+        return {"tool_choice": "no tool", "tool_input": message.get("content"), "tool_calls": []}
+    return {"tool_choice": tool_calls[0]["name"], "tool_input": tool_calls[0]["arguments"], "tool_calls": tool_calls}
+
+
+def tool_call_messages(tool_calls, results):
+    """
+    Builds the messages reporting executed tool calls back to the model: the assistant
+    message carrying the calls, then one tool message per result, all in a single turn.
+
+    Parameters:
+    tool_calls (list): The calls, as returned in parse_tool_call_response's "tool_calls".
+    results (list): The text result of each call, in the same order.
+
+    Returns:
+    list: Chat messages to append to the history.
+    """
+    messages = [{
+        "role": "assistant",
+        "content": None,
+        "tool_calls": [
+            {"id": call["id"], "type": "function",
+             "function": {"name": call["name"], "arguments": json.dumps(call["arguments"])}}
+            for call in tool_calls
+        ],
+    }]
+    for call, result in zip(tool_calls, results):
+        messages.append({"role": "tool", "tool_call_id": call["id"], "content": result})
+    return messages
@@ -0,0 +1,322 @@
+import asyncio
+import copy
+import hashlib
+import heapq
+import itertools
+import json
+import threading
+import time
+import weakref
+from concurrent.futures import Future
+from email.utils import parsedate_to_datetime
+
+from tenacity import AsyncRetrying, Retrying, retry_if_exception, stop_after_attempt, wait_random_exponential
+from tenacity.wait import wait_base
+
+from project_utils.rate_limit import TokenBucket
+from project_utils.tracing import get_tracer
+
+# Request priorities, lower runs first when requests wait for rate-limit capacity.
+INTERACTIVE = 0
+BATCH = 10
+
+# HTTP statuses worth retrying: rate limits, timeouts and transient server errors.
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+DEFAULT_MAX_ATTEMPTS = 5
+DEFAULT_BACKOFF_BASE = 0.5
+DEFAULT_BACKOFF_MAX = 30.0
+# A server asking for a longer pause than this is not retried; its error is returned.
+MAX_RETRY_AFTER = 120.0
+
+
+class RetryableError(Exception):
+    """
+    A request attempt failed in a way a later attempt may not (429, 5xx, connection errors).
+    """
+
+    def __init__(self, message, status_code=None, retry_after=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+    def to_dict(self):
+        """
+        Returns:
+        dict: {"error", "status_code", "retry_after"}, the error format of the model clients.
+        """
+        return {"error": f"Error in API call: {self}", "status_code": self.status_code,
+                "retry_after": self.retry_after}
+
+
+def retry_after_seconds(headers):
+    """
+    Reads how long the server asked clients to wait from the `retry-after-ms` or
+    `Retry-After` (seconds or HTTP date) response headers.
+
+    Returns:
+    float or None: Seconds to wait, or None if the server did not say.
+    """
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return max(0.0, float(value) / 1000)
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable(error):
+    """
+    Whether a failed attempt is retried: a RetryableError whose Retry-After, if any, is
+    at most MAX_RETRY_AFTER.
+    """
+    return isinstance(error, RetryableError) and (error.retry_after is None
+                                                   or error.retry_after <= MAX_RETRY_AFTER)
+
+
+def request_key(endpoint, payload):
+    """
+    Identifies a request; concurrent requests with the same key are coalesced.
+    """
+    body = json.dumps(payload, sort_keys=True)
+    return hashlib.sha256(f"{endpoint}\n{body}".encode("utf-8")).hexdigest()
+
+
+def estimate_payload_tokens(payload):
+    """
+    Rough prompt token count of a chat request (about four characters per token), reserved
+    from the tokens-per-minute budget before the actual usage is known.
+    """
+    return sum(len(str(message.get("content") or "")) for message in payload.get("messages", [])) // 4 + 1
+
+
+class wait_retry_after(wait_base):
+    """
+    Waits as long as the failed attempt's Retry-After asked, otherwise falls back to
+    jittered exponential backoff.
+    """
+
+    def __init__(self, fallback):
+        self.fallback = fallback
+
+    def __call__(self, retry_state):
+        error = retry_state.outcome.exception()
+        retry_after = getattr(error, "retry_after", None)
+        if retry_after is not None:
+            return retry_after
+        return self.fallback(retry_state)
+
+
+class RequestScheduler:
+    """
+    Scheduler in front of a model client.
+
+    Every attempt first takes capacity from the requests-per-minute and tokens-per-
+    minute token buckets; callers waiting for capacity are served by priority
+    (INTERACTIVE before BATCH), then in arrival order. Attempts that fail with a
+    RetryableError are retried with jittered exponential backoff that honors the
+    server's Retry-After; one asking for more than MAX_RETRY_AFTER fails right away.
+    Identical requests in flight at the same time share one upstream call.
+    """
+
+    def __init__(self, requests_per_minute=None, tokens_per_minute=None, max_attempts=DEFAULT_MAX_ATTEMPTS,
+                 backoff_base=DEFAULT_BACKOFF_BASE, backoff_max=DEFAULT_BACKOFF_MAX):
+        """
+        Parameters:
+        requests_per_minute (float, optional): Request rate limit.
+        tokens_per_minute (float, optional): Token rate limit, charged with the estimated prompt
+                                             size up front and corrected with the reported usage.
+        max_attempts (int): Attempts per request, including the first.
+        backoff_base (float): Scale of the exponential backoff in seconds.
+        backoff_max (float): Longest backoff between attempts in seconds.
+        """
+        self.request_bucket = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.token_bucket = (TokenBucket(tokens_per_minute, capacity=tokens_per_minute / 6)
+                             if tokens_per_minute else None)
+        self.max_attempts = max_attempts
+        self.wait = wait_retry_after(wait_random_exponential(multiplier=backoff_base, max=backoff_max))
+        self._sequence = itertools.count()
+        self._waiting = []
+        self._condition = threading.Condition()
+        self._in_flight = {}
+        self._in_flight_lock = threading.Lock()
+        # asyncio state belongs to an event loop
+        self._loop_state = weakref.WeakKeyDictionary()
+
+    def _reserve(self, tokens):
+        wait = 0.0
+        if self.request_bucket is not None:
+            wait = max(wait, self.request_bucket.reserve(1))
+        if self.token_bucket is not None and tokens:
+            wait = max(wait, self.token_bucket.reserve(tokens))
+        return wait
+
+    def _limited(self):
+        return self.request_bucket is not None or self.token_bucket is not None
+
+    def acquire(self, priority=INTERACTIVE, tokens=0):
+        """
+        Blocks until the request may be sent. Only the highest-priority waiter takes
+        capacity, so lower-priority requests queue behind it.
+        """
+        if not self._limited():
+            return
+        entry = (priority, next(self._sequence))
+        with self._condition:
+            heapq.heappush(self._waiting, entry)
+            while self._waiting[0] != entry:
+                self._condition.wait()
+        try:
+            wait = self._reserve(tokens)
+            if wait:
+                time.sleep(wait)
+        finally:
+            with self._condition:
+                heapq.heappop(self._waiting)
+                self._condition.notify_all()
+
+    def _state(self):
+        loop = asyncio.get_running_loop()
+        state = self._loop_state.get(loop)
+        if state is None:
+            state = {"waiting": [], "condition": asyncio.Condition(), "in_flight": {}}
+            self._loop_state[loop] = state
+        return state
+
+    async def aacquire(self, priority=INTERACTIVE, tokens=0):
+        """
+        Waits on the event loop until the request may be sent (see acquire).
+        """
+        if not self._limited():
+            return
+        state = self._state()
+        entry = (priority, next(self._sequence))
+        async with state["condition"]:
+            heapq.heappush(state["waiting"], entry)
+            await state["condition"].wait_for(lambda: state["waiting"][0] == entry)
+        try:
+            wait = self._reserve(tokens)
+            if wait:
+                await asyncio.sleep(wait)
+        finally:
+            async with state["condition"]:
+                heapq.heappop(state["waiting"])
+                state["condition"].notify_all()
+
+    def _settle(self, tokens, used):
+        # Replace the up-front estimate with the reported usage
+        if self.token_bucket is not None and used is not None:
+            self.token_bucket.consume(used - tokens)
+
+    @staticmethod
+    def _count_retry(retry_state):
+        get_tracer().count("llm_retries")
+
+    def _execute(self, attempt, priority, tokens):
+        for retry in Retrying(stop=stop_after_attempt(self.max_attempts), wait=self.wait,
+                              retry=retry_if_exception(is_retryable), before_sleep=self._count_retry,
+                              reraise=True):
+            with retry:
+                self.acquire(priority, tokens)
+                result, used = attempt()
+        self._settle(tokens, used)
+        return result
+
+    def run(self, attempt, key=None, priority=INTERACTIVE, tokens=0):
+        """
+        Runs a request through the scheduler.
+
+        Parameters:
+        attempt (callable): Makes one attempt and returns (result, tokens used or None);
+                            raises RetryableError for failures worth retrying.
+        key (str, optional): Request identity (request_key); identical in-flight requests
+                             wait for the first one instead of calling upstream.
+        priority (int): INTERACTIVE, BATCH or any int, lower first.
+        tokens (int): Estimated tokens of the request for the tokens-per-minute limit.
+
+        Returns:
+        The attempt's result.
+
+        Raises:
+        RetryableError: When every attempt failed.
+        """
+        if key is None:
+            return self._execute(attempt, priority, tokens)
+        with self._in_flight_lock:
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = self._in_flight[key] = Future()
+        if not owner:
+            get_tracer().count("llm_coalesced")
+            return copy.deepcopy(future.result())
+        try:
+            result = self._execute(attempt, priority, tokens)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._in_flight_lock:
+                del self._in_flight[key]
+
+    async def _aexecute(self, attempt, priority, tokens):
+        async for retry in AsyncRetrying(stop=stop_after_attempt(self.max_attempts), wait=self.wait,
+                                         retry=retry_if_exception(is_retryable),
+                                         before_sleep=self._count_retry, reraise=True):
+            with retry:
+                await self.aacquire(priority, tokens)
+                result, used = await attempt()
+        self._settle(tokens, used)
+        return result
+
+    async def arun(self, attempt, key=None, priority=INTERACTIVE, tokens=0):
+        """
+        Async version of run; attempt is a coroutine function.
+        """
+        if key is None:
+            return await self._aexecute(attempt, priority, tokens)
+        in_flight = self._state()["in_flight"]
+        future = in_flight.get(key)
+        if future is not None:
+            get_tracer().count("llm_coalesced")
+            return copy.deepcopy(await asyncio.shield(future))
+        future = in_flight[key] = asyncio.get_running_loop().create_future()
+        try:
+            result = await self._aexecute(attempt, priority, tokens)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            # Nobody may be waiting; avoid "exception was never retrieved" warnings
+            future.exception()
+            raise
+        finally:
+            del in_flight[key]
+
+
+_default_scheduler = None
+_default_scheduler_lock = threading.Lock()
+
+
+def get_default_scheduler():
+    """
+    Returns the process-wide scheduler used by model clients created without one: retries
+    and coalescing, no rate limits.
+    """
+    global _default_scheduler
+    with _default_scheduler_lock:
+        if _default_scheduler is None:
+            _default_scheduler = RequestScheduler()
+        return _default_scheduler
@@ -0,0 +1,179 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_MAX_ENTRIES = 1024
+DEFAULT_TTL = 24 * 3600
+DEFAULT_MAX_DISK_ENTRIES = 100_000
+
+
+class ResponseCache:
+    """
+    Exact-match cache for model responses.
+
+    Entries live in a size-bounded in-memory LRU and, when a path is given, in a SQLite
+    file that survives restarts. Every entry carries a TTL and an optional tag (the
+    schema fingerprint for agent prompts) so everything produced against an old schema
+    can be dropped in one call. The file is bounded too: expired rows are deleted when
+    it is opened and on every write, and the oldest rows beyond max_disk_entries go.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL, path=None,
+                 max_disk_entries=DEFAULT_MAX_DISK_ENTRIES):
+        """
+        Parameters:
+        max_entries (int): Maximum number of entries kept in memory.
+        ttl (float, optional): Seconds an entry stays valid. None keeps entries until evicted.
+        path (str, optional): SQLite file for the persistent tier. None keeps the cache in memory only.
+        max_disk_entries (int, optional): Maximum number of rows kept in the file. None means unbounded.
+        """
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.ttl = ttl
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses "
+                "(key TEXT PRIMARY KEY, tag TEXT, value TEXT NOT NULL, expires_at REAL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS responses_tag ON responses (tag)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS responses_expires_at ON responses (expires_at)")
+            self._prune()
+            self._db.commit()
+
+    @staticmethod
+    def make_key(model, system_prompt, prompt, temperature):
+        """
+        Builds the cache key for a request.
+
+        Parameters:
+        model (str): The model name.
+        system_prompt (str): The full system prompt (hashed into the key).
+        prompt (str): The user prompt.
+        temperature (float): Sampling temperature.
+
+        Returns:
+        str: A hex digest identifying the request.
+        """
+        system_hash = hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()
+        raw = json.dumps([model, system_hash, prompt, temperature])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """
+        Returns the cached response for key, or None on a miss.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, tag, value = entry
+                if expires_at is None or expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return json.loads(value)
+                del self._entries[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT tag, value, expires_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    tag, value, expires_at = row
+                    if expires_at is None or expires_at > now:
+                        self._remember(key, (expires_at, tag, value))
+                        self.hits += 1
+                        self.disk_hits += 1
+                        return json.loads(value)
+                    self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._db.commit()
+
+            self.misses += 1
+            return None
+
+    def set(self, key, response, tag=None):
+        """
+        Stores a JSON-serializable response under key.
+
+        Parameters:
+        key (str): Key from make_key.
+        response (dict): The response to cache.
+        tag (str, optional): Group label, e.g. the schema fingerprint the prompt was built from.
+        """
+        value = json.dumps(response)
+        expires_at = time.time() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._remember(key, (expires_at, tag, value))
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses (key, tag, value, expires_at) VALUES (?, ?, ?, ?)",
+                    (key, tag, value, expires_at),
+                )
+                self._prune()
+                self._db.commit()
+
+    def _prune(self):
+        """
+        Deletes expired rows and the oldest rows beyond max_disk_entries from the file.
+        """
+        self._db.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),))
+        if self.max_disk_entries is not None:
+            # INSERT OR REPLACE gives a rewritten key a new rowid, so rowid order is write order
+            self._db.execute(
+                "DELETE FROM responses WHERE rowid IN "
+                "(SELECT rowid FROM responses ORDER BY rowid DESC LIMIT -1 OFFSET ?)",
+                (self.max_disk_entries,),
+            )
+
+    def _remember(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate_tag(self, tag):
+        """
+        Drops every entry stored with the given tag.
+        """
+        with self._lock:
+            for key in [k for k, (_, entry_tag, _) in self._entries.items() if entry_tag == tag]:
+                del self._entries[key]
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses WHERE tag = ?", (tag,))
+                self._db.commit()
+
+    def clear(self):
+        """
+        Drops every entry from both tiers.
+        """
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
+
+    def stats(self):
+        """
+        Returns:
+        dict: Hit and miss counters, the current in-memory size and, with a file, its row count.
+        """
+        with self._lock:
+            stats = {
+                "hits": self.hits,
+                "misses": self.misses,
+                "disk_hits": self.disk_hits,
+                "entries": len(self._entries),
+            }
+            if self._db is not None:
+                stats["disk_entries"] = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            return stats
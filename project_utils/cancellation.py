@@ -0,0 +1,75 @@
+import threading
+
+
+class QueryGovernorError(Exception):
+    """
+    A query was stopped by the governor. `code` is one of "timeout", "cancelled",
+    "max_rows" or "max_bytes".
+    """
+
+    def __init__(self, code, message, limit=None):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+        self.limit = limit
+
+    def to_dict(self):
+        """
+        Returns:
+        dict: {"error": message, "code": code, "limit": limit}, the error format of the SQL tools.
+        """
+        return {"error": self.message, "code": self.code, "limit": self.limit}
+
+
+class CancellationToken:
+    """
+    Cooperative cancellation for a request. Cancelling interrupts the query running
+    under the token (where the driver supports it) and stops further batches from
+    being read.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def cancel(self):
+        """
+        Cancels the request and interrupts the queries currently registered with the token.
+        """
+        # Callbacks run under the lock so a connection cannot be interrupted after its
+        # query has unregistered and returned it to the pool
+        with self._lock:
+            self._event.set()
+            for callback in self._callbacks:
+                try:
+                    callback()
+                except Exception:
+                    pass
+
+    def register(self, callback):
+        """
+        Runs callback on cancel (immediately if already cancelled).
+
+        Returns:
+        callable: Unregisters the callback.
+        """
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return lambda: self._unregister(callback)
+        callback()
+        return lambda: None
+
+    def _unregister(self, callback):
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def raise_if_cancelled(self):
+        if self.cancelled:
+            raise QueryGovernorError("cancelled", "The query was cancelled.")
@@ -0,0 +1,115 @@
+import asyncio
+import functools
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_BLOCKING_WORKERS = 32
+DEFAULT_DB_CONCURRENCY = 8
+DEFAULT_MODEL_CONCURRENCY = 64
+DEFAULT_TOOL_WORKERS = 16
+
+_executor = None
+_tool_executor = None
+_executor_lock = threading.Lock()
+
+# Thread-side counterpart of the per-loop semaphores below, keyed by resource.
+_thread_limiters = {}
+
+# Semaphores belong to an event loop, so they are kept per loop and keyed by resource
+# (a model endpoint URL, a database connection string, ...).
+_limiters = weakref.WeakKeyDictionary()
+
+
+def get_blocking_executor():
+    """
+    Returns the process-wide bounded thread pool used for blocking work such as
+    SQLAlchemy calls from async code.
+
+    Returns:
+    ThreadPoolExecutor: The shared executor.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=DEFAULT_BLOCKING_WORKERS, thread_name_prefix="agent-blocking")
+        return _executor
+
+
+def get_tool_executor():
+    """
+    Returns the process-wide thread pool running the independent tool calls of one agent
+    step in parallel. It is separate from the blocking executor so an agent loop that
+    itself runs on the blocking executor cannot starve its own tool calls.
+
+    Returns:
+    ThreadPoolExecutor: The shared executor.
+    """
+    global _tool_executor
+    with _executor_lock:
+        if _tool_executor is None:
+            _tool_executor = ThreadPoolExecutor(max_workers=DEFAULT_TOOL_WORKERS, thread_name_prefix="agent-tools")
+        return _tool_executor
+
+
+def get_thread_limiter(key, limit):
+    """
+    Returns the semaphore bounding concurrent use of a resource from threads.
+
+    The first caller for a key fixes its limit; later callers share that semaphore.
+
+    Parameters:
+    key (str): Resource identifier, e.g. a database connection string.
+    limit (int): Maximum number of concurrent holders.
+
+    Returns:
+    threading.BoundedSemaphore: The semaphore for this key.
+    """
+    with _executor_lock:
+        limiter = _thread_limiters.get(key)
+        if limiter is None:
+            limiter = threading.BoundedSemaphore(limit)
+            _thread_limiters[key] = limiter
+        return limiter
+
+
+def get_limiter(key, limit):
+    """
+    Returns the semaphore bounding concurrent use of a resource on the running loop.
+
+    The first caller for a key fixes its limit; later callers share that semaphore.
+
+    Parameters:
+    key (str): Resource identifier, e.g. a model endpoint or connection string.
+    limit (int): Maximum number of concurrent holders.
+
+    Returns:
+    asyncio.Semaphore: The semaphore for this key on the current event loop.
+    """
+    loop = asyncio.get_running_loop()
+    loop_limiters = _limiters.setdefault(loop, {})
+    limiter = loop_limiters.get(key)
+    if limiter is None:
+        limiter = asyncio.Semaphore(limit)
+        loop_limiters[key] = limiter
+    return limiter
+
+
+async def run_blocking(func, *args, limit_key=None, limit=DEFAULT_DB_CONCURRENCY, **kwargs):
+    """
+    Runs a blocking callable on the shared thread pool without blocking the event loop.
+
+    Parameters:
+    func (callable): The blocking function to run.
+    limit_key (str, optional): If given, at most `limit` calls with this key run at once.
+    limit (int, optional): Concurrency bound for limit_key.
+
+    Returns:
+    The return value of func.
+    """
+    loop = asyncio.get_running_loop()
+    call = functools.partial(func, *args, **kwargs)
+    if limit_key is None:
+        return await loop.run_in_executor(get_blocking_executor(), call)
+    async with get_limiter(limit_key, limit):
+        return await loop.run_in_executor(get_blocking_executor(), call)
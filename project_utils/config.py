@@ -0,0 +1,86 @@
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Read when no path is given; $AGENT_CONFIG points elsewhere.
+DEFAULT_CONFIG_PATH = os.path.join(os.path.dirname(__file__), '..', 'configs', 'config.yaml')
+CONFIG_PATH_ENV = "AGENT_CONFIG"
+
+
+class Config:
+    """
+    Settings such as OPENAI_API_KEY, read from the environment first and then from an
+    optional YAML file.
+
+    The file is read once, the first time a setting is asked for, and a missing file
+    just means every setting comes from the environment. Nothing is written to
+    os.environ.
+    """
+
+    def __init__(self, path=None):
+        """
+        Parameters:
+        path (str, optional): YAML file of settings. Defaults to $AGENT_CONFIG or
+                              configs/config.yaml.
+        """
+        self.path = path or os.getenv(CONFIG_PATH_ENV) or DEFAULT_CONFIG_PATH
+        self._values = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with self._lock:
+            if self._values is None:
+                self._values = self._read_file()
+            return self._values
+
+    def _read_file(self):
+        if not os.path.exists(self.path):
+            return {}
+        # Only needed when there is a file to read
+        import yaml
+        try:
+            with open(self.path, 'r') as file:
+                values = yaml.safe_load(file) or {}
+        except (OSError, yaml.YAMLError) as e:
+            logger.warning("Could not read config file %s: %s", self.path, e)
+            return {}
+        if not isinstance(values, dict):
+            logger.warning("Config file %s is not a mapping; ignoring it", self.path)
+            return {}
+        return values
+
+    def get(self, key, default=None):
+        """
+        Returns a setting: the environment variable if set, else the file's value, else default.
+        """
+        value = os.getenv(key)
+        if value:
+            return value
+        value = self._load().get(key)
+        return default if value is None else str(value)
+
+
+_config = None
+_config_lock = threading.Lock()
+
+
+def get_config():
+    """
+    Returns the process-wide Config, created on first use.
+    """
+    global _config
+    with _config_lock:
+        if _config is None:
+            _config = Config()
+        return _config
+
+
+def set_config(config):
+    """
+    Replaces the process-wide Config, e.g. with Config(path) for another settings file.
+    """
+    global _config
+    with _config_lock:
+        _config = config
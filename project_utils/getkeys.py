@@ -1,8 +0,0 @@
-import os
-import yaml 
-
-def getkeys(file_path):
-    with open(file_path, 'r') as file:
-        config = yaml.safe_load(file)
-        for key, value in config.items():
-            os.environ[key] = value
\ No newline at end of file
@@ -0,0 +1,108 @@
+import json
+import re
+
+_TOOL_CHOICE_RE = re.compile(r'"tool_choice"\s*:\s*"((?:[^"\\]|\\.)*)"')
+_TOOL_INPUT_RE = re.compile(r'"tool_input"\s*:\s*(\S)')
+_SIMPLE_ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+
+
+class ToolResponseStreamParser:
+    """
+    Incremental parser for the {"tool_choice": ..., "tool_input": ...} object the agent
+    prompt asks the model for.
+
+    Feed it the content deltas of a streamed completion. tool_choice becomes available
+    as soon as its value is complete, and a string tool_input is decoded as it arrives,
+    so callers can act on the tool and render direct answers before the object is done.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.tool_choice = None
+        # Decoded text of a string tool_input received so far
+        self.tool_input_text = ""
+        self.tool_input_done = False
+        self._input_pos = None
+        self._input_is_string = None
+
+    def feed(self, chunk):
+        """
+        Adds a content delta.
+
+        Parameters:
+        chunk (str): The next piece of the model output.
+
+        Returns:
+        str: Newly decoded tool_input text (empty if none, or if tool_input is not a string).
+        """
+        self.buffer += chunk
+
+        if self.tool_choice is None:
+            match = _TOOL_CHOICE_RE.search(self.buffer)
+            if match:
+                self.tool_choice = json.loads(f'"{match.group(1)}"')
+
+        if self._input_is_string is None:
+            match = _TOOL_INPUT_RE.search(self.buffer)
+            if match:
+                self._input_is_string = match.group(1) == '"'
+                self._input_pos = match.end()
+
+        if not self._input_is_string or self.tool_input_done:
+            return ""
+        text = self._decode_string()
+        self.tool_input_text += text
+        return text
+
+    def _decode_string(self):
+        """
+        Decodes the string value of tool_input from the last position up to the end of
+        the buffer, stopping before an escape sequence that is still incomplete.
+        """
+        buffer, pos, out = self.buffer, self._input_pos, []
+        while pos < len(buffer):
+            char = buffer[pos]
+            if char == '"':
+                self.tool_input_done = True
+                pos += 1
+                break
+            if char != '\\':
+                out.append(char)
+                pos += 1
+                continue
+            if pos + 1 >= len(buffer):
+                break
+            escape = buffer[pos + 1]
+            if escape != 'u':
+                out.append(_SIMPLE_ESCAPES.get(escape, escape))
+                pos += 2
+                continue
+            if pos + 6 > len(buffer):
+                break
+            code = int(buffer[pos + 2:pos + 6], 16)
+            if 0xD800 <= code < 0xDC00:
+                # High surrogate, wait for its low half
+                if pos + 12 > len(buffer):
+                    break
+                out.append(json.loads(f'"{buffer[pos:pos + 12]}"'))
+                pos += 12
+            else:
+                out.append(chr(code))
+                pos += 6
+        self._input_pos = pos
+        return "".join(out)
+
+    def result(self):
+        """
+        Parses the complete buffer.
+
+        Returns:
+        dict: The decoded response object.
+
+        Raises:
+        ValueError: If the buffer is not a JSON object.
+        """
+        response = json.loads(self.buffer)
+        if not isinstance(response, dict):
+            raise ValueError(f"Expected a JSON object, got {type(response).__name__}")
+        return response
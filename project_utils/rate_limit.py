@@ -0,0 +1,73 @@
+import asyncio
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Token-bucket rate limiter usable from threads and from asyncio code.
+
+    The bucket refills continuously at `rate_per_minute` and holds at most `capacity`
+    tokens, so short bursts up to capacity are allowed while the long-run rate stays
+    bounded.
+    """
+
+    def __init__(self, rate_per_minute, capacity=None):
+        """
+        Parameters:
+        rate_per_minute (float): Tokens added per minute.
+        capacity (float, optional): Maximum burst size. Defaults to one second's worth
+                                    of tokens, at least 1.
+        """
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else max(1.0, self.rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, tokens=1):
+        """
+        Takes tokens from the bucket, going into debt if there are not enough.
+
+        Parameters:
+        tokens (float): Number of tokens to take.
+
+        Returns:
+        float: Seconds the caller should wait before proceeding (0 if none).
+        """
+        with self._lock:
+            self._refill()
+            self._tokens -= tokens
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def consume(self, tokens):
+        """
+        Removes tokens that were spent after the fact (e.g. actual token usage reported
+        by an API) without waiting. A negative amount refunds an over-estimate, up to capacity.
+        """
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.capacity, self._tokens - tokens)
+
+    def acquire(self, tokens=1):
+        """
+        Blocks the calling thread until the tokens are available.
+        """
+        wait = self.reserve(tokens)
+        if wait:
+            time.sleep(wait)
+
+    async def aacquire(self, tokens=1):
+        """
+        Waits on the event loop until the tokens are available.
+        """
+        wait = self.reserve(tokens)
+        if wait:
+            await asyncio.sleep(wait)
@@ -0,0 +1,245 @@
+import json
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+# Stage names used across the agent, model and SQL tools.
+PROMPT_BUILD = "prompt_build"
+SCHEMA_REFLECTION = "schema_reflection"
+LLM_CALL = "llm_call"
+VALIDATION = "validation"
+EXECUTION = "execution"
+FORMATTING = "formatting"
+AGENT_WORK = "agent_work"
+AGENT_STEP = "agent_step"
+TOOL_CALL = "tool_call"
+
+
+class Span:
+    """
+    A timed stage. Attributes can be added while the span is open.
+    """
+
+    __slots__ = ("name", "attributes", "start", "duration_ms", "error")
+
+    def __init__(self, name, attributes):
+        self.name = name
+        self.attributes = attributes
+        self.start = time.time()
+        self.duration_ms = None
+        self.error = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def to_dict(self):
+        return {
+            "type": "span",
+            "name": self.name,
+            "start": self.start,
+            "duration_ms": self.duration_ms,
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def set(self, **attributes):
+        pass
+
+
+class _NoopSpanContext:
+    __slots__ = ()
+
+    def __enter__(self):
+        return _NOOP_SPAN
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+_NOOP_SPAN_CONTEXT = _NoopSpanContext()
+
+
+class NoopTracer:
+    """
+    Default tracer: every call is a constant-time no-op.
+    """
+
+    enabled = False
+
+    def span(self, name, **attributes):
+        return _NOOP_SPAN_CONTEXT
+
+    def count(self, name, value=1, **labels):
+        pass
+
+
+class Tracer:
+    """
+    Records timed spans and counters and hands them to the configured exporters.
+    """
+
+    enabled = True
+
+    def __init__(self, exporters):
+        """
+        Parameters:
+        exporters (list): Objects with an export(record) method, e.g. InMemoryExporter,
+                          JsonlExporter or PrometheusExporter.
+        """
+        self.exporters = list(exporters)
+
+    def _export(self, record):
+        for exporter in self.exporters:
+            exporter.export(record)
+
+    @contextmanager
+    def span(self, name, **attributes):
+        """
+        Times the enclosed block as a span.
+
+        Parameters:
+        name (str): The stage name.
+        **attributes: Initial span attributes.
+
+        Yields:
+        Span: The open span, for adding attributes such as row counts.
+        """
+        span = Span(name, attributes)
+        start = time.perf_counter()
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span.duration_ms = (time.perf_counter() - start) * 1000
+            self._export(span.to_dict())
+
+    def count(self, name, value=1, **labels):
+        """
+        Adds value to a counter, e.g. token usage or rows returned.
+        """
+        self._export({"type": "counter", "name": name, "value": value, "labels": labels, "time": time.time()})
+
+
+class InMemoryExporter:
+    """
+    Keeps the most recent records in memory, mainly for tests and notebooks.
+    """
+
+    def __init__(self, max_records=10_000):
+        self.records = deque(maxlen=max_records)
+
+    def export(self, record):
+        self.records.append(record)
+
+    def spans(self, name=None):
+        return [r for r in self.records if r["type"] == "span" and (name is None or r["name"] == name)]
+
+    def counters(self):
+        totals = defaultdict(float)
+        for record in self.records:
+            if record["type"] == "counter":
+                totals[record["name"]] += record["value"]
+        return dict(totals)
+
+
+class JsonlExporter:
+    """
+    Appends every record as one JSON line to a file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "a", buffering=1)
+
+    def export(self, record):
+        line = json.dumps(record, default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class PrometheusExporter:
+    """
+    Aggregates records into Prometheus metrics, rendered in the text exposition format.
+
+    Spans become `<namespace>_stage_duration_seconds` summaries (count and sum per stage),
+    counters become `<namespace>_<name>_total`.
+    """
+
+    def __init__(self, namespace="use_tools"):
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self._durations = defaultdict(lambda: [0, 0.0])
+        self._errors = defaultdict(int)
+        self._counters = defaultdict(float)
+
+    def export(self, record):
+        with self._lock:
+            if record["type"] == "span":
+                stats = self._durations[record["name"]]
+                stats[0] += 1
+                stats[1] += record["duration_ms"] / 1000
+                if record["error"]:
+                    self._errors[record["name"]] += 1
+            else:
+                labels = tuple(sorted(record["labels"].items()))
+                self._counters[(record["name"], labels)] += record["value"]
+
+    @staticmethod
+    def _labels(pairs):
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{key}="{value}"' for key, value in pairs) + "}"
+
+    def render(self):
+        """
+        Returns:
+        str: The current metrics in Prometheus text format.
+        """
+        ns = self.namespace
+        lines = []
+        with self._lock:
+            lines.append(f"# TYPE {ns}_stage_duration_seconds summary")
+            for stage, (count, total) in sorted(self._durations.items()):
+                lines.append(f'{ns}_stage_duration_seconds_count{{stage="{stage}"}} {count}')
+                lines.append(f'{ns}_stage_duration_seconds_sum{{stage="{stage}"}} {total:.6f}')
+            lines.append(f"# TYPE {ns}_stage_errors_total counter")
+            for stage, count in sorted(self._errors.items()):
+                lines.append(f'{ns}_stage_errors_total{{stage="{stage}"}} {count}')
+            for name in sorted({name for name, _ in self._counters}):
+                lines.append(f"# TYPE {ns}_{name}_total counter")
+                for (counter, labels), value in sorted(self._counters.items()):
+                    if counter == name:
+                        lines.append(f"{ns}_{name}_total{self._labels(labels)} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+_tracer = NoopTracer()
+
+
+def get_tracer():
+    """
+    Returns:
+    Tracer or NoopTracer: The process-wide tracer.
+    """
+    return _tracer
+
+
+def set_tracer(tracer):
+    """
+    Installs the process-wide tracer. Pass None to go back to the no-op default.
+    """
+    global _tracer
+    _tracer = tracer if tracer is not None else NoopTracer()
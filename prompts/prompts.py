@@ -17,7 +17,19 @@ Here is a list of your tools along with their descriptions:
 Database Schema
 For database-related queries, refer to the schema provided:
 {schema_info}
-
+{examples}
 Please make a decision based on the provided user query and the available tools.
 
-"""
\ No newline at end of file
+"""
+
+# Used with native function calling: the tools are sent as JSON-schema definitions
+# alongside the request, so they are not described in the prompt.
+agent_native_tools_prompt_template = """
+You are an agent with access to a toolbox of functions. Given a user query, 
+call the function best suited to answer it, or answer directly if no function is needed.
+
+Database Schema
+For database-related queries, refer to the schema provided:
+{schema_info}
+{examples}
+"""
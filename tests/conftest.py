@@ -0,0 +1,45 @@
+import os
+import sqlite3
+import sys
+
+import pytest
+
+# Add project root to sys.path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from benchmarks.mock_server import MockChatServer
+
+
+@pytest.fixture
+def mock_server(monkeypatch):
+    """
+    Starts MockChatServer instances and points the model clients at the last one
+    started. Call it with the MockChatServer arguments, e.g. mock_server(responses=[...]).
+    """
+    servers = []
+
+    def start(**options):
+        server = MockChatServer(**options).start()
+        servers.append(server)
+        monkeypatch.setenv("OPENAI_BASE_URL", server.base_url)
+        monkeypatch.setenv("OPENAI_API_KEY", "test")
+        return server
+
+    yield start
+    for server in servers:
+        server.stop()
+
+
+@pytest.fixture
+def sales_db(tmp_path):
+    """
+    Path of a small SQLite database with a `sales` table of 100 rows.
+    """
+    path = tmp_path / "sales.db"
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE sales (id INTEGER PRIMARY KEY, region TEXT, price REAL, cost REAL)")
+        conn.executemany("INSERT INTO sales VALUES (?, ?, ?, ?)",
+                         [(i, "north" if i % 2 else "south", i * 2.0, float(i)) for i in range(1, 101)])
+    conn.close()
+    return str(path)
@@ -0,0 +1,32 @@
+import pytest
+
+from agents.agents import Agent
+from models.openai_models import OpenAIModel
+
+QUERY = {"tool_choice": "execute_query", "tool_input": "SELECT price, cost FROM sales"}
+MARGIN = {"tool_choice": "batch_Calculator", "tool_input": {"expression": "(price - cost) / price"}}
+
+
+@pytest.fixture
+def agent(mock_server, sales_db):
+    mock_server(responses=lambda prompt, payload: MARGIN if "margin" in prompt else QUERY)
+    return Agent(tools=["execute_query", "batch_Calculator"], model_service=OpenAIModel, model_name="m",
+                 connection_string=f"sqlite:///{sales_db}")
+
+
+def test_calculator_follows_up_on_the_sessions_query(agent):
+    agent.work("show price and cost", session_id="a")
+    result = agent.work("margin per row", session_id="a")
+    assert result["rows"] == 100
+    assert result["mean"] == pytest.approx(0.5)
+
+
+def test_sessions_do_not_see_each_others_results(agent):
+    agent.work("show price and cost", session_id="a")
+    result = agent.work("margin per row", session_id="b")
+    assert "error" in result
+
+
+def test_without_a_session_the_agents_last_query_is_used(agent):
+    agent.work("show price and cost")
+    assert agent.work("margin per row")["rows"] == 100
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from tools.batch_Calculator import batch_Calculator, compile_expression, evaluate
+
+
+def test_expression_over_columns():
+    result = evaluate("(price - cost) / price", {"price": [10, 20], "cost": [5, 15]})
+    assert np.allclose(result, [0.5, 0.25])
+
+
+@pytest.mark.parametrize("expression", [
+    "__import__('os').system('true')",
+    "price.__class__",
+    "[x for x in price]",
+    "lambda: 1",
+])
+def test_unsafe_expressions_are_rejected(expression):
+    with pytest.raises(ValueError):
+        compile_expression(expression)
+
+
+def test_division_by_zero_is_counted_as_invalid():
+    result = batch_Calculator("a / b", {"a": [1, 2, 3], "b": [1, 0, 3]})
+    assert result["values"] == [1.0, None, 1.0]
+    assert result["invalid"] == 1
+
+
+def test_unknown_names_are_reported():
+    assert "error" in batch_Calculator("price * 2", {})
+
+
+def test_queries_must_be_read_only(sales_db):
+    from sqlalchemy import create_engine
+
+    engine = create_engine(f"sqlite:///{sales_db}")
+    result = batch_Calculator("price - cost", query="DROP TABLE sales", engine=engine)
+    assert result["error"].startswith("Invalid SQL query")
+    assert batch_Calculator("price - cost", last_query="DELETE FROM sales", engine=engine)["error"]
+    assert batch_Calculator("price - cost", query="SELECT price, cost FROM sales", engine=engine)["rows"] == 100
+
+
+def big_table(tmp_path, rows=5000):
+    import sqlite3
+
+    from sqlalchemy import create_engine
+
+    path = tmp_path / "big.db"
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE items (price REAL, cost REAL, name TEXT)")
+        conn.executemany("INSERT INTO items VALUES (?, ?, ?)", [(i + 3.0, float(i), f"item {i}") for i in range(rows)])
+    conn.close()
+    return create_engine(f"sqlite:///{path}")
+
+
+def test_query_columns_are_read_past_the_exploratory_limit(tmp_path):
+    from tools.result_cache import get_result_cache
+
+    engine = big_table(tmp_path)
+    query = "SELECT price, cost, name FROM items"
+    result = batch_Calculator("price - cost", query=query, engine=engine)
+    assert (result["rows"], result["sum"], result["complete"]) == (5000, 15000.0, True)
+    batch_Calculator("price - cost", query=query, engine=engine)
+    assert get_result_cache(engine).stats()["hits"] == 1
+
+
+def test_row_limit_marks_the_result_incomplete(tmp_path):
+    from tools.query_governor import QueryLimits, set_query_limits
+
+    engine = big_table(tmp_path)
+    set_query_limits(engine, QueryLimits(max_rows=100))
+    result = batch_Calculator("price - cost", query="SELECT price, cost FROM items", engine=engine)
+    assert (result["rows"], result["complete"]) == (100, False)
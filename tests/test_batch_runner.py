@@ -0,0 +1,74 @@
+import asyncio
+import json
+
+from agents.agents import Agent
+from agents.batch_runner import BatchRunner, read_questions
+from models.openai_models import OpenAIModel
+
+
+def write_questions(path, questions):
+    with open(path, "w") as f:
+        for i, question in enumerate(questions):
+            f.write(json.dumps({"id": i, "question": question}) + "\n")
+    return str(path)
+
+
+def read_records(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_resume_after_a_partial_last_line(mock_server, tmp_path):
+    mock_server(responses={"tool_choice": "no tool", "tool_input": "answer"})
+    questions = write_questions(tmp_path / "q.jsonl", [f"question {i}" for i in range(4)])
+    output = tmp_path / "out.jsonl"
+    with open(output, "w") as f:
+        f.write(json.dumps({"id": "0", "response": "answer"}) + "\n")
+        f.write('{"id": "1", "resp')
+
+    agent = Agent(tools=[], model_service=OpenAIModel, model_name="m")
+    stats = BatchRunner(agent, concurrency=2).run(read_questions(questions), str(output))
+
+    records = read_records(output)
+    assert stats["skipped"] == 1 and stats["completed"] == 3
+    assert sorted(record["id"] for record in records) == ["0", "1", "2", "3"]
+
+
+class _HangingAgent:
+    def get_async_model(self):
+        return None
+
+    async def awork(self, question):
+        await asyncio.Event().wait()
+
+
+def test_cancelled_question_releases_duplicates():
+    runner = BatchRunner(_HangingAgent())
+
+    async def main():
+        first = asyncio.create_task(runner._answer("same question"))
+        await asyncio.sleep(0)
+        duplicate = asyncio.create_task(runner._answer("Same  question"))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await asyncio.wait_for(duplicate, timeout=1)
+
+    response, error, deduplicated = asyncio.run(main())
+    assert response is None and error and deduplicated
+    assert runner._in_flight == {}
+
+
+def test_resume_retries_failed_questions(mock_server, tmp_path):
+    server = mock_server(responses={"tool_choice": "no tool", "tool_input": "answer"})
+    questions = write_questions(tmp_path / "q.jsonl", ["question 0", "question 1"])
+    output = tmp_path / "out.jsonl"
+    with open(output, "w") as f:
+        f.write(json.dumps({"id": "0", "response": "answer", "error": None}) + "\n")
+        f.write(json.dumps({"id": "1", "response": None, "error": "Error in API call: HTTP 429"}) + "\n")
+
+    agent = Agent(tools=[], model_service=OpenAIModel, model_name="m")
+    stats = BatchRunner(agent).run(read_questions(questions), str(output))
+
+    assert stats["skipped"] == 1 and stats["completed"] == 1
+    assert server.request_count == 1
+    assert read_records(output)[-1]["id"] == "1" and read_records(output)[-1]["error"] is None
@@ -0,0 +1,30 @@
+from agents.conversation import ConversationMemory, SessionStore
+
+
+def test_history_stays_within_budget():
+    memory = ConversationMemory(token_budget=300)
+    for turn in range(30):
+        memory.add_turn(f"question number {turn} about sales in the north region",
+                        {"tool_choice": "execute_query", "tool_input": f"SELECT SUM(price) FROM sales WHERE id > {turn}"},
+                        f"total is {turn * 100}")
+    stats = memory.stats()
+    assert stats["turns"] == 30
+    assert stats["history_tokens"] <= 300
+    assert all(entry["history_tokens"] <= 300 for entry in stats["token_log"])
+    assert stats["summarized_turns"] + stats["dropped_turns"] > 0
+
+
+def test_context_keeps_recent_turns_verbatim():
+    memory = ConversationMemory(token_budget=2000)
+    memory.add_turn("reverse abc", {"tool_choice": "reverse_string", "tool_input": "abc"}, "cba")
+    roles = [message["role"] for message in memory.context()]
+    assert roles == ["user", "assistant", "user"]
+
+
+def test_session_store_is_bounded():
+    store = SessionStore(max_sessions=2)
+    first = store.get("a")
+    store.get("b")
+    store.get("c")
+    assert len(store) == 2
+    assert store.get("a") is not first
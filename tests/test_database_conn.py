@@ -0,0 +1,43 @@
+import os
+
+from tools import database_conn
+from tools.database_conn import WAL_SQLITE_PRAGMAS, create_db_connection, dispose_engine
+from tools.sql_database_toolkit import execute_query
+
+
+def test_sqlite_files_are_left_in_their_journal_mode(sales_db):
+    engine = create_db_connection(f"sqlite:///{sales_db}")
+    execute_query(engine, "SELECT COUNT(*) FROM sales")
+    assert not os.path.exists(f"{sales_db}-wal")
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "delete"
+        # FULL (2), the SQLite default for rollback journals
+        assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == 2
+    dispose_engine(f"sqlite:///{sales_db}")
+
+
+def test_wal_is_opt_in(sales_db):
+    engine = create_db_connection(f"sqlite:///{sales_db}", sqlite_pragmas=WAL_SQLITE_PRAGMAS)
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+        assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == 1
+    dispose_engine(f"sqlite:///{sales_db}")
+
+
+def test_engines_are_shared_and_disposed_per_url(sales_db):
+    url = f"sqlite:///{sales_db}"
+    engine = create_db_connection(url)
+    assert create_db_connection(url) is engine
+    assert dispose_engine(url) == 1
+    assert create_db_connection(url) is not engine
+    dispose_engine(url)
+
+
+def test_least_recently_used_engines_are_evicted(tmp_path, monkeypatch):
+    monkeypatch.setattr(database_conn, "MAX_ENGINES", 2)
+    urls = [f"sqlite:///{tmp_path / f'{i}.db'}" for i in range(3)]
+    engines = [create_db_connection(url) for url in urls]
+    assert create_db_connection(urls[0]) is not engines[0]
+    assert create_db_connection(urls[2]) is engines[2]
+    for url in urls:
+        dispose_engine(url)
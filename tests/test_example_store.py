@@ -0,0 +1,41 @@
+import pytest
+
+from agents.example_store import ExampleStore
+
+COUNT_SQL = "SELECT COUNT(*) FROM customers WHERE state = 'TX'"
+
+
+@pytest.fixture
+def store():
+    store = ExampleStore()
+    store.add("How many customers are in Texas?", COUNT_SQL, "schema")
+    return store
+
+
+def test_repeated_question_reuses_sql(store):
+    assert store.reusable_sql("how many customers are in Texas", "schema") == COUNT_SQL
+
+
+@pytest.mark.parametrize("question", [
+    "Which customers are in Texas?",
+    "List all customers in Texas",
+    "Show me the customers in Texas",
+])
+def test_listing_questions_do_not_reuse_a_count(store, question):
+    assert store.reusable_sql(question, "schema") is None
+
+
+def test_other_literals_or_schema_do_not_reuse(store):
+    store.add("Total sales in 2015", "SELECT SUM(amount) FROM sales WHERE year = 2015", "schema")
+    assert store.reusable_sql("Total sales in 2016", "schema") is None
+    assert store.reusable_sql("How many customers are in Texas?", "other") is None
+
+
+def test_similar_questions_are_few_shot_examples(store):
+    assert COUNT_SQL in store.few_shot("Which customers are in Texas?", "schema")
+
+
+def test_examples_persist(tmp_path):
+    path = str(tmp_path / "examples.db")
+    ExampleStore(path=path).add("How many customers are in Texas?", COUNT_SQL, "schema")
+    assert ExampleStore(path=path).reusable_sql("How many customers are in Texas?", "schema") == COUNT_SQL
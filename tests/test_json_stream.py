@@ -0,0 +1,64 @@
+import json
+
+import pytest
+
+from agents.agents import Agent
+from models.openai_models import OpenAIModel
+from project_utils.json_stream import ToolResponseStreamParser
+
+
+def feed_in_pieces(text, size):
+    parser = ToolResponseStreamParser()
+    pieces = [parser.feed(text[i:i + size]) for i in range(0, len(text), size)]
+    return parser, pieces
+
+
+@pytest.mark.parametrize("size", [1, 3, 7, 1000])
+def test_direct_answer_is_decoded_as_it_arrives(size):
+    answer = 'Line one\nsays "hi" é \U0001F600 \\ done'
+    text = json.dumps({"tool_choice": "no tool", "tool_input": answer})
+    parser, pieces = feed_in_pieces(text, size)
+    assert parser.tool_choice == "no tool"
+    assert "".join(pieces) == answer == parser.tool_input_text
+    assert parser.tool_input_done
+    assert parser.result()["tool_input"] == answer
+
+
+def test_tool_choice_is_known_before_the_input():
+    parser = ToolResponseStreamParser()
+    parser.feed('{"tool_choice": "execute_query", "tool_in')
+    assert parser.tool_choice == "execute_query"
+    assert parser.feed('put": {"query": "SELECT 1"}}') == ""
+    assert parser.result()["tool_input"] == {"query": "SELECT 1"}
+
+
+@pytest.mark.parametrize("text", ["Sure, the answer is 4", '"just a string"', '{"tool_choice": "no tool"'])
+def test_result_rejects_anything_but_an_object(text):
+    parser = ToolResponseStreamParser()
+    parser.feed(text)
+    with pytest.raises(ValueError):
+        parser.result()
+
+
+class _ProseModel:
+    """Streams prose instead of the JSON object the prompt asks for."""
+
+    def __init__(self, **kwargs):
+        pass
+
+    def stream_text(self, prompt, system_prompt=None, context=None):
+        yield from ["Sure, ", "the answer is 4"]
+
+
+def test_stream_work_reports_unparsable_output():
+    agent = Agent(tools=[], model_service=_ProseModel, model_name="m")
+    response = "".join(agent.stream_work("what is 2 + 2?"))
+    assert "Error parsing API response" in response
+
+
+def test_stream_work_streams_direct_answers(mock_server):
+    mock_server(responses={"tool_choice": "no tool", "tool_input": "Paris is the capital."}, stream_chunk_size=4)
+    agent = Agent(tools=[], model_service=OpenAIModel, model_name="m")
+    pieces = list(agent.stream_work("capital of France?"))
+    assert len(pieces) > 1
+    assert "".join(pieces) == "Paris is the capital."
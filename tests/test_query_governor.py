@@ -0,0 +1,107 @@
+import threading
+
+import pytest
+from sqlalchemy import create_engine
+
+from agents.agents import Agent
+from models.openai_models import OpenAIModel
+from project_utils.cancellation import CancellationToken, QueryGovernorError
+from tools.query_governor import QueryLimits, governed_read, inject_limit
+
+
+@pytest.mark.parametrize("native_tools", [False, True])
+def test_agent_honors_max_rows(mock_server, sales_db, native_tools):
+    mock_server(responses={"tool_choice": "execute_query",
+                           "tool_input": {"query": "SELECT price FROM sales", "max_rows": 10}})
+    agent = Agent(tools=["execute_query"], model_service=OpenAIModel, model_name="m",
+                  connection_string=f"sqlite:///{sales_db}", native_tools=native_tools)
+    assert "more than 10 rows" in str(agent.work("show prices"))
+
+
+def test_agent_rejects_invalid_max_rows(mock_server, sales_db):
+    mock_server(responses={"tool_choice": "execute_query",
+                           "tool_input": {"query": "SELECT price FROM sales", "max_rows": "all"}})
+    agent = Agent(tools=["execute_query"], model_service=OpenAIModel, model_name="m",
+                  connection_string=f"sqlite:///{sales_db}")
+    assert agent.work("show prices").startswith("Invalid max_rows")
+
+
+ENDLESS = "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c) SELECT count(*) FROM c"
+
+
+@pytest.fixture
+def engine(sales_db):
+    engine = create_engine(f"sqlite:///{sales_db}")
+    yield engine
+    engine.dispose()
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("SELECT * FROM sales;", "SELECT * FROM sales LIMIT 50"),
+    ("WITH t AS (SELECT 1) SELECT * FROM t", "WITH t AS (SELECT 1) SELECT * FROM t LIMIT 50"),
+    ("SELECT * FROM (SELECT * FROM sales LIMIT 5) s", "SELECT * FROM (SELECT * FROM sales LIMIT 5) s LIMIT 50"),
+    ("SELECT * FROM sales LIMIT 5", "SELECT * FROM sales LIMIT 5"),
+    ("SELECT * FROM sales FETCH FIRST 5 ROWS ONLY", "SELECT * FROM sales FETCH FIRST 5 ROWS ONLY"),
+    ("SELECT 'no limit here' AS note", "SELECT 'no limit here' AS note LIMIT 50"),
+    ("SELECT 'LIMIT' AS word", "SELECT 'LIMIT' AS word LIMIT 50"),
+    ("PRAGMA table_info(sales)", "PRAGMA table_info(sales)"),
+])
+def test_inject_limit_adds_a_limit_to_exploratory_selects(query, expected):
+    assert inject_limit(query, 50, "sqlite") == expected
+
+
+def test_inject_limit_leaves_other_dialects_and_disabled_limits_alone():
+    assert inject_limit("SELECT * FROM sales", 50, "mssql") == "SELECT * FROM sales"
+    assert inject_limit("SELECT * FROM sales", None, "sqlite") == "SELECT * FROM sales"
+
+
+def test_exploratory_limit_bounds_unlimited_selects(engine):
+    data, _ = governed_read(engine, "SELECT * FROM sales", limits=QueryLimits(exploratory_limit=10))
+    assert len(data) == 10
+
+
+def test_timeout_interrupts_a_running_query(engine):
+    with pytest.raises(QueryGovernorError) as error:
+        governed_read(engine, ENDLESS, limits=QueryLimits(timeout=0.2))
+    assert error.value.code == "timeout"
+
+
+def test_cancelling_the_token_interrupts_a_running_query(engine):
+    token = CancellationToken()
+    threading.Timer(0.2, token.cancel).start()
+    with pytest.raises(QueryGovernorError) as error:
+        governed_read(engine, ENDLESS, limits=QueryLimits(timeout=None), token=token)
+    assert error.value.code == "cancelled"
+
+
+def test_cancelled_token_stops_the_query_before_it_runs(engine):
+    token = CancellationToken()
+    token.cancel()
+    with pytest.raises(QueryGovernorError) as error:
+        governed_read(engine, "SELECT * FROM sales", token=token)
+    assert error.value.code == "cancelled"
+
+
+def test_connection_is_usable_after_an_interrupted_query(engine):
+    with pytest.raises(QueryGovernorError):
+        governed_read(engine, ENDLESS, limits=QueryLimits(timeout=0.2))
+    data, _ = governed_read(engine, "SELECT count(*) AS n FROM sales")
+    assert data["n"][0] == 100
+
+
+@pytest.mark.parametrize("limits, code", [
+    ({"max_rows": 10, "exploratory_limit": None}, "max_rows"),
+    ({"max_bytes": 100, "exploratory_limit": None}, "max_bytes"),
+])
+def test_row_and_byte_limits(engine, limits, code):
+    with pytest.raises(QueryGovernorError) as error:
+        governed_read(engine, "SELECT * FROM sales", limits=QueryLimits(**limits))
+    assert error.value.code == code
+
+
+def test_on_batch_reads_stop_at_max_rows_without_an_error(engine):
+    rows = []
+    _, result = governed_read(engine, "SELECT * FROM sales", limits=QueryLimits(max_rows=30),
+                              on_batch=lambda batch: rows.append(batch.num_rows))
+    assert sum(rows) == 30
+    assert result.truncated
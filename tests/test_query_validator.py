@@ -0,0 +1,30 @@
+import sqlite3
+
+from sqlalchemy import create_engine
+
+from tools.query_validator import check_read_only, validate_query
+
+
+def sales_engine(tmp_path):
+    path = tmp_path / "sales.db"
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE sales (id INTEGER PRIMARY KEY, region TEXT, price REAL)")
+        conn.execute("INSERT INTO sales VALUES (1, 'north', 2.0)")
+    conn.close()
+    return create_engine(f"sqlite:///{path}")
+
+
+def test_writes_are_rejected():
+    assert check_read_only("SELECT * FROM sales") is None
+    assert check_read_only("DELETE FROM sales") is not None
+    assert check_read_only("SELECT 1; DROP TABLE sales") is not None
+
+
+def test_queries_are_explained_not_run(tmp_path):
+    engine = sales_engine(tmp_path)
+    assert validate_query(engine, "SELECT region, SUM(price) FROM sales GROUP BY region")["valid"]
+    result = validate_query(engine, "SELECT nope FROM sales")
+    assert not result["valid"] and result["error"]
+    assert validate_query(engine, "DELETE FROM sales")["valid"] is False
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql("SELECT COUNT(*) FROM sales").scalar() == 1
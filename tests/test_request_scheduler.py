@@ -0,0 +1,92 @@
+import asyncio
+import threading
+
+import pytest
+import requests
+
+from models.async_openai_models import AsyncOpenAIModel
+from models.openai_models import OpenAIModel
+from models.request_scheduler import RequestScheduler, retry_after_seconds
+
+
+def test_retry_after_headers():
+    assert retry_after_seconds({"retry-after": "2"}) == 2.0
+    assert retry_after_seconds({"retry-after-ms": "150"}) == 0.15
+    assert retry_after_seconds({}) is None
+
+
+def test_rate_limited_requests_are_retried(mock_server):
+    server = mock_server(fail_first=2, retry_after=0.05)
+    model = OpenAIModel("m", "system", 0, scheduler=RequestScheduler(backoff_base=0.01))
+    assert model.generate_text("hi")["tool_choice"] == "no tool"
+    assert server.request_count == 3
+
+
+def test_exhausted_retries_return_the_error(mock_server):
+    server = mock_server(fail_first=100, error_status=503)
+    model = OpenAIModel("m", "system", 0, scheduler=RequestScheduler(max_attempts=3, backoff_base=0.01))
+    response = model.generate_text("hi")
+    assert response["status_code"] == 503
+    assert server.request_count == 3
+
+
+def test_client_errors_are_not_retried(mock_server):
+    server = mock_server(fail_first=1, error_status=400)
+    model = OpenAIModel("m", "system", 0, scheduler=RequestScheduler())
+    assert model.generate_text("hi")["status_code"] == 400
+    assert server.request_count == 1
+
+
+def test_identical_concurrent_requests_are_coalesced(mock_server):
+    server = mock_server(latency=0.2)
+    model = OpenAIModel("m", "system", 0, scheduler=RequestScheduler())
+    responses = []
+    threads = [threading.Thread(target=lambda: responses.append(model.generate_text("same"))) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(responses) == 6
+    assert server.request_count == 1
+
+
+def test_async_requests_are_coalesced(mock_server):
+    server = mock_server(latency=0.2)
+    model = AsyncOpenAIModel("m", "system", 0, scheduler=RequestScheduler())
+
+    async def ask():
+        return await asyncio.gather(*[model.generate_text("same") for _ in range(6)])
+
+    assert len(asyncio.run(ask())) == 6
+    assert server.request_count == 1
+
+
+def test_retry_after_beyond_the_cap_is_not_waited_for(mock_server):
+    server = mock_server(fail_first=1, retry_after=1000)
+    model = OpenAIModel("m", "system", 0, scheduler=RequestScheduler())
+    response = model.generate_text("hi")
+    assert response["status_code"] == 429 and response["retry_after"] == 1000
+    assert server.request_count == 1
+
+
+def test_async_retry_after_beyond_the_cap_is_not_waited_for(mock_server):
+    server = mock_server(fail_first=1, retry_after=1000)
+    model = AsyncOpenAIModel("m", "system", 0, scheduler=RequestScheduler())
+    assert asyncio.run(model.generate_text("hi"))["status_code"] == 429
+    assert server.request_count == 1
+
+
+def test_streams_are_retried_before_the_first_delta(mock_server):
+    server = mock_server(fail_first=2, retry_after=0.05)
+    model = OpenAIModel("m", "system", 0, scheduler=RequestScheduler(backoff_base=0.01))
+    text = "".join(model.stream_text("hi"))
+    assert "canned answer" in text
+    assert server.request_count == 3
+
+
+def test_streams_raise_once_retries_are_exhausted(mock_server):
+    server = mock_server(fail_first=100, error_status=503)
+    model = OpenAIModel("m", "system", 0, scheduler=RequestScheduler(max_attempts=2, backoff_base=0.01))
+    with pytest.raises(requests.HTTPError):
+        list(model.stream_text("hi"))
+    assert server.request_count == 2
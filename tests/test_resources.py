@@ -0,0 +1,36 @@
+import os
+import sqlite3
+from collections import OrderedDict
+
+from interface import resources
+from interface.resources import content_hash, get_agent, read_only_connection_string, store_upload
+from tools import database_conn
+from tools.database_conn import create_db_connection
+
+
+def database_bytes(tmp_path, name):
+    path = tmp_path / f"{name}.db"
+    with sqlite3.connect(path) as conn:
+        conn.execute(f"CREATE TABLE {name} (id INTEGER)")
+    conn.close()
+    return path.read_bytes()
+
+
+def test_evicted_uploads_drop_their_agent_and_engine(tmp_path, monkeypatch):
+    monkeypatch.setattr(resources, "UPLOAD_DIR", str(tmp_path / "uploads"))
+    monkeypatch.setattr(resources, "MAX_CACHED_DATABASES", 1)
+    monkeypatch.setattr(resources, "_stored", OrderedDict())
+    monkeypatch.setattr(resources, "_agents", {})
+
+    def build(path):
+        return create_db_connection(read_only_connection_string(path))
+
+    first = database_bytes(tmp_path, "first")
+    first_path = store_upload(first)
+    engine = get_agent(content_hash(first), first_path, build)
+    assert get_agent(content_hash(first), first_path, build) is engine
+
+    store_upload(database_bytes(tmp_path, "second"))
+    assert not os.path.exists(first_path)
+    assert content_hash(first) not in resources._agents
+    assert all(key[0] != read_only_connection_string(first_path) for key in database_conn._engines)
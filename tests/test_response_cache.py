@@ -0,0 +1,30 @@
+import sqlite3
+import time
+
+from models.response_cache import ResponseCache
+
+
+def test_disk_tier_keeps_the_newest_rows(tmp_path):
+    cache = ResponseCache(max_entries=2, path=str(tmp_path / "cache.db"), max_disk_entries=3)
+    for i in range(10):
+        cache.set(f"k{i}", {"i": i})
+    assert cache.stats()["disk_entries"] == 3
+
+    reopened = ResponseCache(path=str(tmp_path / "cache.db"))
+    assert reopened.get("k9") == {"i": 9}
+    assert reopened.get("k0") is None
+
+
+def test_expired_rows_are_pruned_at_open_and_on_write(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = ResponseCache(ttl=0.05, path=path)
+    cache.set("old", {"a": 1})
+    time.sleep(0.1)
+    cache.set("new", {"a": 2})
+    with sqlite3.connect(path) as conn:
+        assert [row[0] for row in conn.execute("SELECT key FROM responses")] == ["new"]
+
+    time.sleep(0.1)
+    ResponseCache(path=path)
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0] == 0
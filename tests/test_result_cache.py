@@ -0,0 +1,51 @@
+import sqlite3
+
+from sqlalchemy import create_engine
+
+from tools.result_cache import cached_result, get_result_cache, written_tables
+from tools.sql_database_toolkit import execute_query
+
+COUNT = "SELECT COUNT(*) AS n FROM sales"
+
+
+def add_row(path):
+    with sqlite3.connect(path) as conn:
+        conn.execute("INSERT INTO sales VALUES (1000, 'east', 1.0, 1.0)")
+    conn.close()
+
+
+def test_read_only_uri_sees_new_rows(sales_db):
+    engine = create_engine(f"sqlite:///file:{sales_db}?mode=ro&uri=true")
+    assert execute_query(engine, COUNT)["n"][0] == 100
+    add_row(sales_db)
+    assert execute_query(engine, COUNT)["n"][0] == 101
+
+
+def test_results_without_fingerprint_are_not_cached():
+    engine = create_engine("sqlite://")
+    calls = []
+    for _ in range(2):
+        cached_result(engine, "SELECT 1", None, lambda: calls.append(1) or [1])
+    assert len(calls) == 2
+    assert get_result_cache(engine).stats()["entries"] == 0
+
+
+def test_repeated_reads_are_cached(sales_db):
+    engine = create_engine(f"sqlite:///{sales_db}")
+    execute_query(engine, COUNT)
+    execute_query(engine, COUNT)
+    assert get_result_cache(engine).stats()["hits"] == 1
+
+
+def test_writes_drop_cached_results_of_their_tables(sales_db):
+    engine = create_engine(f"sqlite:///{sales_db}")
+    execute_query(engine, COUNT)
+    execute_query(engine, "SELECT 1 AS one")
+    cached_result(engine, "DELETE FROM sales WHERE id = 1", None, lambda: None)
+    assert get_result_cache(engine).stats()["entries"] == 1
+
+
+def test_written_tables():
+    assert written_tables("INSERT OR REPLACE INTO main.sales VALUES (1)") == {"sales"}
+    assert written_tables('UPDATE "Sales" SET price = 1') == {"sales"}
+    assert written_tables("DROP TABLE IF EXISTS old") == {"old"}
@@ -0,0 +1,39 @@
+import pandas as pd
+
+from tools.result_summary import ResultSummarizer, render_summary, summarize_dataframe
+
+
+def test_single_row_reads_as_values():
+    summary = summarize_dataframe(pd.DataFrame({"total_sales": [12345]}))
+    assert render_summary(summary) == "total sales is 12,345"
+
+
+def test_batches_fold_into_column_statistics():
+    summarizer = ResultSummarizer()
+    for start in range(0, 3000, 1000):
+        summarizer.update(pd.DataFrame({"a": range(start, start + 1000), "city": ["Paris", "Lyon"] * 500}))
+    summary = summarizer.summary()
+    assert summary["rows"] == 3000
+    a, city = summary["columns"]
+    assert (a["min"], a["max"]) == (0, 2999)
+    assert city["distinct"] == 2
+    assert "3,000 rows" in render_summary(summary)
+
+
+def test_agent_summarizes_beyond_the_exploratory_limit(mock_server, tmp_path):
+    import sqlite3
+
+    from agents.agents import Agent
+    from models.openai_models import OpenAIModel
+
+    path = tmp_path / "big.db"
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE items (price REAL)")
+        conn.executemany("INSERT INTO items VALUES (?)", [(i,) for i in range(5000)])
+    conn.close()
+    mock_server(responses={"tool_choice": "execute_query", "tool_input": "SELECT price FROM items"})
+    agent = Agent(tools=["execute_query"], model_service=OpenAIModel, model_name="m",
+                  connection_string=f"sqlite:///{path}")
+    response = agent.work("show every price")
+    assert "5,000 rows" in response
+    assert "first" not in response
@@ -0,0 +1,84 @@
+import json
+
+import pytest
+
+from agents.agents import Agent
+from agents.router import IntentClassifier, Router, LLM_LABEL
+from models.openai_models import OpenAIModel
+from tools.basic_Calculator import basic_Calculator
+from tools.reverser import reverse_string
+
+TOOLS = {"basic_Calculator", "reverse_string", "execute_query"}
+
+
+@pytest.mark.parametrize("prompt, expected", [
+    ("What is 5 plus 3?", {"num1": 5, "num2": 3, "operation": "add"}),
+    ("calculate 1,200 / 4", {"num1": 1200, "num2": 4, "operation": "divide"}),
+    ("2 ** 10", {"num1": 2, "num2": 10, "operation": "power"}),
+    ("subtract 3 from 10", {"num1": 10, "num2": 3, "operation": "subtract"}),
+    ("is 5 greater than 3", {"num1": 5, "num2": 3, "operation": "gt"}),
+    ("3.5 times 2", {"num1": 3.5, "num2": 2, "operation": "multiply"}),
+])
+def test_arithmetic_is_routed_to_the_calculator(prompt, expected):
+    decision = Router().route(prompt, TOOLS)
+    assert decision["tool_choice"] == "basic_Calculator"
+    assert decision["routed"] is True
+    assert json.loads(decision["tool_input"]) == expected
+
+
+@pytest.mark.parametrize("prompt", ['reverse "hello world"', "please reverse the string: 'abc'"])
+def test_quoted_text_is_routed_to_reverse_string(prompt):
+    decision = Router().route(prompt, TOOLS)
+    assert decision["tool_choice"] == "reverse_string"
+    assert decision["tool_input"] in ("hello world", "abc")
+
+
+@pytest.mark.parametrize("prompt", [
+    "How many orders were placed in 2023?",
+    "What is the total of sales plus returns?",
+    "Show the 5 regions with the highest price",
+    "reverse the order of the results by price",
+    "add 5 and 3 to the table",
+    "What is 5 plus 3 plus 2?",
+    "5 plus",
+    "",
+])
+def test_data_questions_and_ambiguous_prompts_go_to_the_model(prompt):
+    assert Router().route(prompt, TOOLS) is None
+
+
+def test_a_bare_word_is_below_the_default_confidence():
+    assert Router().route("reverse engineering", TOOLS) is None
+    decision = Router(tool_config={"reverse_string": {"min_confidence": 0.8}}).route("reverse engineering", TOOLS)
+    assert decision["tool_input"] == "engineering"
+
+
+def test_tools_the_agent_lacks_or_disables_are_never_routed():
+    assert Router().route("What is 5 plus 3?", {"reverse_string"}) is None
+    router = Router(tool_config={"basic_Calculator": {"enabled": False}})
+    assert router.route("What is 5 plus 3?", TOOLS) is None
+
+
+def test_classifier_vetoes_prompts_it_labels_for_the_model():
+    classifier = IntentClassifier().train([("what is 5 plus 3", LLM_LABEL)] * 5)
+    assert Router(classifier=classifier).route("What is 5 plus 3?", TOOLS) is None
+
+
+def test_stats_count_hits_misses_and_saved_latency():
+    router = Router()
+    router.observe_llm_latency(500.0)
+    router.route("What is 5 plus 3?", TOOLS)
+    router.route("How many orders were placed in 2023?", TOOLS)
+    stats = router.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (1, 1, 0.5)
+    assert 0 < stats["latency_saved_ms"] <= 500.0
+
+
+def test_agent_answers_routed_prompts_without_the_model(mock_server):
+    server = mock_server(responses={"tool_choice": "no tool", "tool_input": "from the model"})
+    agent = Agent(tools=[basic_Calculator, reverse_string], model_service=OpenAIModel, model_name="m",
+                  router=Router())
+    assert "8" in agent.work("What is 5 plus 3?")
+    assert server.request_count == 0
+    assert agent.work("What is the weather like?") == "from the model"
+    assert server.request_count == 1
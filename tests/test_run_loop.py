@@ -0,0 +1,77 @@
+import json
+
+import pytest
+
+from agents.agents import Agent
+from models.openai_models import OpenAIModel
+from tools.basic_Calculator import basic_Calculator
+from tools.reverser import reverse_string
+
+
+def call(call_id, name, arguments):
+    return {"id": call_id, "type": "function", "function": {"name": name, "arguments": json.dumps(arguments)}}
+
+
+ADD = call("call_add", "basic_Calculator", {"input_str": json.dumps({"num1": 5, "num2": 3, "operation": "add"})})
+REVERSE = call("call_reverse", "reverse_string", {"input_string": "abc"})
+ANSWER = {"tool_choice": "no tool", "tool_input": "8 and cba"}
+
+
+def loop_agent(max_steps=4):
+    return Agent(tools=[basic_Calculator, reverse_string], model_service=OpenAIModel, model_name="m",
+                 native_tools=True, max_steps=max_steps)
+
+
+def test_tool_results_go_back_to_the_model_until_it_answers(mock_server):
+    server = mock_server(responses=[{"tool_calls": [ADD]}, {"tool_calls": [REVERSE]}, ANSWER])
+    outcome = loop_agent().run_loop("add 5 and 3, then reverse abc")
+    assert outcome["response"] == "8 and cba"
+    assert [step["step"] for step in outcome["steps"]] == [1, 2, 3]
+    assert [[c["name"] for c in step["tool_calls"]] for step in outcome["steps"]] == [
+        ["basic_Calculator"], ["reverse_string"], []]
+
+    # Each follow-up carries every earlier call and its result
+    last = server.requests[-1]["messages"]
+    tool_messages = [m for m in last if m["role"] == "tool"]
+    assert [m["tool_call_id"] for m in tool_messages] == ["call_add", "call_reverse"]
+    assert "8" in tool_messages[0]["content"] and "cba" in tool_messages[1]["content"]
+
+
+def test_parallel_calls_run_in_one_step_and_return_in_call_order(mock_server):
+    server = mock_server(responses=[{"tool_calls": [ADD, REVERSE]}, ANSWER])
+    outcome = loop_agent().run_loop("add 5 and 3 and reverse abc")
+    assert outcome["response"] == "8 and cba"
+    assert len(outcome["steps"]) == 2
+    assert [c["name"] for c in outcome["steps"][0]["tool_calls"]] == ["basic_Calculator", "reverse_string"]
+    assert server.request_count == 2
+    tool_messages = [m for m in server.requests[-1]["messages"] if m["role"] == "tool"]
+    assert [m["tool_call_id"] for m in tool_messages] == ["call_add", "call_reverse"]
+
+
+def test_last_step_forbids_further_tool_calls(mock_server):
+    server = mock_server(responses=[{"tool_calls": [ADD]}])
+    outcome = loop_agent(max_steps=2).run_loop("keep adding")
+    assert len(outcome["steps"]) == 2
+    assert [payload.get("tool_choice") for payload in server.requests] == ["auto", "none"]
+    # The model ignored the budget: the latest tool result is returned
+    assert "8" in outcome["response"]
+
+
+def test_unknown_tools_are_reported_to_the_model(mock_server):
+    server = mock_server(responses=[{"tool_calls": [call("call_x", "drop_tables", {})]}, ANSWER])
+    loop_agent().run_loop("do something")
+    tool_messages = [m for m in server.requests[-1]["messages"] if m["role"] == "tool"]
+    assert "unknown tool" in tool_messages[0]["content"]
+
+
+def test_work_uses_the_loop_and_records_the_calls_in_the_session(mock_server):
+    mock_server(responses=[{"tool_calls": [ADD]}, ANSWER])
+    agent = loop_agent()
+    assert agent.work("add 5 and 3", session_id="s") == "8 and cba"
+    context = json.dumps(agent.get_session("s").context())
+    assert "basic_Calculator" in context and "8 and cba" in context
+
+
+def test_multi_step_loop_requires_native_tools():
+    with pytest.raises(ValueError):
+        Agent(tools=[], model_service=OpenAIModel, model_name="m", max_steps=3)
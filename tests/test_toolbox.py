@@ -0,0 +1,35 @@
+from toolbox.toolbox import ToolBox, function_schema, injected_parameters
+from tools.basic_Calculator import basic_Calculator
+from tools.batch_Calculator import batch_Calculator
+from tools.sql_database_toolkit import execute_query
+
+
+def properties(func):
+    return function_schema(func)["function"]["parameters"]["properties"]
+
+
+def test_schema_comes_from_signature_and_docstring():
+    schema = function_schema(basic_Calculator)["function"]
+    assert schema["name"] == "basic_Calculator"
+    assert schema["description"]
+    assert schema["parameters"]["required"] == list(schema["parameters"]["properties"])
+
+
+def test_injected_parameters_are_hidden_from_the_model():
+    assert injected_parameters(batch_Calculator) == {"engine", "cancel_token", "last_query"}
+    assert not {"engine", "cancel_token", "last_query"} & set(properties(batch_Calculator))
+    assert "engine" not in properties(execute_query)
+
+
+def test_injected_parameter_docs_do_not_leak_into_other_descriptions():
+    assert "last_query" not in properties(batch_Calculator)["query"]["description"]
+    assert "cancel_token" not in str(properties(execute_query))
+    assert properties(batch_Calculator)["expression"]["type"] == "string"
+    assert properties(batch_Calculator)["values"]["type"] == "object"
+
+
+def test_toolbox_schemas_are_cached():
+    toolbox = ToolBox()
+    toolbox.store([basic_Calculator, batch_Calculator])
+    assert toolbox.schemas() is toolbox.schemas()
+    assert [schema["function"]["name"] for schema in toolbox.schemas()] == ["basic_Calculator", "batch_Calculator"]
@@ -0,0 +1,54 @@
+import importlib
+import threading
+
+# Tool name -> module defining a function of that name. A module is imported the first
+# time one of its tools is requested, so the SQL toolkit (SQLAlchemy, pandas, pyarrow)
+# is only loaded by processes that use it.
+TOOL_MODULES = {
+    "basic_Calculator": "tools.basic_Calculator",
+    "batch_Calculator": "tools.batch_Calculator",
+    "reverse_string": "tools.reverser",
+    "get_metadata": "tools.sql_database_toolkit",
+    "list_tables": "tools.sql_database_toolkit",
+    "check_query": "tools.sql_database_toolkit",
+    "execute_query": "tools.sql_database_toolkit",
+}
+
+_tools = {}
+_tools_lock = threading.Lock()
+
+
+def register_tool(name, module):
+    """
+    Registers a tool so it can be requested by name.
+
+    Parameters:
+    name (str): The tool's function name.
+    module (str): Dotted path of the module defining it.
+    """
+    with _tools_lock:
+        TOOL_MODULES[name] = module
+        _tools.pop(name, None)
+
+
+def get_tool(name):
+    """
+    Returns a registered tool function, importing its module on first use.
+
+    Raises:
+    KeyError: If no tool of that name is registered.
+    """
+    with _tools_lock:
+        tool = _tools.get(name)
+        if tool is None:
+            if name not in TOOL_MODULES:
+                raise KeyError(f"Unknown tool: {name}")
+            tool = _tools[name] = getattr(importlib.import_module(TOOL_MODULES[name]), name)
+        return tool
+
+
+def resolve_tools(tools):
+    """
+    Returns the tool functions of a list of functions and registered tool names.
+    """
+    return [get_tool(tool) if isinstance(tool, str) else tool for tool in tools]
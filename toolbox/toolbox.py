@@ -1,6 +1,167 @@
+import hashlib
+import inspect
+import json
+import re
+import threading
+
+# Parameters the agent supplies itself; they are never exposed to the model.
+INJECTED_PARAMETERS = {"engine", "cancel_token", "last_query"}
+
+JSON_TYPES = {
+    "str": "string",
+    "int": "integer",
+    "float": "number",
+    "bool": "boolean",
+    "dict": "object",
+    "list": "array",
+}
+
+_PARAMETER_HEADER_RE = re.compile(r"^(\s*)(Parameters|Args|Arguments):\s*$")
+_SECTION_HEADER_RE = re.compile(r"^(\s*)(Returns?|Raises|Yields|Examples?|Example Usage|Notes|Guidelines)\b[^:]*:\s*$")
+_UNDERLINE_RE = re.compile(r"^\s*-{3,}\s*$")
+# "name (type): description" and numpy style "name : type"
+_GOOGLE_PARAMETER_RE = re.compile(r"^\s*(\w+)\s*\(([^)]*)\)\s*:\s*(.*)$")
+_NUMPY_PARAMETER_RE = re.compile(r"^\s*(\w+)\s+:\s+(\S.*)$")
+
+_schema_cache = {}
+_schema_cache_lock = threading.Lock()
+
+
+def _json_type(type_text):
+    """
+    Maps a docstring or annotation type such as "str, optional" to a JSON schema type.
+    """
+    if not type_text:
+        return None
+    base = re.split(r"[\s,\[|]", type_text.strip(), maxsplit=1)[0]
+    return JSON_TYPES.get(base)
+
+
+def _parse_parameters(doc, names):
+    """
+    Extracts the type and description of each documented parameter in names.
+
+    Every "name (type):" line starts a new entry, so the lines of parameters left out of
+    names (the injected ones) never run into the description above them.
+
+    Returns:
+    dict: {name: {"type": str or None, "description": str}}.
+    """
+    parameters = {}
+    current = None
+    header_indent = None
+    for line in doc.splitlines():
+        if header_indent is None:
+            match = _PARAMETER_HEADER_RE.match(line)
+            if match:
+                header_indent = len(match.group(1))
+            continue
+        if _UNDERLINE_RE.match(line):
+            continue
+        section = _SECTION_HEADER_RE.match(line)
+        if section and len(section.group(1)) <= header_indent:
+            break
+
+        match = _GOOGLE_PARAMETER_RE.match(line)
+        if match:
+            current = parameters[match.group(1)] = {"type": match.group(2), "description": [match.group(3)]}
+            continue
+        match = _NUMPY_PARAMETER_RE.match(line)
+        if match and match.group(1) in names:
+            current = parameters[match.group(1)] = {"type": match.group(2), "description": []}
+            continue
+        if current is not None and line.strip():
+            current["description"].append(line.strip())
+
+    return {
+        name: {"type": parameter["type"], "description": " ".join(" ".join(parameter["description"]).split())}
+        for name, parameter in parameters.items() if name in names
+    }
+
+
+def injected_parameters(func):
+    """
+    Returns the INJECTED_PARAMETERS a tool function takes.
+    """
+    return INJECTED_PARAMETERS & set(inspect.signature(func).parameters)
+
+
+def function_schema(func):
+    """
+    Builds a compact OpenAI tool definition for a function from its signature and docstring.
+
+    The description is the docstring's first paragraph; parameters come from the signature
+    and take their type and description from the docstring's Parameters section. Parameters
+    without a default are required. Parameters the agent injects (INJECTED_PARAMETERS) are
+    left out.
+
+    Parameters:
+    func (callable): The tool function.
+
+    Returns:
+    dict: {"type": "function", "function": {"name", "description", "parameters"}}.
+    """
+    doc = inspect.cleandoc(func.__doc__ or "")
+    description = " ".join(doc.split("\n\n", 1)[0].split())
+    signature = inspect.signature(func)
+    names = [name for name, parameter in signature.parameters.items()
+             if name not in INJECTED_PARAMETERS
+             and parameter.kind not in (parameter.VAR_POSITIONAL, parameter.VAR_KEYWORD)]
+    documented = _parse_parameters(doc, set(names))
+
+    properties = {}
+    required = []
+    for name in names:
+        parameter = signature.parameters[name]
+        info = documented.get(name, {})
+        annotation = parameter.annotation
+        json_type = _json_type(info.get("type")) or (
+            _json_type(annotation.__name__) if isinstance(annotation, type) else None)
+        prop = {}
+        if json_type:
+            prop["type"] = json_type
+        if info.get("description"):
+            prop["description"] = info["description"]
+        properties[name] = prop
+        if parameter.default is parameter.empty:
+            required.append(name)
+
+    return {
+        "type": "function",
+        "function": {
+            "name": func.__name__,
+            "description": description,
+            "parameters": {"type": "object", "properties": properties, "required": required},
+        },
+    }
+
+
+def tool_schemas(functions):
+    """
+    Returns the tool definitions for a tool set, built once per distinct set of functions.
+
+    Parameters:
+    functions (iterable): The tool functions.
+
+    Returns:
+    tuple: (list of tool definitions, fingerprint str of the definitions).
+    """
+    key = tuple(functions)
+    with _schema_cache_lock:
+        cached = _schema_cache.get(key)
+    if cached is None:
+        schemas = [function_schema(func) for func in key]
+        fingerprint = hashlib.sha256(json.dumps(schemas, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+        cached = (schemas, fingerprint)
+        with _schema_cache_lock:
+            _schema_cache[key] = cached
+    return cached
+
+
 class ToolBox:
     def __init__(self):
         self.tools_dict = {}
+        self.functions = {}
 
     def store(self, functions_list):
         """
@@ -14,6 +175,7 @@ class ToolBox:
         """
         for func in functions_list:
             self.tools_dict[func.__name__] = func.__doc__
+            self.functions[func.__name__] = func
         return self.tools_dict
 
     def tools(self):
@@ -26,4 +188,21 @@ class ToolBox:
         tools_str = ""
         for name, doc in self.tools_dict.items():
             tools_str += f"{name}: \"{doc}\"\n"
-        return tools_str.strip()
\ No newline at end of file
+        return tools_str.strip()
+
+    def schemas(self):
+        """
+        Returns the stored functions as JSON-schema tool definitions for native function
+        calling. The definitions are cached per tool set.
+
+        Returns:
+        list: Tool definitions in the OpenAI `tools` format.
+        """
+        return tool_schemas(self.functions.values())[0]
+
+    def fingerprint(self):
+        """
+        Returns:
+        str: Short hash of the tool definitions, changes whenever a tool's signature or docstring does.
+        """
+        return tool_schemas(self.functions.values())[1]
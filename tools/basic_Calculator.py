@@ -1,5 +1,24 @@
 import operator
 import json
+
+# The supported operations. They apply element-wise to NumPy arrays as well, which
+# tools.batch_Calculator relies on.
+OPERATIONS = {
+    'add': operator.add,
+    'subtract': operator.sub,
+    'multiply': operator.mul,
+    'divide': operator.truediv,
+    'floor_divide': operator.floordiv,
+    'modulus': operator.mod,
+    'power': operator.pow,
+    'lt': operator.lt,
+    'le': operator.le,
+    'eq': operator.eq,
+    'ne': operator.ne,
+    'ge': operator.ge,
+    'gt': operator.gt
+}
+
 # its important to have the docString as coprehensive as possible so that
 # the llm understands the tools usecase
 def basic_Calculator(input_str):
@@ -31,28 +50,11 @@ def basic_Calculator(input_str):
     except (json.JSONDecodeError, KeyError) as e:
         return str(e), "Invalid input format. Please provide a valid JSON string."
 
-    # Define the supported operations
-    operations = {
-        'add': operator.add,
-        'subtract': operator.sub,
-        'multiply': operator.mul,
-        'divide': operator.truediv,
-        'floor_divide': operator.floordiv,
-        'modulus': operator.mod,
-        'power': operator.pow,
-        'lt': operator.lt,
-        'le': operator.le,
-        'eq': operator.eq,
-        'ne': operator.ne,
-        'ge': operator.ge,
-        'gt': operator.gt
-    }
-    
     # Check if the operation is supported
-    if operation in operations:
+    if operation in OPERATIONS:
         try:
             # Perform the operation
-            result = operations[operation](num1, num2)
+            result = OPERATIONS[operation](num1, num2)
             result_formatted = f"\n\nThe answer is: {result}.\nCalculated with basic_calculator."
             return result_formatted
         except Exception as e:
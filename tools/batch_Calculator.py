@@ -0,0 +1,341 @@
+import ast
+import functools
+import math
+import operator
+
+from tools.basic_Calculator import OPERATIONS
+
+# Syntax mapped onto the basic_Calculator operations.
+BINARY_OPERATIONS = {
+    ast.Add: 'add',
+    ast.Sub: 'subtract',
+    ast.Mult: 'multiply',
+    ast.Div: 'divide',
+    ast.FloorDiv: 'floor_divide',
+    ast.Mod: 'modulus',
+    ast.Pow: 'power',
+}
+COMPARISONS = {
+    ast.Lt: 'lt',
+    ast.LtE: 'le',
+    ast.Eq: 'eq',
+    ast.NotEq: 'ne',
+    ast.GtE: 'ge',
+    ast.Gt: 'gt',
+}
+# col("unit price") refers to a column whose name is not an identifier.
+COLUMN_FUNCTION = 'col'
+MAX_EXPRESSION_CHARS = 2000
+MAX_EXPRESSION_NODES = 500
+# Leading results returned to the model; the rest are only summarized.
+MAX_RESULT_VALUES = 20
+COMPILED_CACHE_SIZE = 256
+
+
+class CompiledExpression:
+    """
+    An expression compiled once into a tree of whole-array operations.
+
+    Evaluating it applies each basic_Calculator operation once to entire NumPy arrays,
+    with broadcasting between columns and numbers, so the cost per row is NumPy's and
+    not a Python call.
+    """
+
+    def __init__(self, expression, evaluate, names):
+        self.expression = expression
+        self.names = names
+        self._evaluate = evaluate
+
+    def __call__(self, columns):
+        """
+        Parameters:
+        columns (dict): Arrays, sequences or numbers by the names the expression uses.
+
+        Returns:
+        numpy.ndarray: The element-wise result, 0-dimensional when every input is a number.
+
+        Raises:
+        ValueError: If a name is missing or the inputs cannot be combined.
+        """
+        import numpy as np
+
+        missing = [name for name in self.names if name not in columns]
+        if missing:
+            raise ValueError(f"Unknown name(s) in expression: {', '.join(missing)}")
+        arrays = {name: _as_array(columns[name]) for name in self.names}
+        # Division by zero and overflow give inf/nan for that element instead of failing the batch
+        with np.errstate(all='ignore'):
+            try:
+                return np.asarray(self._evaluate(arrays))
+            except (TypeError, ValueError) as e:
+                raise ValueError(f"Cannot evaluate {self.expression!r}: {e}") from e
+
+
+def _as_array(value):
+    """
+    Converts a column to a NumPy array: numbers (with nulls as NaN) as float64, other
+    values such as text left as they are.
+    """
+    import numpy as np
+
+    if hasattr(value, 'to_numpy'):
+        # pandas Series and pyarrow arrays
+        try:
+            return value.to_numpy(dtype=np.float64, na_value=np.nan)
+        except (TypeError, ValueError):
+            value = value.to_numpy()
+    array = np.asarray(value)
+    if array.dtype.kind in 'biuf':
+        return array.astype(np.float64, copy=False)
+    try:
+        return np.asarray([np.nan if item is None else item for item in array.ravel()],
+                          dtype=np.float64).reshape(array.shape)
+    except (TypeError, ValueError):
+        return array
+
+
+def _compile_node(node, names):
+    import numpy as np
+
+    if isinstance(node, ast.Expression):
+        return _compile_node(node.body, names)
+    if isinstance(node, ast.Constant):
+        if isinstance(node.value, bool) or not isinstance(node.value, (int, float, str)):
+            raise ValueError(f"Unsupported constant: {node.value!r}")
+        # Numbers become float64 so constant arithmetic (10 ** 10 ** 10) cannot grow unbounded
+        value = node.value if isinstance(node.value, str) else np.float64(node.value)
+        return lambda arrays: value
+    if isinstance(node, ast.Name):
+        names.add(node.id)
+        return lambda arrays: arrays[node.id]
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and not node.keywords:
+        function = node.func.id
+        if function == COLUMN_FUNCTION:
+            if len(node.args) != 1 or not isinstance(node.args[0], ast.Constant) \
+                    or not isinstance(node.args[0].value, str):
+                raise ValueError(f'{COLUMN_FUNCTION}() takes one column name, e.g. {COLUMN_FUNCTION}("unit price")')
+            name = node.args[0].value
+            names.add(name)
+            return lambda arrays: arrays[name]
+        if function in OPERATIONS:
+            if len(node.args) != 2:
+                raise ValueError(f"{function}() takes two arguments")
+            return _apply(OPERATIONS[function], *(_compile_node(arg, names) for arg in node.args))
+        raise ValueError(f"Unknown function: {function}")
+    if isinstance(node, ast.BinOp) and type(node.op) in BINARY_OPERATIONS:
+        return _apply(OPERATIONS[BINARY_OPERATIONS[type(node.op)]],
+                      _compile_node(node.left, names), _compile_node(node.right, names))
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+        operand = _compile_node(node.operand, names)
+        sign = operator.neg if isinstance(node.op, ast.USub) else operator.pos
+        return lambda arrays: sign(operand(arrays))
+    if isinstance(node, ast.Compare) and all(type(op) in COMPARISONS for op in node.ops):
+        # a < b < c is (a < b) and (b < c), element-wise
+        operands = [_compile_node(operand, names) for operand in [node.left] + node.comparators]
+        pairs = [_apply(OPERATIONS[COMPARISONS[type(op)]], left, right)
+                 for op, left, right in zip(node.ops, operands, operands[1:])]
+        if len(pairs) == 1:
+            return pairs[0]
+        return lambda arrays: functools.reduce(np.logical_and, (pair(arrays) for pair in pairs))
+    if isinstance(node, ast.BoolOp):
+        combine = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+        values = [_compile_node(value, names) for value in node.values]
+        return lambda arrays: functools.reduce(combine, (value(arrays) for value in values))
+    raise ValueError(f"Unsupported syntax: {type(node).__name__}")
+
+
+def _apply(operation, left, right):
+    return lambda arrays: operation(left(arrays), right(arrays))
+
+
+@functools.lru_cache(maxsize=COMPILED_CACHE_SIZE)
+def compile_expression(expression):
+    """
+    Compiles an expression over named columns, once per distinct expression.
+
+    Only numbers, names, col("name"), the basic_Calculator operations (as functions or
+    as + - * / // % ** < <= == != >= >), unary minus and and/or are accepted; anything
+    else, attribute access and other calls included, is rejected before evaluation.
+
+    Parameters:
+    expression (str): E.g. "(price - cost) / price" or "divide(subtract(price, cost), price)".
+
+    Returns:
+    CompiledExpression: Callable with a dict of columns.
+
+    Raises:
+    ValueError: If the expression is too long or uses unsupported syntax.
+    """
+    if len(expression) > MAX_EXPRESSION_CHARS:
+        raise ValueError(f"Expression longer than {MAX_EXPRESSION_CHARS} characters")
+    try:
+        tree = ast.parse(expression.strip(), mode='eval')
+    except SyntaxError as e:
+        raise ValueError(f"Invalid expression: {e.msg}") from e
+    if sum(1 for _ in ast.walk(tree)) > MAX_EXPRESSION_NODES:
+        raise ValueError(f"Expression has more than {MAX_EXPRESSION_NODES} parts")
+    names = set()
+    evaluate = _compile_node(tree, names)
+    return CompiledExpression(expression, evaluate, sorted(names))
+
+
+def evaluate(expression, columns):
+    """
+    Evaluates an expression element-wise over columns (see compile_expression).
+
+    Parameters:
+    expression (str): The expression.
+    columns (dict or pandas.DataFrame): Arrays, sequences or numbers by name, or a
+                                        DataFrame whose columns the expression names.
+
+    Returns:
+    numpy.ndarray: The result for every row.
+    """
+    compiled = compile_expression(expression)
+    if hasattr(columns, 'columns'):
+        columns = {name: columns[name] for name in compiled.names if name in columns.columns}
+    return compiled(columns)
+
+
+def _plain(value):
+    return None if isinstance(value, float) and not math.isfinite(value) else value
+
+
+def describe_result(expression, result, complete=True):
+    """
+    Returns an evaluated result for the model: the leading values and, for long
+    results, aggregates instead of every row.
+
+    Parameters:
+    expression (str): The evaluated expression.
+    result (numpy.ndarray): Its result.
+    complete (bool): False when the columns were cut short by the row limit.
+
+    Returns:
+    dict: {"expression", "rows", "values", "truncated", "complete"} plus min, max, mean and
+          sum of numeric results or the count of true values of comparisons. "truncated"
+          refers to the values shown; "complete" is False when the aggregates only cover
+          the rows read before the query's row limit. Division by zero and other invalid
+          elements are null and counted as "invalid".
+    """
+    import numpy as np
+
+    flat = result.ravel()
+    description = {
+        'expression': expression,
+        'rows': int(flat.size),
+        'values': [_plain(value) for value in flat[:MAX_RESULT_VALUES].tolist()],
+        'truncated': bool(flat.size > MAX_RESULT_VALUES),
+        'complete': bool(complete),
+    }
+    if flat.dtype.kind == 'b':
+        description['true'] = int(flat.sum())
+    elif flat.dtype.kind == 'f':
+        finite = flat[np.isfinite(flat)]
+        description['invalid'] = int(flat.size - finite.size)
+        if finite.size:
+            description.update(min=float(finite.min()), max=float(finite.max()), mean=float(finite.mean()),
+                               sum=float(finite.sum()))
+    return description
+
+
+def read_columns(engine, query, names, cancel_token=None):
+    """
+    Reads the named columns of a query's whole result as arrays.
+
+    Unlike execute_query no exploratory LIMIT is added; the engine's max_rows is the
+    only row bound, and only the named columns are kept. Results are served from the
+    engine's result cache while the database is unchanged.
+
+    Parameters:
+    engine (Engine): SQLAlchemy engine object.
+    query (str): A validated, read-only SQL query.
+    names (list): Column names to read; names the result lacks are left out.
+    cancel_token (CancellationToken, optional): Stops the query.
+
+    Returns:
+    dict: {"columns": {name: numpy.ndarray}, "complete": False if max_rows cut the result short},
+          or {"error", "code", "limit"} if the query was stopped.
+    """
+    import numpy as np
+    import pandas as pd
+
+    from project_utils.cancellation import QueryGovernorError
+    from tools.database_conn import get_read_engine
+    from tools.query_governor import get_query_limits, governed_read
+    from tools.result_cache import cached_result
+
+    limits = get_query_limits(engine)
+
+    def read():
+        chunks = {}
+
+        def keep(batch):
+            for name in names:
+                if name in batch.schema.names:
+                    chunks.setdefault(name, []).append(_as_array(batch.column(name).to_numpy(zero_copy_only=False)))
+
+        # With on_batch the governor adds no LIMIT and keeps no rows of its own
+        _, result = governed_read(get_read_engine(engine), query, limits=limits, token=cancel_token, on_batch=keep)
+        frame = pd.DataFrame({name: np.concatenate(chunks[name]) if name in chunks else np.array([], dtype=np.float64)
+                              for name in names if name in (result.columns or ())})
+        frame.attrs['complete'] = not result.truncated
+        return frame
+
+    try:
+        frame = cached_result(engine, query, ('columns', tuple(names), limits.max_rows), read)
+    except QueryGovernorError as e:
+        return e.to_dict()
+    return {'columns': {name: frame[name].to_numpy() for name in frame.columns},
+            'complete': frame.attrs.get('complete', True)}
+
+
+def batch_Calculator(expression, values=None, query=None, engine=None, cancel_token=None, last_query=None):
+    """
+    Evaluate an arithmetic or comparison expression over whole columns of numbers at once, e.g. the margin of every row of a query result.
+
+    Parameters:
+    expression (str): Expression over column names and numbers with + - * / // % ** and < <= == != >= >,
+                      or the basic_Calculator operations as functions.
+                      Example: "(price - cost) / price" or "divide(subtract(price, cost), price)".
+                      Use col("unit price") for names containing spaces.
+    values (dict, optional): Arrays (or single numbers) by name. Example: {"price": [10, 12.5], "cost": [7, 8]}.
+    query (str, optional): SQL query whose result columns the expression uses. Without it, names not in
+                           values refer to the columns of the conversation's last execute_query result.
+    last_query (str, optional): The conversation's last successful execute_query SQL, supplied by the agent.
+
+    Returns:
+    dict: {"rows", "values" (the first results), "truncated", "complete", "min", "max", "mean", "sum"} for
+          numbers, with "true" counting matches for comparisons, or {"error"} if the expression cannot be
+          evaluated. "complete" is false when the query's rows were cut at the row limit.
+    """
+    if not isinstance(expression, str):
+        return {'error': "expression must be a string, e.g. \"(price - cost) / price\""}
+    try:
+        compiled = compile_expression(expression)
+    except ValueError as e:
+        return {'error': str(e)}
+    columns = dict(values or {})
+    complete = True
+    needed = [name for name in compiled.names if name not in columns]
+    if needed:
+        query = query or last_query
+        if engine is None or not query:
+            return {'error': f"Unknown name(s) in expression: {', '.join(needed)}. Run execute_query first "
+                             "or pass a query."}
+        from tools.query_validator import validate_query
+
+        # The SQL comes from the model: only read-only queries that compile are run
+        validation = validate_query(engine, query)
+        if not validation['valid']:
+            return {'error': f"Invalid SQL query: {validation['error']}"}
+        read = read_columns(engine, query, needed, cancel_token)
+        if 'error' in read:
+            return read
+        columns.update(read['columns'])
+        complete = read['complete']
+    try:
+        result = compiled(columns)
+    except ValueError as e:
+        return {'error': str(e)}
+    return describe_result(expression, result, complete)
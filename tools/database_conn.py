@@ -1,20 +1,195 @@
-from sqlalchemy import create_engine
+import itertools
+import logging
+import threading
+import weakref
+from collections import OrderedDict
 
-def create_db_connection(connection_string):
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import NullPool, StaticPool
+
+logger = logging.getLogger(__name__)
+
+# Pool settings by usage pattern. pool_pre_ping and pool_recycle guard against
+# connections dropped by the server or a proxy while idle.
+POOL_PROFILES = {
+    # Interactive use: a few warm connections
+    "default": {"pool_size": 5, "max_overflow": 10, "pool_pre_ping": True, "pool_recycle": 1800},
+    # Many concurrent agent calls (awork, batch runs, parallel tool calls)
+    "concurrent": {"pool_size": 20, "max_overflow": 20, "pool_timeout": 10, "pool_pre_ping": True,
+                   "pool_recycle": 1800},
+    # Short-lived scripts: every checkout opens a new connection
+    "none": {"poolclass": NullPool},
+}
+
+# Applied to every SQLite connection unless overridden; a None value drops a pragma.
+# These only last as long as the connection; cache_size is in KiB when negative.
+DEFAULT_SQLITE_PRAGMAS = {
+    "cache_size": -64 * 1024,
+    "mmap_size": 256 * 1024 * 1024,
+    "busy_timeout": 5000,
+}
+# Added to the pragmas of read replicas.
+READ_ONLY_SQLITE_PRAGMAS = {"query_only": 1}
+# Opt-in through sqlite_pragmas: WAL lets readers run alongside a writer, but it is
+# stored in the database file and leaves -wal/-shm files next to it. synchronous=NORMAL
+# is only durable in WAL mode, so it comes with it.
+WAL_SQLITE_PRAGMAS = {"journal_mode": "WAL", "synchronous": "NORMAL"}
+# Shared engines kept at once; the least recently used one is disposed beyond this.
+MAX_ENGINES = 32
+
+_engines = OrderedDict()
+_engines_lock = threading.Lock()
+# Primary engine -> (its read replica engines, round-robin counter)
+_replicas = weakref.WeakKeyDictionary()
+
+
+def apply_sqlite_pragmas(engine, pragmas):
+    """
+    Runs `PRAGMA name = value` for each pragma on every new DBAPI connection of a SQLite engine.
+
+    A pragma the database refuses (e.g. WAL on a locked file) is logged and skipped.
+
+    Args:
+        engine (Engine): SQLAlchemy engine object.
+        pragmas (dict): Pragma names mapped to values, e.g. {"mmap_size": 268435456}.
+    """
+    if not pragmas or engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            try:
+                cursor.execute(f"PRAGMA {name} = {value}")
+            except Exception as e:
+                logger.warning("Could not set PRAGMA %s = %s: %s", name, value, e)
+        cursor.close()
+
+
+def _engine_options(connection_string, pool_profile):
+    if pool_profile not in POOL_PROFILES:
+        raise ValueError(f"Unknown pool profile {pool_profile!r}, expected one of {sorted(POOL_PROFILES)}.")
+    options = dict(POOL_PROFILES[pool_profile])
+    url = make_url(connection_string)
+    if url.get_backend_name() != "sqlite":
+        return options
+
+    # pysqlite connections may be used from the thread pool, not just their creating thread
+    options["connect_args"] = {"check_same_thread": False}
+    database = url.database or ""
+    if (not database or database == ":memory:" or "mode=memory" in database) and "poolclass" not in options:
+        # Every connection to :memory: is a new empty database; share a single one
+        return {"poolclass": StaticPool, "connect_args": options["connect_args"]}
+    # A local file has no server to lose the connection to
+    options.pop("pool_pre_ping", None)
+    options.pop("pool_recycle", None)
+    return options
+
+
+def _sqlite_pragmas(sqlite_pragmas, read_only=False):
+    pragmas = dict(DEFAULT_SQLITE_PRAGMAS)
+    if read_only:
+        pragmas.update(READ_ONLY_SQLITE_PRAGMAS)
+    pragmas.update(sqlite_pragmas or {})
+    return {name: value for name, value in pragmas.items() if value is not None}
+
+
+def _build_engine(connection_string, pool_profile, pragmas):
+    engine = create_engine(connection_string, **_engine_options(connection_string, pool_profile))
+    apply_sqlite_pragmas(engine, pragmas)
+    # Test the connection
+    with engine.connect():
+        logger.info("Database connection established.")
+    return engine
+
+
+def create_db_connection(connection_string, sqlite_pragmas=None, pool_profile="default", read_replicas=None):
     """
     Creates and returns a SQLAlchemy engine for the database connection.
 
+    Engines are shared: calls with the same connection string and options return the
+    same engine and its connection pool. Beyond MAX_ENGINES, the pool of the least
+    recently used engine is closed; an engine still in use opens new connections.
+
     Args:
         connection_string (str): The connection string to the SQL database.
+        sqlite_pragmas (dict, optional): Pragmas applied to every SQLite connection, on top of
+                                         DEFAULT_SQLITE_PRAGMAS. A None value drops a default.
+                                         Pass WAL_SQLITE_PRAGMAS to switch the file to WAL.
+        pool_profile (str, optional): Key of POOL_PROFILES, e.g. "concurrent" for many
+                                      simultaneous agent calls.
+        read_replicas (list, optional): Connection strings of read replicas. Read-only agent
+                                        queries are spread over them (see get_read_engine).
 
     Returns:
         Engine: SQLAlchemy engine object.
     """
-    try:
-        engine = create_engine(connection_string)
-        # Test the connection
-        with engine.connect():
-            print("Database connection established.")
+    pragmas = _sqlite_pragmas(sqlite_pragmas)
+    replicas = tuple(read_replicas or ())
+    key = (connection_string, pool_profile, tuple(sorted(pragmas.items())), replicas)
+    with _engines_lock:
+        engine = _engines.get(key)
+        if engine is not None:
+            _engines.move_to_end(key)
+            return engine
+        try:
+            engine = _build_engine(connection_string, pool_profile, pragmas)
+            if replicas:
+                replica_pragmas = _sqlite_pragmas(sqlite_pragmas, read_only=True)
+                _replicas[engine] = (
+                    [_build_engine(replica, pool_profile, replica_pragmas) for replica in replicas],
+                    itertools.count(),
+                )
+        except ValueError:
+            raise
+        except Exception as e:
+            raise ConnectionError(f"Failed to connect to the database: {e}")
+        _engines[key] = engine
+        while len(_engines) > MAX_ENGINES:
+            _dispose(_engines.popitem(last=False)[1])
+        return engine
+
+
+def get_read_engine(engine):
+    """
+    Returns the engine to run a read-only query on: the next read replica of engine
+    (round robin), or engine itself when it has none.
+    """
+    entry = _replicas.get(engine)
+    if entry is None:
         return engine
-    except Exception as e:
-        raise ConnectionError(f"Failed to connect to the database: {e}")
+    replicas, counter = entry
+    return replicas[next(counter) % len(replicas)]
+
+
+def _dispose(engine):
+    for replica in _replicas.pop(engine, ([], None))[0]:
+        replica.dispose()
+    engine.dispose()
+
+
+def dispose_engine(connection_string):
+    """
+    Closes the pooled connections of the shared engines of one connection string, with
+    any options, and forgets them, e.g. before its database file is deleted.
+
+    Returns:
+        int: The number of engines disposed.
+    """
+    with _engines_lock:
+        keys = [key for key in _engines if key[0] == connection_string]
+        for key in keys:
+            _dispose(_engines.pop(key))
+    return len(keys)
+
+
+def dispose_engines():
+    """
+    Closes the pooled connections of every shared engine and forgets them.
+    """
+    with _engines_lock:
+        for engine in _engines.values():
+            _dispose(engine)
+        _engines.clear()
@@ -0,0 +1,236 @@
+import re
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+
+# Defined apart so the agent can use them without importing the SQL stack
+from project_utils.cancellation import CancellationToken, QueryGovernorError
+from tools.query_validator import _strip_sql
+from tools.result_engine import open_query, DEFAULT_MAX_ROWS
+
+DEFAULT_TIMEOUT = 30.0
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+# Row limit appended to SELECTs that have none.
+DEFAULT_EXPLORATORY_LIMIT = 1000
+# SQLite calls the progress handler every this many virtual machine instructions.
+SQLITE_PROGRESS_STEPS = 10_000
+
+# Dialects that accept a trailing `LIMIT n`.
+LIMIT_DIALECTS = {"sqlite", "postgresql", "mysql", "mariadb"}
+
+_PARENTHESES_RE = re.compile(r"\([^()]*\)")
+_ROW_LIMIT_RE = re.compile(r"\b(LIMIT|FETCH|TOP)\b", re.IGNORECASE)
+_SELECT_RE = re.compile(r"^\s*(SELECT|WITH)\b", re.IGNORECASE)
+
+
+class QueryLimits:
+    """
+    Resource limits for generated SQL.
+    """
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT, max_rows=DEFAULT_MAX_ROWS, max_bytes=DEFAULT_MAX_BYTES,
+                 exploratory_limit=DEFAULT_EXPLORATORY_LIMIT):
+        """
+        Parameters:
+        timeout (float, optional): Wall-clock seconds a query may run. None disables it.
+        max_rows (int, optional): Maximum rows a query may return. None disables it.
+        max_bytes (int, optional): Maximum size of a result in bytes. None disables it.
+        exploratory_limit (int, optional): LIMIT appended to SELECTs without one. None disables it.
+        """
+        self.timeout = timeout
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.exploratory_limit = exploratory_limit
+
+
+DEFAULT_LIMITS = QueryLimits()
+
+_limits = weakref.WeakKeyDictionary()
+_limits_lock = threading.Lock()
+
+
+def set_query_limits(engine, limits):
+    """
+    Sets the limits applied to queries run on an engine by the SQL tools.
+    """
+    with _limits_lock:
+        _limits[engine] = limits
+
+
+def get_query_limits(engine):
+    """
+    Returns the engine's QueryLimits, DEFAULT_LIMITS unless set_query_limits was called.
+    """
+    with _limits_lock:
+        return _limits.get(engine, DEFAULT_LIMITS)
+
+
+def inject_limit(query, limit, dialect_name):
+    """
+    Appends `LIMIT limit` to an exploratory SELECT, one without a row limit of its own.
+
+    Subqueries are ignored when looking for an existing LIMIT, FETCH or TOP. Queries in
+    dialects without LIMIT syntax are returned unchanged.
+
+    Parameters:
+    query (str): The SQL query.
+    limit (int): The row limit to add.
+    dialect_name (str): engine.dialect.name.
+
+    Returns:
+    str: The query, with a LIMIT clause if one was added.
+    """
+    if not limit or dialect_name not in LIMIT_DIALECTS:
+        return query
+    query = query.strip().rstrip(";").rstrip()
+    top_level = _strip_sql(query)
+    if not _SELECT_RE.match(top_level):
+        return query
+    while True:
+        collapsed = _PARENTHESES_RE.sub(" ", top_level)
+        if collapsed == top_level:
+            break
+        top_level = collapsed
+    if _ROW_LIMIT_RE.search(top_level):
+        return query
+    return f"{query} LIMIT {int(limit)}"
+
+
+def _sqlite_guard(dbapi_connection, deadline, token):
+    def progress():
+        # A non-zero return value interrupts the running statement
+        return int(time.monotonic() >= deadline or (token is not None and token.cancelled))
+
+    dbapi_connection.set_progress_handler(progress, SQLITE_PROGRESS_STEPS)
+    return lambda: dbapi_connection.set_progress_handler(None, SQLITE_PROGRESS_STEPS)
+
+
+@contextmanager
+def governed_connection(engine, timeout=None, token=None):
+    """
+    Opens a connection whose statements are stopped after timeout seconds or when token
+    is cancelled.
+
+    SQLite uses a progress handler that interrupts the running statement. PostgreSQL
+    and MySQL get a server-side statement timeout, and cancellation calls the driver's
+    cancel(). Other databases rely on the checks between fetched batches in
+    governed_read.
+
+    Parameters:
+    engine (Engine): SQLAlchemy engine object.
+    timeout (float, optional): Seconds a statement may run.
+    token (CancellationToken, optional): Cancels the running statement.
+
+    Yields:
+    Connection: The SQLAlchemy connection.
+    """
+    dialect = engine.dialect.name
+    deadline = time.monotonic() + timeout if timeout else float("inf")
+    with engine.connect() as conn:
+        dbapi_connection = conn.connection.dbapi_connection
+        cleanups = []
+        try:
+            if dialect == "sqlite":
+                cleanups.append(_sqlite_guard(dbapi_connection, deadline, token))
+            elif timeout and dialect == "postgresql":
+                conn.exec_driver_sql(f"SET statement_timeout = {int(timeout * 1000)}")
+                cleanups.append(lambda: conn.exec_driver_sql("RESET statement_timeout"))
+            elif timeout and dialect in ("mysql", "mariadb"):
+                variable = "max_execution_time" if dialect == "mysql" else "max_statement_time"
+                value = int(timeout * 1000) if dialect == "mysql" else timeout
+                conn.exec_driver_sql(f"SET SESSION {variable} = {value}")
+                cleanups.append(lambda: conn.exec_driver_sql(f"SET SESSION {variable} = DEFAULT"))
+            if token is not None:
+                if dialect == "sqlite":
+                    cancel = dbapi_connection.interrupt
+                else:
+                    cancel = getattr(dbapi_connection, "cancel", lambda: None)
+                cleanups.append(token.register(cancel))
+            yield conn
+        finally:
+            for cleanup in reversed(cleanups):
+                try:
+                    cleanup()
+                except Exception:
+                    # The connection is being discarded anyway if it is broken
+                    pass
+
+
+def _check(limits, started, token):
+    if token is not None:
+        token.raise_if_cancelled()
+    if limits.timeout and time.monotonic() - started >= limits.timeout:
+        raise QueryGovernorError("timeout", f"The query ran longer than the {limits.timeout:g}s limit and was stopped.",
+                                 limits.timeout)
+
+
+def governed_read(engine, query, head=None, limits=None, token=None, on_batch=None):
+    """
+    Runs a generated SQL query under the engine's QueryLimits.
+
+    Exploratory SELECTs get a LIMIT, the statement runs on a governed_connection and the
+    result is streamed in batches, checking the row, byte, time and cancellation limits
+    after every batch. With on_batch no rows are kept, so no LIMIT is added and max_rows,
+    the timeout and cancellation bound the read.
+
+    Parameters:
+    engine (Engine): SQLAlchemy engine object.
+    query (str): The SQL query to execute.
+    head (int, optional): Read only the first head rows instead of the whole result.
+    limits (QueryLimits, optional): Defaults to get_query_limits(engine).
+    token (CancellationToken, optional): Cancels the query.
+    on_batch (callable, optional): Consumes the result instead: called with each Arrow
+                                   batch, which is then dropped, so the byte limit does not
+                                   apply and reaching max_rows ends the read (result.truncated).
+
+    Returns:
+    tuple: (pandas.DataFrame, QueryResult) - the rows and the spent result handle with
+           its rows_read and bytes_read counters. The rows are None with on_batch.
+
+    Raises:
+    QueryGovernorError: If a limit was exceeded or the query was cancelled.
+    """
+    limits = limits or get_query_limits(engine)
+    if on_batch is None:
+        query = inject_limit(query, limits.exploratory_limit, engine.dialect.name)
+    started = time.monotonic()
+    if token is not None:
+        token.raise_if_cancelled()
+    try:
+        with governed_connection(engine, limits.timeout, token) as conn, \
+                open_query(engine, query, max_rows=limits.max_rows, connection=conn) as result:
+            if head is not None:
+                data = result.head(head)
+                _check(limits, started, token)
+                return data, result
+            if on_batch is not None:
+                for batch in result.iter_batches():
+                    _check(limits, started, token)
+                    on_batch(batch)
+                _check(limits, started, token)
+                return None, result
+
+            def check_batch(batch):
+                _check(limits, started, token)
+                if limits.max_bytes and result.bytes_read > limits.max_bytes:
+                    raise QueryGovernorError(
+                        "max_bytes", f"The query result exceeded the {limits.max_bytes:,} byte limit. "
+                                     "Select fewer columns or aggregate the data.", limits.max_bytes)
+
+            table = result.to_arrow(on_batch=check_batch)
+            if result.truncated:
+                raise QueryGovernorError(
+                    "max_rows", f"The query returned more than {limits.max_rows:,} rows. "
+                                "Add a LIMIT or aggregate the data.", limits.max_rows)
+            return table.to_pandas(), result
+    except QueryGovernorError:
+        raise
+    except Exception:
+        # An interrupted statement surfaces as a driver error
+        if token is not None and token.cancelled:
+            raise QueryGovernorError("cancelled", "The query was cancelled.")
+        if limits.timeout and time.monotonic() - started >= limits.timeout:
+            raise QueryGovernorError("timeout", f"The query ran longer than the {limits.timeout:g}s limit and was stopped.",
+                                     limits.timeout)
+        raise
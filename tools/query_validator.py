@@ -0,0 +1,147 @@
+import re
+
+from sqlalchemy.sql import text
+
+from project_utils.tracing import get_tracer, VALIDATION
+
+# Statements that may start a read-only query.
+READ_ONLY_LEADING_KEYWORDS = {"SELECT", "WITH", "VALUES"}
+
+# Keywords that change data or schema. Matched as whole words outside of string
+# literals and comments. REPLACE is handled separately because REPLACE(...) is
+# also a harmless string function.
+WRITE_KEYWORDS = {
+    "INSERT", "UPDATE", "DELETE", "MERGE", "UPSERT",
+    "CREATE", "ALTER", "DROP", "TRUNCATE", "RENAME",
+    "GRANT", "REVOKE", "ATTACH", "DETACH", "PRAGMA", "VACUUM", "REINDEX",
+    "ANALYZE", "CALL", "EXEC", "EXECUTE", "COPY", "LOCK",
+}
+
+_COMMENT_RE = re.compile(r"--[^\n]*|/\*.*?\*/", re.DOTALL)
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'")
+_IDENTIFIER_RE = re.compile(r'"(?:[^"]|"")*"|`[^`]*`|\[[^\]]*\]')
+_WORD_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+
+
+def _strip_sql(query):
+    """
+    Removes comments, string literals and quoted identifiers so that keyword checks
+    only see SQL syntax.
+    """
+    stripped = _COMMENT_RE.sub(" ", query)
+    stripped = _LITERAL_RE.sub("''", stripped)
+    stripped = _IDENTIFIER_RE.sub('""', stripped)
+    return stripped
+
+
+def check_read_only(query):
+    """
+    Parse-level check that a query only reads data.
+
+    Parameters:
+        query (str): The SQL query to inspect.
+
+    Returns:
+        str or None: None if the query is a single read-only statement, otherwise
+                     the reason it was rejected.
+    """
+    stripped = _strip_sql(query).strip()
+    statements = [s for s in stripped.split(";") if s.strip()]
+    if not statements:
+        return "Query is empty."
+    if len(statements) > 1:
+        return "Only a single statement is allowed."
+
+    words = _WORD_RE.findall(statements[0])
+    if not words or words[0].upper() not in READ_ONLY_LEADING_KEYWORDS:
+        return f"Only SELECT queries are allowed, got '{words[0] if words else statements[0]}'."
+
+    for match in _WORD_RE.finditer(statements[0]):
+        word = match.group(0).upper()
+        if word in WRITE_KEYWORDS:
+            return f"Statements that modify data or schema are not allowed ({word})."
+        if word == "REPLACE" and not statements[0][match.end():].lstrip().startswith("("):
+            return "Statements that modify data or schema are not allowed (REPLACE)."
+    return None
+
+
+def _explain_sqlite(conn, query):
+    rows = conn.execute(text(f"EXPLAIN QUERY PLAN {query}")).fetchall()
+    plan = [row[-1] for row in rows]
+    # "SCAN orders" is a full table scan; "SCAN orders USING INDEX ..." walks an index.
+    full_scans = [step for step in plan if step.startswith("SCAN ") and " USING " not in step]
+    return plan, full_scans
+
+
+def _explain_postgresql(conn, query):
+    rows = conn.execute(text(f"EXPLAIN {query}")).fetchall()
+    plan = [row[0] for row in rows]
+    full_scans = [step.strip() for step in plan if "Seq Scan on" in step]
+    return plan, full_scans
+
+
+def _explain_mysql(conn, query):
+    result = conn.execute(text(f"EXPLAIN {query}"))
+    keys = list(result.keys())
+    plan, full_scans = [], []
+    for row in result.fetchall():
+        step = dict(zip(keys, row))
+        plan.append(str(step))
+        if str(step.get("type", "")).upper() == "ALL":
+            full_scans.append(f"SCAN {step.get('table')}")
+    return plan, full_scans
+
+
+def _explain_generic(conn, query):
+    rows = conn.execute(text(f"EXPLAIN {query}")).fetchall()
+    return [" ".join(str(col) for col in row) for row in rows], []
+
+
+EXPLAINERS = {
+    "sqlite": _explain_sqlite,
+    "postgresql": _explain_postgresql,
+    "mysql": _explain_mysql,
+    "mariadb": _explain_mysql,
+}
+
+
+def validate_query(engine, query):
+    """
+    Validates a SQL query without executing it.
+
+    The query is first checked at the parse level to be a single read-only
+    statement, then compiled by the database through a dialect-specific EXPLAIN
+    (EXPLAIN QUERY PLAN on SQLite). The statement itself is never run.
+
+    Parameters:
+        engine (Engine): SQLAlchemy engine object.
+        query (str): The SQL query to validate.
+
+    Returns:
+        dict: {"valid": bool, "error": str or None, "plan": list of plan steps,
+               "full_scans": list of plan steps that scan a whole table}.
+    """
+    result = {"valid": False, "error": None, "plan": [], "full_scans": []}
+    if not query or not isinstance(query, str):
+        result["error"] = "Query must be a non-empty string."
+        return result
+
+    query = query.strip().rstrip(";")
+    error = check_read_only(query)
+    if error:
+        result["error"] = error
+        return result
+
+    explain = EXPLAINERS.get(engine.dialect.name, _explain_generic)
+    with get_tracer().span(VALIDATION, dialect=engine.dialect.name) as span:
+        try:
+            with engine.connect() as conn:
+                plan, full_scans = explain(conn, query)
+        except Exception as e:
+            result["error"] = str(e)
+            span.set(valid=False)
+            return result
+        span.set(valid=True, full_scans=len(full_scans))
+
+    result.update(valid=True, plan=plan, full_scans=full_scans)
+    return result
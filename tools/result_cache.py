@@ -0,0 +1,331 @@
+import copy
+import json
+import os
+import re
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from urllib.parse import unquote
+
+from project_utils.tracing import get_tracer
+from tools.query_validator import check_read_only
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_TTL = 300
+
+# Functions whose result changes between calls; queries using them are never cached.
+NON_DETERMINISTIC_FUNCTIONS = {
+    "random", "rand", "randomblob", "uuid", "gen_random_uuid", "newid", "now",
+    "current_timestamp", "current_date", "current_time", "localtime", "localtimestamp",
+    "sysdate", "getdate", "clock_timestamp", "statement_timestamp", "changes",
+    "last_insert_rowid", "total_changes",
+}
+# SQLite date functions are non-deterministic when given 'now'.
+_NOW_LITERAL_RE = re.compile(r"'now'", re.IGNORECASE)
+
+_TOKEN_RE = re.compile(
+    r"""
+    (?P<comment>--[^\n]*|/\*.*?\*/)
+    | (?P<string>'(?:[^']|'')*')
+    | (?P<quoted>"(?:[^"]|"")*"|`[^`]*`|\[[^\]]*\])
+    | (?P<number>\b\d+(?:\.\d*)?(?:[eE][+-]?\d+)?\b|\B\.\d+(?:[eE][+-]?\d+)?\b)
+    | (?P<word>[A-Za-z_][A-Za-z0-9_$]*)
+    | (?P<space>\s+)
+    | (?P<other>.)
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+_TABLE_RE = re.compile(r"\b(?:from|join)\s+([a-z_][a-z0-9_$]*|\"[^\"]+\")", re.IGNORECASE)
+# Target of INSERT/REPLACE INTO, UPDATE [OR ...] and CREATE/ALTER/DROP TABLE, schema prefix skipped.
+_WRITE_TARGET_RE = re.compile(
+    r"\b(?:into|update(?:\s+or\s+[a-z]+)?|table(?:\s+if\s+(?:not\s+)?exists)?)\s+"
+    r"(?:(?:[a-z_][a-z0-9_$]*|\"[^\"]+\")\s*\.\s*)?([a-z_][a-z0-9_$]*|\"[^\"]+\")",
+    re.IGNORECASE,
+)
+
+
+def _canonical_number(literal):
+    # Only formatting noise is removed (10.50 -> 10.5); 10 and 10.0 are kept apart
+    # because they do not always produce the same column type.
+    if "." in literal and "e" not in literal.lower():
+        whole, fraction = literal.split(".")
+        literal = f"{whole or '0'}.{fraction.rstrip('0') or '0'}"
+    return literal
+
+
+# Tokens that need a separating space when adjacent to one another.
+_SPACED_KINDS = {"word", "number", "string", "quoted"}
+
+
+def normalize_sql(query):
+    """
+    Canonical form of a query for cache keys.
+
+    Comments are dropped, whitespace is collapsed, keywords and unquoted identifiers
+    are lowercased (SQL is case-insensitive for them) and numeric literal formatting
+    is canonicalized. String literals and quoted identifiers are kept verbatim since
+    their contents are significant. A trailing semicolon is ignored.
+
+    Parameters:
+    query (str): The SQL query.
+
+    Returns:
+    str: The normalized query.
+    """
+    parts = []
+    previous_kind = None
+    for match in _TOKEN_RE.finditer(query):
+        kind = match.lastgroup
+        if kind in ("comment", "space"):
+            continue
+        token = match.group(0)
+        if kind == "word":
+            token = token.lower()
+        elif kind == "number":
+            token = _canonical_number(token)
+        if previous_kind in _SPACED_KINDS and kind in _SPACED_KINDS:
+            parts.append(" ")
+        parts.append(token)
+        previous_kind = kind
+    while parts and parts[-1] == ";":
+        parts.pop()
+    return "".join(parts)
+
+
+def is_cacheable(query):
+    """
+    Returns False for queries that call non-deterministic functions (RANDOM(), NOW(),
+    date('now'), ...), whose results must not be reused.
+    """
+    normalized = normalize_sql(query)
+    if _NOW_LITERAL_RE.search(normalized):
+        return False
+    words = set(re.findall(r"[a-z_][a-z0-9_]*", re.sub(r"'(?:[^']|'')*'", "''", normalized)))
+    return not (words & NON_DETERMINISTIC_FUNCTIONS)
+
+
+def referenced_tables(query):
+    """
+    Returns the lowercase names of tables referenced after FROM or JOIN.
+    """
+    return {name.strip('"').lower() for name in _TABLE_RE.findall(_TOKEN_RE.sub(
+        lambda m: " " if m.lastgroup == "comment" else m.group(0), query))}
+
+
+def written_tables(query):
+    """
+    Returns the lowercase names of tables a writing statement may change.
+    """
+    stripped = _TOKEN_RE.sub(lambda m: " " if m.lastgroup == "comment" else m.group(0), query)
+    return referenced_tables(query) | {name.strip('"').lower() for name in _WRITE_TARGET_RE.findall(stripped)}
+
+
+def _result_size(data):
+    if hasattr(data, "memory_usage"):
+        return int(data.memory_usage(deep=True).sum())
+    return len(json.dumps(data, default=str))
+
+
+def _copy(data):
+    return data.copy() if hasattr(data, "memory_usage") else copy.deepcopy(data)
+
+
+def database_fingerprint(engine):
+    """
+    Cheap token that changes whenever the database content may have changed.
+
+    For file-backed SQLite, `file:` URIs included, this is the modification time and
+    size of the database file and its WAL file, which every committed write touches.
+    `PRAGMA data_version` is not used because it is per connection and pooled
+    connections would disagree. In-memory SQLite and other databases return None, and
+    their results are not cached.
+
+    Parameters:
+    engine (Engine): SQLAlchemy engine object.
+
+    Returns:
+    tuple or None: The fingerprint.
+    """
+    if engine.dialect.name != "sqlite":
+        return None
+    path = engine.url.database
+    if path and path.startswith("file:"):
+        # file:/path/to.db?mode=ro&immutable=1
+        path = unquote(path[len("file:"):].split("?", 1)[0])
+        if path.startswith("//"):
+            path = path[len("//"):]
+    if not path or path == ":memory:" or not os.path.exists(path):
+        return None
+    parts = []
+    for candidate in (path, f"{path}-wal"):
+        try:
+            stat = os.stat(candidate)
+            parts.append((stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            parts.append(None)
+    return tuple(parts)
+
+
+class QueryResultCache:
+    """
+    LRU cache of query results bounded by their size in bytes.
+
+    Keys are the normalized SQL; each entry remembers the database fingerprint it was
+    read under and the tables it references, so entries go stale when the database
+    changes and can be dropped per table.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, ttl=DEFAULT_TTL):
+        """
+        Parameters:
+        max_bytes (int): Maximum total size of cached results.
+        ttl (float, optional): Seconds an entry stays valid. None keeps entries until
+                               evicted or invalidated.
+        """
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, query, fingerprint, variant=None):
+        """
+        Returns a copy of the cached result for query, or None on a miss.
+
+        Parameters:
+        query (str): The SQL query.
+        fingerprint: The current database_fingerprint.
+        variant (hashable, optional): Distinguishes results of the same query read
+                                      differently, e.g. with another row cap.
+        """
+        key = (normalize_sql(query), variant)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                data, entry_fingerprint, _, expires_at, _ = entry
+                if entry_fingerprint == fingerprint and (expires_at is None or expires_at > now):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return _copy(data)
+                self._drop(key)
+            self.misses += 1
+            return None
+
+    def set(self, query, fingerprint, data, variant=None):
+        """
+        Caches a result: a DataFrame, or JSON-serializable data such as a result summary.
+        Results larger than max_bytes are not cached.
+        """
+        size = _result_size(data)
+        if size > self.max_bytes:
+            return
+        key = (normalize_sql(query), variant)
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (_copy(data), fingerprint, referenced_tables(query), expires_at, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+
+    def _drop(self, key):
+        entry = self._entries.pop(key)
+        self.bytes -= entry[4]
+
+    def invalidate_table(self, table):
+        """
+        Drops every cached result that reads from the given table.
+        """
+        table = table.lower()
+        with self._lock:
+            for key in [k for k, entry in self._entries.items() if table in entry[2]]:
+                self._drop(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        """
+        Returns:
+        dict: Hit and miss counters, entry count and cached bytes.
+        """
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries), "bytes": self.bytes}
+
+
+_caches = weakref.WeakKeyDictionary()
+_caches_lock = threading.Lock()
+
+
+def get_result_cache(engine):
+    """
+    Returns the QueryResultCache attached to the engine, creating it on first use.
+    """
+    with _caches_lock:
+        cache = _caches.get(engine)
+        if cache is None:
+            cache = QueryResultCache()
+            _caches[engine] = cache
+        return cache
+
+
+def cached_result(engine, query, variant, compute):
+    """
+    Returns the result of compute() for query, served from the engine's result cache
+    when the database has not changed since it was stored.
+
+    Queries calling non-deterministic functions, and queries on databases without a
+    database_fingerprint, always run. Statements that write run and drop the cached
+    results of the tables they change.
+
+    Parameters:
+    engine (Engine): SQLAlchemy engine object.
+    query (str): The SQL query compute() runs.
+    variant (hashable): How the result is read, part of the cache key.
+    compute (callable): Runs the query and returns a DataFrame or JSON-serializable data.
+
+    Returns:
+    The (possibly cached) result.
+    """
+    if check_read_only(query) is not None:
+        try:
+            return compute()
+        finally:
+            invalidate_written_tables(engine, query)
+    if not is_cacheable(query):
+        return compute()
+    fingerprint = database_fingerprint(engine)
+    if fingerprint is None:
+        # Without a fingerprint a change by another client would go unnoticed until the TTL
+        return compute()
+    cache = get_result_cache(engine)
+    data = cache.get(query, fingerprint, variant)
+    if data is not None:
+        get_tracer().count("sql_result_cache_hits")
+        return data
+    data = compute()
+    cache.set(query, fingerprint, data, variant)
+    return data
+
+
+def invalidate_written_tables(engine, query):
+    """
+    Drops the engine's cached results of every table a writing statement may change,
+    or all of them when the statement names no table.
+    """
+    with _caches_lock:
+        cache = _caches.get(engine)
+    if cache is None:
+        return
+    tables = written_tables(query)
+    if not tables:
+        cache.clear()
+    for table in tables:
+        cache.invalidate_table(table)
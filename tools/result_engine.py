@@ -0,0 +1,233 @@
+import pyarrow as pa
+import pyarrow.compute as pc
+from sqlalchemy.sql import text
+
+DEFAULT_MAX_ROWS = 100_000
+DEFAULT_BATCH_SIZE = 10_000
+
+
+def _to_arrow_array(values):
+    """
+    Converts one column of a fetched batch to an Arrow array. SQLite columns can mix
+    types, in which case the column falls back to strings.
+    """
+    try:
+        return pa.array(values)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return pa.array([None if value is None else str(value) for value in values], type=pa.string())
+
+
+class QueryResult:
+    """
+    Lazy handle over the result set of a single query execution.
+
+    Nothing runs until the first access. Rows are then pulled with fetchmany in
+    batches and converted column-wise into Arrow record batches, so callers that only
+    need the head or a running aggregate never hold the full result in memory. The
+    statement is executed once; batches are streamed in a single pass.
+
+    Use as a context manager, or call close(), to release the connection early.
+    """
+
+    def __init__(self, engine, query, max_rows=DEFAULT_MAX_ROWS, batch_size=DEFAULT_BATCH_SIZE, connection=None):
+        """
+        Parameters:
+        engine (Engine): SQLAlchemy engine object.
+        query (str): The SQL query to execute.
+        max_rows (int, optional): Maximum number of rows read. None reads everything.
+        batch_size (int, optional): Number of rows fetched per round trip.
+        connection (Connection, optional): Open connection to run the query on, e.g. a
+                                           governed one. It is left open by close().
+        """
+        self.engine = engine
+        self.query = query
+        self.max_rows = max_rows
+        self.batch_size = batch_size
+        self.columns = None
+        self.rows_read = 0
+        self.bytes_read = 0
+        self.truncated = False
+        self._conn = None
+        self._connection = connection
+        self._result = None
+        self._buffered = []
+        self._exhausted = False
+        self._streamed = False
+        self._table = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _open(self):
+        if self._conn is not None or self._exhausted:
+            return
+        self._conn = self._connection if self._connection is not None else self.engine.connect()
+        try:
+            self._result = self._conn.execution_options(stream_results=True).execute(text(self.query))
+        except Exception:
+            self.close()
+            raise
+        self.columns = list(self._result.keys())
+
+    def _fetch_batch(self):
+        """
+        Reads the next batch from the cursor, or returns None when the result is exhausted.
+        """
+        self._open()
+        if self._exhausted:
+            return None
+
+        size = self.batch_size
+        if self.max_rows is not None:
+            size = min(size, self.max_rows - self.rows_read)
+        rows = self._result.fetchmany(size) if size > 0 else []
+        if not rows:
+            if size <= 0 and self._result.fetchone() is not None:
+                self.truncated = True
+            self.close()
+            return None
+
+        self.rows_read += len(rows)
+        arrays = [_to_arrow_array(list(values)) for values in zip(*rows)]
+        batch = pa.RecordBatch.from_arrays(arrays, names=self.columns)
+        self.bytes_read += batch.nbytes
+        return batch
+
+    def _empty_table(self):
+        return pa.Table.from_arrays([pa.array([], type=pa.null()) for _ in self.columns], names=self.columns)
+
+    def head(self, n=5):
+        """
+        Returns the first n rows, reading only as many batches as needed.
+
+        Returns:
+        pandas.DataFrame: Up to n rows.
+        """
+        if self._table is not None:
+            return self._table.slice(0, n).to_pandas()
+        while sum(batch.num_rows for batch in self._buffered) < n:
+            batch = self._fetch_batch()
+            if batch is None:
+                break
+            self._buffered.append(batch)
+        if not self._buffered:
+            self._open()
+            return self._empty_table().to_pandas()
+        return pa.Table.from_batches(self._buffered).slice(0, n).to_pandas()
+
+    def iter_batches(self):
+        """
+        Streams the result as Arrow record batches. Rows already buffered by head() are
+        yielded first; the rest are read from the cursor as the caller consumes them.
+
+        Yields:
+        pyarrow.RecordBatch: The next batch of rows.
+
+        Raises:
+        RuntimeError: If the result has already been streamed.
+        """
+        if self._table is not None:
+            yield from self._table.to_batches()
+            return
+        if self._streamed:
+            raise RuntimeError("Query result has already been streamed.")
+        self._streamed = True
+        while self._buffered:
+            yield self._buffered.pop(0)
+        while True:
+            batch = self._fetch_batch()
+            if batch is None:
+                return
+            yield batch
+
+    def to_arrow(self, on_batch=None):
+        """
+        Materializes the (row-capped) result as an Arrow table.
+
+        Parameters:
+        on_batch (callable, optional): Called with each batch as it is read, e.g. to
+                                       enforce limits; raising stops the read.
+
+        Returns:
+        pyarrow.Table: All rows read, up to max_rows.
+        """
+        if self._table is None:
+            tables = []
+            for batch in self.iter_batches():
+                tables.append(pa.Table.from_batches([batch]))
+                if on_batch is not None:
+                    on_batch(batch)
+            if tables:
+                # Batches of a dynamically typed column can disagree (int64 vs double)
+                self._table = pa.concat_tables(tables, promote_options="default")
+            else:
+                self._open()
+                self._table = self._empty_table()
+        return self._table
+
+    def to_pandas(self):
+        """
+        Materializes the (row-capped) result as a DataFrame.
+
+        Returns:
+        pandas.DataFrame: All rows read, up to max_rows.
+        """
+        return self.to_arrow().to_pandas()
+
+    def aggregate(self):
+        """
+        Computes per-column row counts, null counts and, for numeric columns, min, max
+        and sum while streaming, without keeping the rows.
+
+        Returns:
+        dict: {"rows": int, "columns": {name: {"nulls", "min", "max", "sum"}}}.
+        """
+        stats = {}
+        rows = 0
+        for batch in self.iter_batches():
+            rows += batch.num_rows
+            for name, column in zip(batch.schema.names, batch.columns):
+                column_stats = stats.setdefault(name, {"nulls": 0, "min": None, "max": None, "sum": None})
+                column_stats["nulls"] += column.null_count
+                if not (pa.types.is_integer(column.type) or pa.types.is_floating(column.type)):
+                    continue
+                min_max = pc.min_max(column).as_py()
+                total = pc.sum(column).as_py()
+                if min_max["min"] is not None:
+                    column_stats["min"] = min_max["min"] if column_stats["min"] is None else min(column_stats["min"], min_max["min"])
+                    column_stats["max"] = min_max["max"] if column_stats["max"] is None else max(column_stats["max"], min_max["max"])
+                    column_stats["sum"] = total if column_stats["sum"] is None else column_stats["sum"] + total
+        return {"rows": rows, "columns": stats}
+
+    def close(self):
+        """
+        Releases the cursor and connection.
+        """
+        self._exhausted = True
+        if self._result is not None:
+            self._result.close()
+            self._result = None
+        if self._conn is not None:
+            if self._conn is not self._connection:
+                self._conn.close()
+            self._conn = None
+
+
+def open_query(engine, query, max_rows=DEFAULT_MAX_ROWS, batch_size=DEFAULT_BATCH_SIZE, connection=None):
+    """
+    Returns a lazy QueryResult handle for the query.
+
+    Parameters:
+        engine (Engine): SQLAlchemy engine object.
+        query (str): The SQL query to execute.
+        max_rows (int, optional): Maximum number of rows read.
+        batch_size (int, optional): Number of rows fetched per round trip.
+        connection (Connection, optional): Open connection to run the query on.
+
+    Returns:
+        QueryResult: The lazy result handle.
+    """
+    return QueryResult(engine, query, max_rows=max_rows, batch_size=batch_size, connection=connection)
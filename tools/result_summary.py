@@ -0,0 +1,298 @@
+import datetime
+import math
+import re
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+DEFAULT_TOP_K = 3
+# Results with at most this many rows are listed row by row instead of summarized.
+DEFAULT_SAMPLE_ROWS = 5
+# Columns beyond this are counted but not described.
+DEFAULT_MAX_COLUMNS = 20
+DEFAULT_MAX_CHARS = 1200
+# Distinct values counted per text column. Past this the rarest are dropped, so the
+# top values and the distinct count become approximate but memory stays bounded.
+MAX_TRACKED_VALUES = 10_000
+# Text columns are treated as dates when this share of the sampled values look like dates.
+DATE_SHARE = 0.9
+DATE_SAMPLE = 50
+MAX_VALUE_CHARS = 40
+
+_DATE_RE = re.compile(r"^\d{4}-\d{1,2}-\d{1,2}(?:[ T]\d{1,2}:\d{2}(?::\d{2}(?:\.\d+)?)?)?(?:Z|[+-]\d{2}:?\d{2})?$"
+                      r"|^\d{1,2}/\d{1,2}/\d{2,4}$")
+
+
+def _plain(value):
+    """
+    Converts a cell to a JSON-serializable Python value.
+    """
+    if value is None or value is pd.NaT:
+        return None
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if isinstance(value, (datetime.date, datetime.datetime, pd.Timestamp)):
+        return value.isoformat()
+    if isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+
+def _plain_date(value):
+    value = pd.Timestamp(value)
+    return value.date().isoformat() if value == value.normalize() else value.isoformat()
+
+
+def _format_number(value):
+    if isinstance(value, bool):
+        return str(value)
+    if isinstance(value, int):
+        return f"{value:,}"
+    if value.is_integer() and abs(value) < 1e15:
+        return f"{int(value):,}"
+    return f"{value:,.2f}" if abs(value) >= 1 else f"{value:.4g}"
+
+
+def _format_value(value):
+    if value is None:
+        return "NULL"
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return f"{value:,}"
+    text = str(value)
+    return text if len(text) <= MAX_VALUE_CHARS else text[:MAX_VALUE_CHARS - 3] + "..."
+
+
+def _column_kind(values):
+    """
+    Classifies the non-null values of a column: "numeric", "date", "boolean" or "text".
+    """
+    if pd.api.types.is_bool_dtype(values):
+        return "boolean"
+    if pd.api.types.is_numeric_dtype(values):
+        return "numeric"
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return "date"
+    sample = values.iloc[:DATE_SAMPLE]
+    if sample.map(lambda value: isinstance(value, datetime.date)).all():
+        return "date"
+    if sample.astype(str).str.match(_DATE_RE).mean() >= DATE_SHARE:
+        return "date"
+    return "text"
+
+
+class _ColumnStats:
+    """
+    Running statistics of one result column, updated a batch at a time.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.kind = None
+        self.count = 0
+        self.nulls = 0
+        self.integer = True
+        self.min = None
+        self.max = None
+        self.sum = 0.0
+        self.values = Counter()
+        self.approximate = False
+
+    def update(self, series):
+        values = series.dropna()
+        self.nulls += len(series) - len(values)
+        self.count += len(values)
+        if values.empty:
+            return
+        if self.kind is None:
+            self.kind = _column_kind(values)
+
+        if self.kind == "numeric":
+            # A dynamically typed (SQLite) column can turn into text in a later batch
+            numbers = pd.to_numeric(values, errors="coerce").dropna()
+            if numbers.empty:
+                return
+            self.integer = self.integer and pd.api.types.is_integer_dtype(numbers)
+            array = numbers.to_numpy(dtype=np.float64)
+            self._extend(array.min(), array.max())
+            self.sum += array.sum()
+        elif self.kind == "date":
+            if not pd.api.types.is_datetime64_any_dtype(values):
+                values = pd.to_datetime(values.astype(str), errors="coerce", format="mixed")
+            values = values.dropna()
+            if not values.empty:
+                self._extend(values.min(), values.max())
+        else:
+            self.values.update(values.astype(str).value_counts().to_dict())
+            if len(self.values) > MAX_TRACKED_VALUES:
+                self.values = Counter(dict(self.values.most_common(MAX_TRACKED_VALUES // 2)))
+                self.approximate = True
+
+    def _extend(self, low, high):
+        self.min = low if self.min is None else min(self.min, low)
+        self.max = high if self.max is None else max(self.max, high)
+
+    def to_dict(self, top_k):
+        total = self.count + self.nulls
+        stats = {"name": self.name, "type": self.kind or "empty", "count": self.count,
+                 "null_rate": round(self.nulls / total, 4) if total else 0.0}
+        if self.kind == "numeric" and self.min is not None:
+            convert = int if self.integer else float
+            stats.update(min=convert(self.min), max=convert(self.max), mean=round(self.sum / self.count, 4))
+        elif self.kind == "date" and self.min is not None:
+            stats.update(min=_plain_date(self.min), max=_plain_date(self.max))
+        elif self.kind in ("text", "boolean"):
+            stats["distinct"] = len(self.values)
+            stats["distinct_approximate"] = self.approximate
+            stats["top"] = [{"value": value, "count": count} for value, count in self.values.most_common(top_k)]
+        return stats
+
+
+class ResultSummarizer:
+    """
+    Compact description of a whole query result, built incrementally from streamed
+    batches.
+
+    Each batch is processed column-wise with vectorized pandas/NumPy operations and
+    folded into running statistics (counts, null rates, min/max/mean of numbers, date
+    ranges, most common values), so memory and the size of the summary stay bounded
+    however many rows the query returns. The first few rows are kept as a sample.
+    """
+
+    def __init__(self, top_k=DEFAULT_TOP_K, sample_rows=DEFAULT_SAMPLE_ROWS, max_columns=DEFAULT_MAX_COLUMNS):
+        """
+        Parameters:
+        top_k (int): Most common values reported per text column.
+        sample_rows (int): Leading rows kept; results this small are listed in full.
+        max_columns (int): Columns described; the rest are only counted.
+        """
+        self.top_k = top_k
+        self.sample_rows = sample_rows
+        self.max_columns = max_columns
+        self.rows = 0
+        self.columns = None
+        self.sample = []
+        self._stats = []
+
+    def update(self, batch):
+        """
+        Adds a batch of rows.
+
+        Parameters:
+        batch (pyarrow.RecordBatch, pyarrow.Table or pandas.DataFrame): The rows.
+        """
+        frame = batch.to_pandas() if isinstance(batch, (pa.RecordBatch, pa.Table)) else batch
+        if self.columns is None:
+            self.columns = [str(name) for name in frame.columns]
+            self._stats = [_ColumnStats(name) for name in self.columns[:self.max_columns]]
+        if len(self.sample) < self.sample_rows:
+            head = frame.iloc[:self.sample_rows - len(self.sample)]
+            self.sample.extend([_plain(value) for value in row] for row in head.itertuples(index=False))
+        self.rows += len(frame)
+        # By position: a result can repeat a column name
+        for position, stats in enumerate(self._stats):
+            stats.update(frame.iloc[:, position])
+
+    def summary(self, complete=True):
+        """
+        Returns the summary as JSON-serializable data.
+
+        Parameters:
+        complete (bool): False when the rows seen are only part of the result (row cap
+                         or LIMIT reached).
+
+        Returns:
+        dict: {"rows", "complete", "columns": [per-column stats], "omitted_columns",
+               "sample": leading rows as lists}.
+        """
+        columns = self.columns or []
+        return {
+            "rows": self.rows,
+            "complete": complete,
+            "columns": [stats.to_dict(self.top_k) for stats in self._stats],
+            "omitted_columns": len(columns) - len(self._stats),
+            "sample": self.sample,
+        }
+
+    def text(self, complete=True, max_chars=DEFAULT_MAX_CHARS):
+        """
+        Returns the summary as natural language (see render_summary).
+        """
+        return render_summary(self.summary(complete), max_chars)
+
+
+def summarize_dataframe(frame, **options):
+    """
+    Returns the ResultSummarizer.summary of a DataFrame held in memory.
+    """
+    summarizer = ResultSummarizer(**options)
+    summarizer.update(frame)
+    return summarizer.summary()
+
+
+def _describe_row(columns, row):
+    return ", ".join(f"{column['name'].replace('_', ' ')} is {_format_value(value)}"
+                     for column, value in zip(columns, row))
+
+
+def _describe_column(column):
+    name = column["name"].replace("_", " ")
+    if column["type"] == "numeric" and "min" in column:
+        if column["min"] == column["max"]:
+            sentence = f"{name} is always {_format_number(column['min'])}"
+        else:
+            sentence = (f"{name} ranges from {_format_number(column['min'])} to {_format_number(column['max'])} "
+                        f"(mean {_format_number(column['mean'])})")
+    elif column["type"] == "date" and "min" in column:
+        sentence = f"{name} spans {column['min']} to {column['max']}"
+    elif column.get("top"):
+        distinct = f"{'about ' if column['distinct_approximate'] else ''}{column['distinct']:,}"
+        common = ", ".join(f"{_format_value(item['value'])} ({item['count']:,})" for item in column["top"])
+        sentence = f"{name} has {distinct} distinct values, most often {common}"
+    else:
+        sentence = f"{name} is always empty"
+    if column["null_rate"] and column["count"]:
+        sentence += f", {column['null_rate']:.0%} missing"
+    return sentence
+
+
+def render_summary(summary, max_chars=DEFAULT_MAX_CHARS):
+    """
+    Describes a ResultSummarizer.summary in natural language of at most about max_chars.
+
+    A single row reads "column is value, ..."; small results are listed row by row;
+    larger ones are described column by column.
+    """
+    rows = summary["rows"]
+    columns = summary["columns"]
+    if rows == 0:
+        return "The query returned no results."
+    if rows == 1 and summary["complete"]:
+        return _describe_row(columns, summary["sample"][0])[:max_chars]
+
+    if summary["complete"]:
+        opening = f"The query returned {rows:,} rows"
+    else:
+        opening = f"The query returned more than {rows:,} rows; the first {rows:,} are described"
+    if rows <= len(summary["sample"]) and summary["complete"]:
+        sentences = [f"{opening}: " + "; ".join(_describe_row(columns, row) for row in summary["sample"]) + "."]
+    else:
+        sentences = [opening + "."]
+        for column in columns:
+            sentence = _describe_column(column)
+            sentences.append(sentence[0].upper() + sentence[1:] + ".")
+
+    text = sentences[0][:max_chars]
+    described = 0
+    for sentence in sentences[1:]:
+        if len(text) + len(sentence) + 1 > max_chars:
+            break
+        text += " " + sentence
+        described += 1
+    omitted = len(sentences) - 1 - described + summary["omitted_columns"]
+    if omitted:
+        text += f" ({omitted} more column{'s' if omitted > 1 else ''} not described.)"
+    return text
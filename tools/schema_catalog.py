@@ -0,0 +1,172 @@
+import hashlib
+import threading
+import time
+import weakref
+
+from sqlalchemy import inspect
+from sqlalchemy.sql import text
+
+from tools.schema_index import SchemaIndex, render_schema, DEFAULT_TOP_K
+from project_utils.tracing import get_tracer, SCHEMA_REFLECTION
+
+# One catalog per engine. Weak keys so a disposed engine takes its catalog with it.
+_catalogs = weakref.WeakKeyDictionary()
+_catalogs_lock = threading.Lock()
+
+
+class SchemaCatalog:
+    """
+    Cached view of a database schema.
+
+    The schema is reflected once and served from memory afterwards, together with a
+    pre-rendered string for the agent prompt. On SQLite the cache is validated against
+    `PRAGMA schema_version`, which SQLite bumps on every DDL statement, so staleness
+    costs one cheap pragma instead of a full reflection. Other dialects fall back to a
+    time-to-live and/or an explicit refresh().
+    """
+
+    def __init__(self, engine, ttl=300):
+        """
+        Parameters:
+        engine (Engine): SQLAlchemy engine object.
+        ttl (float, optional): Seconds before a non-SQLite catalog is reflected again.
+                               None disables expiry (use refresh() or invalidate()).
+        """
+        self.engine = engine
+        self.ttl = ttl
+        self._lock = threading.RLock()
+        self._metadata = None
+        self._comments = None
+        self._index = None
+        self._prompt = None
+        self._fingerprint = None
+        self._schema_version = None
+        self._loaded_at = 0.0
+
+    def _uses_schema_version(self):
+        return self.engine.dialect.name == "sqlite"
+
+    @staticmethod
+    def _read_schema_version(conn):
+        return conn.execute(text("PRAGMA schema_version")).scalar()
+
+    def _is_stale(self):
+        if self._metadata is None:
+            return True
+        if self._uses_schema_version():
+            with self.engine.connect() as conn:
+                return self._read_schema_version(conn) != self._schema_version
+        if self.ttl is None:
+            return False
+        return time.monotonic() - self._loaded_at > self.ttl
+
+    def refresh(self):
+        """
+        Reflects the schema now, replacing whatever is cached.
+
+        Returns:
+        dict: The freshly reflected metadata.
+        """
+        with self._lock, get_tracer().span(SCHEMA_REFLECTION, dialect=self.engine.dialect.name) as span:
+            with self.engine.connect() as conn:
+                schema_version = self._read_schema_version(conn) if self._uses_schema_version() else None
+                inspector = inspect(conn)
+                metadata = {}
+                comments = {}
+                for table in inspector.get_table_names():
+                    columns = inspector.get_columns(table)
+                    metadata[table] = [{"name": col["name"], "type": col["type"]} for col in columns]
+                    comments[table] = [col["comment"] for col in columns if col.get("comment")]
+
+            self._metadata = metadata
+            self._comments = comments
+            self._index = None
+            self._prompt = render_schema(metadata)
+            self._fingerprint = hashlib.sha256(self._prompt.encode("utf-8")).hexdigest()[:16]
+            self._schema_version = schema_version
+            self._loaded_at = time.monotonic()
+            span.set(tables=len(metadata))
+            return metadata
+
+    def invalidate(self):
+        """
+        Drops the cached schema so the next read reflects again.
+        """
+        with self._lock:
+            self._metadata = None
+
+    def _ensure_fresh(self):
+        with self._lock:
+            if self._is_stale():
+                self.refresh()
+
+    def metadata(self):
+        """
+        Returns:
+        dict: Table names mapped to lists of {"name", "type"} column details.
+        """
+        self._ensure_fresh()
+        return self._metadata
+
+    def tables(self):
+        """
+        Returns:
+        list: Table names present in the database.
+        """
+        return list(self.metadata())
+
+    def prompt_text(self, question=None, top_k=None, token_budget=None):
+        """
+        Parameters:
+        question (str, optional): If given together with top_k or token_budget, only the
+                                  tables relevant to the question are rendered.
+        top_k (int, optional): Maximum number of tables to render for the question.
+        token_budget (int, optional): Approximate token limit for the rendered tables.
+
+        Returns:
+        str: The schema rendered for the `{schema_info}` slot of the agent prompt.
+        """
+        self._ensure_fresh()
+        if question is None or (top_k is None and token_budget is None):
+            return self._prompt
+        return self._get_index().render(question, top_k=top_k or DEFAULT_TOP_K, token_budget=token_budget)
+
+    def index(self):
+        """
+        Returns:
+        SchemaIndex: The relevance index over the cached schema, built on first use.
+        """
+        self._ensure_fresh()
+        return self._get_index()
+
+    def _get_index(self):
+        with self._lock:
+            if self._index is None:
+                self._index = SchemaIndex(self._metadata, self._comments)
+            return self._index
+
+    def fingerprint(self):
+        """
+        Returns:
+        str: A short hash of the current schema, stable until the schema changes.
+        """
+        self._ensure_fresh()
+        return self._fingerprint
+
+
+def get_schema_catalog(engine):
+    """
+    Returns the SchemaCatalog attached to the engine, creating it on first use.
+
+    Parameters:
+        engine (Engine): SQLAlchemy engine object.
+
+    Returns:
+        SchemaCatalog: The shared catalog for this engine.
+    """
+    with _catalogs_lock:
+        catalog = _catalogs.get(engine)
+        if catalog is None:
+            catalog = SchemaCatalog(engine)
+            _catalogs[engine] = catalog
+        return catalog
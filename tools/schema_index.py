@@ -0,0 +1,148 @@
+import math
+import re
+from collections import Counter
+
+DEFAULT_TOP_K = 5
+
+# BM25 weights: how many times each part of a table description counts as a term.
+TABLE_NAME_WEIGHT = 3
+COLUMN_NAME_WEIGHT = 2
+COMMENT_WEIGHT = 1
+TYPE_WEIGHT = 1
+
+_SPLIT_RE = re.compile(r"[^0-9a-zA-Z]+")
+_CAMEL_RE = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+STOP_WORDS = {
+    "a", "an", "and", "are", "by", "for", "from", "how", "in", "is", "many", "me", "of",
+    "on", "or", "show", "the", "to", "was", "what", "which", "who", "with", "all", "list",
+}
+
+
+def tokenize(text, stop_words=STOP_WORDS):
+    """
+    Splits identifiers and free text into lowercase terms: snake_case and camelCase are
+    broken up and a trailing plural "s" is dropped so "orders" matches "order_id".
+
+    Parameters:
+    text (str): Text or identifier to tokenize.
+    stop_words (set, optional): Words left out.
+
+    Returns:
+    list: Terms in order of appearance.
+    """
+    terms = []
+    for word in _SPLIT_RE.split(_CAMEL_RE.sub(" ", str(text))):
+        word = word.lower()
+        if not word or word in stop_words:
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        terms.append(word)
+    return terms
+
+
+def estimate_tokens(text):
+    """
+    Rough token count (about four characters per token), good enough for budgeting.
+    """
+    return len(text) // 4 + 1
+
+
+def render_schema(metadata):
+    """
+    Renders schema metadata for the `{schema_info}` slot of the agent prompt.
+    """
+    return f"Database Schema:\n{metadata}\n"
+
+
+class SchemaIndex:
+    """
+    Offline BM25 index over table names, column names, column types and comments, used
+    to put only the tables relevant to a question into the prompt.
+    """
+
+    def __init__(self, metadata, comments=None, k1=1.5, b=0.75):
+        """
+        Parameters:
+        metadata (dict): Table names mapped to lists of {"name", "type"} column details.
+        comments (dict, optional): Table names mapped to lists of table/column comments.
+        k1 (float): BM25 term frequency saturation.
+        b (float): BM25 length normalization.
+        """
+        self.metadata = metadata
+        self.k1 = k1
+        self.b = b
+        comments = comments or {}
+
+        self._term_freqs = {}
+        self._lengths = {}
+        document_freqs = Counter()
+        for table, columns in metadata.items():
+            terms = tokenize(table) * TABLE_NAME_WEIGHT
+            for column in columns:
+                terms += tokenize(column["name"]) * COLUMN_NAME_WEIGHT
+                terms += tokenize(column["type"]) * TYPE_WEIGHT
+            for comment in comments.get(table, []):
+                terms += tokenize(comment) * COMMENT_WEIGHT
+            term_freqs = Counter(terms)
+            self._term_freqs[table] = term_freqs
+            self._lengths[table] = len(terms)
+            document_freqs.update(term_freqs.keys())
+
+        count = len(metadata)
+        self._avg_length = (sum(self._lengths.values()) / count) if count else 0
+        self._idf = {
+            term: math.log(1 + (count - freq + 0.5) / (freq + 0.5))
+            for term, freq in document_freqs.items()
+        }
+
+    def rank(self, question):
+        """
+        Scores every table against the question.
+
+        Parameters:
+        question (str): The user question.
+
+        Returns:
+        list: (table, score) pairs with a positive score, best first.
+        """
+        terms = set(tokenize(question))
+        scores = []
+        for table, term_freqs in self._term_freqs.items():
+            norm = self.k1 * (1 - self.b + self.b * self._lengths[table] / (self._avg_length or 1))
+            score = 0.0
+            for term in terms:
+                freq = term_freqs.get(term)
+                if freq:
+                    score += self._idf[term] * freq * (self.k1 + 1) / (freq + norm)
+            if score > 0:
+                scores.append((table, score))
+        scores.sort(key=lambda item: item[1], reverse=True)
+        return scores
+
+    def select(self, question, top_k=DEFAULT_TOP_K, token_budget=None):
+        """
+        Picks the most relevant tables, stopping at top_k or when the rendered schema
+        would exceed token_budget. The best table is always kept.
+
+        Returns:
+        dict: The pruned metadata, empty if nothing matched.
+        """
+        selected = {}
+        for table, _ in self.rank(question)[:top_k]:
+            candidate = dict(selected, **{table: self.metadata[table]})
+            if selected and token_budget and estimate_tokens(render_schema(candidate)) > token_budget:
+                break
+            selected = candidate
+        return selected
+
+    def render(self, question, top_k=DEFAULT_TOP_K, token_budget=None):
+        """
+        Renders only the relevant tables for the prompt, falling back to the full schema
+        when no table matches the question.
+
+        Returns:
+        str: The schema text for `{schema_info}`.
+        """
+        selected = self.select(question, top_k=top_k, token_budget=token_budget)
+        return render_schema(selected or self.metadata)
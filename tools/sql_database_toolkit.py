@@ -1,6 +1,10 @@
-from sqlalchemy import inspect
-from sqlalchemy.sql import text
-import pandas as pd
+import copy
+
+from project_utils.cancellation import QueryGovernorError
+from project_utils.tracing import get_tracer, EXECUTION
+
+# SQLAlchemy, pandas and pyarrow are imported by the functions that need them: the
+# agent imports this module for the tool descriptions even before any query runs.
 
 def get_metadata(engine):
     """
@@ -12,13 +16,8 @@ def get_metadata(engine):
     Returns:
         dict: A dictionary where keys are table names and values are lists of column details.
     """
-    inspector = inspect(engine)
-    tables = inspector.get_table_names()
-    metadata = {}
-    for table in tables:
-        columns = inspector.get_columns(table)
-        metadata[table] = [{"name": col["name"], "type": col["type"]} for col in columns]
-    return metadata
+    from tools.schema_catalog import get_schema_catalog
+    return get_schema_catalog(engine).metadata()
 
 
 def list_tables(engine):
@@ -31,8 +30,8 @@ def list_tables(engine):
     Returns:
         list: A list of table names present in the database.
     """
-    inspector = inspect(engine)
-    return inspector.get_table_names()
+    from tools.schema_catalog import get_schema_catalog
+    return get_schema_catalog(engine).tables()
 
 
 def check_query(engine, query):
@@ -72,16 +71,15 @@ def check_query(engine, query):
     >>> check_query(engine, "SELECT * FROM transactions WHERE amount > 1000;")
     "Valid SQL query."
     """
-    try:
-        with engine.connect() as conn:
-            conn.execute(text(query))  # Validate query execution
+    from tools.query_validator import validate_query
+    validation = validate_query(engine, query)
+    if validation["valid"]:
         return "Valid SQL query."
-    except Exception as e:
-        return f"Invalid SQL query: {str(e)}"
+    return f"Invalid SQL query: {validation['error']}"
 
 
 
-def execute_query(engine, query):
+def execute_query(engine, query, max_rows=None, cancel_token=None):
     """
     Executes a SQL query and returns the results.
 
@@ -94,14 +92,39 @@ def execute_query(engine, query):
                                     Example: 
                                     `SELECT MAX("column name") FROM table;` or 
                                     `SELECT MAX(`column name`) FROM table;`
+        max_rows (int, optional): Maximum number of rows returned. Defaults to the engine's row limit.
+        cancel_token (CancellationToken, optional): Stops the query when the request is abandoned.
 
     Returns:
-        pandas.DataFrame: A DataFrame containing the query results.
+        pandas.DataFrame: A DataFrame containing the query results, or
+        dict: {"error", "code", "limit"} if the query hit a time, row or size limit or was cancelled.
     """
-    with engine.connect() as conn:
-        result = conn.execute(text(query))  # Wrap the query in `text`
-        data = result.fetchall()
-        columns = result.keys()
-        return pd.DataFrame(data, columns=columns)
+    from tools.query_governor import get_query_limits
+    from tools.result_cache import cached_result
+
+    limits = get_query_limits(engine)
+    if max_rows is not None and (limits.max_rows is None or max_rows < limits.max_rows):
+        limits = copy.copy(limits)
+        limits.max_rows = max_rows
+    # Limits change what a query returns, so they are part of the cache key
+    variant = ("rows", limits.max_rows, limits.max_bytes, limits.exploratory_limit)
+    try:
+        # Identical (normalized) queries on an unchanged database are served from cache
+        data = cached_result(engine, query, variant, lambda: _run_query(engine, query, limits, cancel_token))
+    except QueryGovernorError as e:
+        return e.to_dict()
+    return data
+
+
+def _run_query(engine, query, limits, cancel_token):
+    from tools.database_conn import get_read_engine
+    from tools.query_governor import governed_read
+
+    # Rows are streamed in batches into Arrow and converted once, under the query limits
+    with get_tracer().span(EXECUTION) as span:
+        # Generated queries are read-only and may run on a read replica
+        data, result = governed_read(get_read_engine(engine), query, limits=limits, token=cancel_token)
+        span.set(rows=result.rows_read, bytes=result.bytes_read)
+        return data
     
 